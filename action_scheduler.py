@@ -0,0 +1,246 @@
+"""
+REST Action Scheduler
+Orders Discord API actions by priority and rate-limit bucket
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+import logging
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from discord.http import Route
+
+logger = logging.getLogger(__name__)
+
+# Discord allows 50 requests per second per bot token across all routes
+GLOBAL_RATE_LIMIT = 50
+
+
+class ActionPriority(IntEnum):
+    """Lower values are dispatched first"""
+    CONTAINMENT = 0
+    BAN = 1
+    RESTORATION = 2
+    COSMETIC = 3
+
+
+def route_bucket(method: str, path: str, **parameters) -> str:
+    """Build the rate-limit key discord.py uses for a route before the bucket hash is known"""
+    route = Route(method, path, **parameters)
+    return f"{route.key}:{route.major_parameters}"
+
+
+class _Action:
+    __slots__ = ('priority', 'seq', 'bucket', 'factory', 'key', 'future', 'enqueued_at', 'superseded')
+
+    def __init__(self, priority, seq, bucket, factory, key, future, enqueued_at):
+        self.priority = priority
+        self.seq = seq
+        self.bucket = bucket
+        self.factory = factory
+        self.key = key
+        self.future = future
+        self.enqueued_at = enqueued_at
+        self.superseded = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _GlobalLimiter:
+    """Token bucket for the global rate limit that hands out tokens in priority order"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._pump_task = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(float(self.rate), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, priority: int):
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        await future
+
+    async def _pump(self):
+        while self._waiters:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                continue
+
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+
+
+class _Bucket:
+    __slots__ = ('key', 'queue', 'workers')
+
+    def __init__(self, key: str):
+        self.key = key
+        self.queue: List[_Action] = []
+        self.workers = 0
+
+
+class ActionScheduler:
+    """Central scheduler for REST actions shared by defense, toxicity and music code.
+
+    Actions are grouped by discord.py rate-limit bucket. Each bucket drains its own
+    priority queue so independent buckets run concurrently, while every request also
+    takes a token from a priority-ordered global limiter. Exact per-bucket remaining
+    counts and resets are still enforced by discord.py's HTTP client.
+    """
+
+    def __init__(self, global_rate: float = GLOBAL_RATE_LIMIT, bucket_concurrency: int = 4):
+        self.bucket_concurrency = bucket_concurrency
+        self._limiter = _GlobalLimiter(global_rate)
+        self._buckets: Dict[str, _Bucket] = {}
+        self._pending: Dict[Hashable, _Action] = {}
+        self._seq = itertools.count()
+        self._stats = {
+            priority: {
+                'queued': 0,
+                'completed': 0,
+                'failed': 0,
+                'coalesced': 0,
+                'total_time_to_apply': 0.0,
+                'max_time_to_apply': 0.0
+            }
+            for priority in ActionPriority
+        }
+
+    def submit(self, bucket: str, factory: Callable[[], Awaitable[Any]],
+               priority: ActionPriority = ActionPriority.COSMETIC,
+               key: Optional[Hashable] = None) -> asyncio.Future:
+        """Queue an action and return a future for its result.
+
+        ``factory`` is called only when the action is dispatched. Actions sharing a
+        ``key`` that are still queued are coalesced: the latest factory wins and the
+        action runs once, at the most urgent priority requested.
+        """
+        priority = ActionPriority(priority)
+
+        if key is not None and key in self._pending:
+            pending = self._pending[key]
+            self._stats[priority]['coalesced'] += 1
+            if priority >= pending.priority:
+                pending.factory = factory
+                return pending.future
+
+            # Re-queue at the higher priority, sharing the original future
+            pending.superseded = True
+            self._stats[pending.priority]['queued'] -= 1
+            action = _Action(priority, next(self._seq), pending.bucket, factory, key,
+                             pending.future, pending.enqueued_at)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            action = _Action(priority, next(self._seq), bucket, factory, key, future, time.monotonic())
+
+        if key is not None:
+            self._pending[key] = action
+
+        state = self._buckets.get(action.bucket)
+        if state is None:
+            state = self._buckets[action.bucket] = _Bucket(action.bucket)
+        heapq.heappush(state.queue, action)
+        self._stats[priority]['queued'] += 1
+
+        if state.workers < self.bucket_concurrency:
+            state.workers += 1
+            asyncio.create_task(self._drain(state))
+
+        return action.future
+
+    async def run(self, bucket: str, factory: Callable[[], Awaitable[Any]],
+                  priority: ActionPriority = ActionPriority.COSMETIC,
+                  key: Optional[Hashable] = None) -> Any:
+        """Queue an action and wait for it to be applied"""
+        return await self.submit(bucket, factory, priority=priority, key=key)
+
+    async def _drain(self, state: _Bucket):
+        try:
+            while state.queue:
+                action = heapq.heappop(state.queue)
+                if action.superseded:
+                    continue
+
+                self._stats[action.priority]['queued'] -= 1
+                if action.key is not None and self._pending.get(action.key) is action:
+                    del self._pending[action.key]
+
+                if action.future.done():
+                    continue
+
+                await self._limiter.acquire(action.priority)
+                await self._apply(action)
+        finally:
+            state.workers -= 1
+            if not state.workers and not state.queue:
+                self._buckets.pop(state.key, None)
+
+    async def _apply(self, action: _Action):
+        stats = self._stats[action.priority]
+        try:
+            result = await action.factory()
+        except Exception as e:
+            stats['failed'] += 1
+            logger.error(f"Scheduled action failed in bucket {action.bucket}: {e}")
+            if not action.future.done():
+                action.future.set_exception(e)
+            return
+
+        elapsed = time.monotonic() - action.enqueued_at
+        stats['completed'] += 1
+        stats['total_time_to_apply'] += elapsed
+        stats['max_time_to_apply'] = max(stats['max_time_to_apply'], elapsed)
+        if not action.future.done():
+            action.future.set_result(result)
+
+    def dispatched(self) -> int:
+        """Total actions sent to Discord so far, successful or not"""
+        return sum(stats['completed'] + stats['failed'] for stats in self._stats.values())
+
+    def queue_depth(self, priority: Optional[ActionPriority] = None) -> int:
+        """Number of queued actions, optionally for one priority"""
+        if priority is not None:
+            return self._stats[ActionPriority(priority)]['queued']
+        return sum(stats['queued'] for stats in self._stats.values())
+
+    def get_metrics(self) -> Dict:
+        """Get queue depth and time-to-apply metrics per priority"""
+        priorities = {}
+        for priority, stats in self._stats.items():
+            completed = stats['completed']
+            priorities[priority.name.lower()] = {
+                'queued': stats['queued'],
+                'completed': completed,
+                'failed': stats['failed'],
+                'coalesced': stats['coalesced'],
+                'avg_time_to_apply': stats['total_time_to_apply'] / completed if completed else 0.0,
+                'max_time_to_apply': stats['max_time_to_apply']
+            }
+
+        return {
+            'queue_depth': self.queue_depth(),
+            'active_buckets': len(self._buckets),
+            'priorities': priorities
+        }
@@ -17,6 +17,8 @@ import logging
 import time
 from datetime import datetime, timedelta
 
+from action_scheduler import ActionPriority, route_bucket
+
 logger = logging.getLogger(__name__)
 
 class AdvancedMusicSystem:
@@ -701,11 +703,19 @@ class AdvancedMusicSystem:
             
             channel = voice_client.channel
             if channel:
-                await channel.send(embed=embed)
+                await self.send_embed(channel, embed)
             
         except Exception as e:
             logger.error(f"Error sending queue notification: {e}")
     
+    async def send_embed(self, channel, embed: discord.Embed):
+        """Send a music embed at cosmetic priority so defense actions go first"""
+        await self.bot.action_scheduler.run(
+            route_bucket('POST', '/channels/{channel_id}/messages', channel_id=channel.id),
+            lambda: channel.send(embed=embed),
+            priority=ActionPriority.COSMETIC
+        )
+    
     async def play_next(self, guild_id: int, voice_client):
         """Play next track with enhanced controls"""
         try:
@@ -806,7 +816,7 @@ class AdvancedMusicSystem:
             
             channel = voice_client.channel
             if channel:
-                await channel.send(embed=embed)
+                await self.send_embed(channel, embed)
             
         except Exception as e:
             logger.error(f"Error sending now playing message: {e}")
@@ -0,0 +1,170 @@
+"""
+Asset Archiver
+Downloads emojis, guild icons and banners into content-addressed files, so restores can re-upload them
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import aiohttp
+
+from backup_catalog import BackupCatalog
+from backup_writer import write_atomic
+from timing import now_ms
+
+logger = logging.getLogger(__name__)
+
+# Downloads in flight at once; also the size of the connection pool
+ASSET_CONCURRENCY = 8
+ASSET_TIMEOUT_SECONDS = 30
+
+# Discord rejects larger uploads, so a bigger response cannot be restored anyway
+ASSET_MAX_BYTES = 10 * 1024 * 1024
+
+
+class AssetArchiver:
+    """Archives CDN assets under the SHA-256 of their bytes.
+
+    Backups only hold CDN URLs, which stop working once the emoji or icon is
+    deleted. Every URL is downloaded once through one pooled ``aiohttp``
+    session, at most ``concurrency`` at a time, and stored as
+    ``assets/<hash[:2]>/<hash>``. Discord asset URLs never change content,
+    so a URL archived before is not downloaded again, and identical bytes
+    behind different URLs are stored once. With a catalog, the URL index
+    survives restarts.
+
+    The session is opened on the first download; call ``close`` on shutdown.
+    """
+
+    def __init__(self, directory: str = 'backups', catalog: Optional[BackupCatalog] = None,
+                 concurrency: int = ASSET_CONCURRENCY):
+        self.directory = directory
+        self.catalog = catalog
+        self.concurrency = concurrency
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._known: Dict[str, str] = {}  # URL -> asset hash
+        self._writing = set()
+        self.stats = {'requested': 0, 'cached': 0, 'downloaded': 0, 'failed': 0, 'objects_written': 0,
+                      'objects_reused': 0, 'bytes_downloaded': 0, 'download_seconds': 0.0}
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, 'assets', digest[:2], digest)
+
+    def has(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def read(self, digest: str) -> bytes:
+        with open(self.path(digest), 'rb') as f:
+            return f.read()
+
+    def _open_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=ASSET_TIMEOUT_SECONDS),
+                raise_for_status=True
+            )
+        return self._session
+
+    def _lookup(self, urls: List[str]) -> Dict[str, str]:
+        """Known or catalogued URLs whose asset file is still on disk"""
+        found = {}
+        for url in urls:
+            digest = self._known.get(url)
+            if digest is None and self.catalog is not None:
+                digest = self.catalog.asset(url)
+            if digest is not None and self.has(digest):
+                found[url] = digest
+        return found
+
+    async def archive(self, urls: Iterable[Optional[str]]) -> Dict[str, str]:
+        """Archive every URL not archived before; returns URL -> asset hash for every URL available"""
+        urls = list(dict.fromkeys(url for url in urls if url))
+        self.stats['requested'] += len(urls)
+
+        # Cached URLs are re-checked too: retention may have deleted their file since
+        found = await asyncio.to_thread(self._lookup, urls)
+        for url in urls:
+            if url not in found:
+                self._known.pop(url, None)
+        self._known.update(found)
+        missing = [url for url in urls if url not in self._known]
+        self.stats['cached'] += len(urls) - len(missing)
+
+        if missing:
+            session = self._open_session()
+            start = time.perf_counter()
+            # The connector's pool limit bounds how many of these are downloading at once
+            await asyncio.gather(*[self._fetch(session, url) for url in missing])
+            self.stats['download_seconds'] += time.perf_counter() - start
+
+        archived = {url: self._known.get(url) for url in urls}
+        return {url: digest for url, digest in archived.items() if digest is not None}
+
+    async def _fetch(self, session: aiohttp.ClientSession, url: str):
+        try:
+            async with session.get(url) as response:
+                if (response.content_length or 0) > ASSET_MAX_BYTES:
+                    raise ValueError(f"asset is {response.content_length} bytes")
+                data = await response.read()
+            if len(data) > ASSET_MAX_BYTES:
+                raise ValueError(f"asset is {len(data)} bytes")
+
+            digest = hashlib.sha256(data).hexdigest()
+            if digest in self._writing or self.has(digest):
+                self.stats['objects_reused'] += 1
+            else:
+                self._writing.add(digest)
+                try:
+                    await asyncio.to_thread(self._write, digest, data)
+                finally:
+                    self._writing.discard(digest)
+                self.stats['objects_written'] += 1
+
+            self._known[url] = digest
+            self.stats['downloaded'] += 1
+            self.stats['bytes_downloaded'] += len(data)
+            if self.catalog is not None:
+                await asyncio.to_thread(self.catalog.record_asset, url, digest, len(data), now_ms())
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.error(f"Error archiving asset {url}: {e}")
+
+    def _write(self, digest: str, data: bytes):
+        path = self.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, data)
+
+    def delete(self, digest: str):
+        """Remove an asset no snapshot references any more, so its URLs are downloaded again if needed"""
+        for url in [url for url, known in self._known.copy().items() if known == digest]:
+            self._known.pop(url, None)
+        if self.catalog is not None:
+            self.catalog.forget_asset(digest)
+        try:
+            os.remove(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+    def report(self) -> Dict:
+        """Download throughput, and the share of requested assets that needed no new file"""
+        stats = self.stats
+        seconds = stats['download_seconds']
+        requested = stats['requested']
+        return {
+            'requested': requested,
+            'downloaded': stats['downloaded'],
+            'failed': stats['failed'],
+            'throughput_bytes_per_second': stats['bytes_downloaded'] / seconds if seconds else 0.0,
+            'assets_per_second': stats['downloaded'] / seconds if seconds else 0.0,
+            'dedup_ratio': (stats['cached'] + stats['objects_reused']) / requested if requested else 0.0,
+        }
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
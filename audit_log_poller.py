@@ -0,0 +1,182 @@
+"""
+Audit Log Poller
+Attributes destructive guild actions to their actors with batched audit-log fetches
+"""
+
+import discord
+import asyncio
+import time
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from action_scheduler import ActionScheduler, ActionPriority, route_bucket
+from event_pipeline import GuildActionEvent
+
+logger = logging.getLogger(__name__)
+
+# Destructive audit-log actions and the action type used by GuildActionEvent
+DESTRUCTIVE_ACTIONS = {
+    discord.AuditLogAction.channel_delete: 'channel_delete',
+    discord.AuditLogAction.role_delete: 'role_delete',
+    discord.AuditLogAction.ban: 'ban',
+    discord.AuditLogAction.kick: 'kick',
+    discord.AuditLogAction.member_prune: 'prune',
+}
+
+BURST_WINDOW = 2.0  # Seconds of events batched into one audit-log fetch
+FETCH_LIMIT = 100
+MAX_ATTRIBUTION_ATTEMPTS = 3
+RATE_WINDOW = 60.0
+ROGUE_ACTION_THRESHOLD = 5  # Deletions per RATE_WINDOW by one actor
+
+# Only deletions count toward isolation; moderators banning raiders must never be isolated mid-raid
+ROGUE_ACTIONS = frozenset({'channel_delete', 'role_delete'})
+
+
+class _GuildAudit:
+    __slots__ = ('pending', 'fetch_task', 'last_entry_id', 'actor_actions', 'flagged')
+
+    def __init__(self):
+        self.pending: List[GuildActionEvent] = []
+        self.fetch_task = None
+        self.last_entry_id: Optional[int] = None
+        self.actor_actions: Dict[int, deque] = {}
+        self.flagged = set()
+
+
+class AuditLogPoller:
+    """Batches audit-log reads so attribution costs one request per burst, not per event.
+
+    The first tracked action in a guild starts a burst window; every action that
+    arrives during the window is attributed by the same fetch. Entries are
+    deduplicated by ID, so each deletion is counted once toward its actor's
+    rate. Actors whose deletion rate crosses the threshold are reported once
+    through ``on_rogue_actor``; bans, kicks and prunes are attributed only.
+    """
+
+    def __init__(self, scheduler: ActionScheduler,
+                 on_rogue_actor: Optional[Callable[[discord.Guild, int, int], Awaitable[None]]] = None,
+                 burst_window: float = BURST_WINDOW, rate_window: float = RATE_WINDOW,
+                 rogue_threshold: int = ROGUE_ACTION_THRESHOLD):
+        self.scheduler = scheduler
+        self.on_rogue_actor = on_rogue_actor
+        self.burst_window = burst_window
+        self.rate_window = rate_window
+        self.rogue_threshold = rogue_threshold
+        self._guilds: Dict[int, _GuildAudit] = {}
+        self.fetches = 0
+
+    def _audit(self, guild_id: int) -> _GuildAudit:
+        audit = self._guilds.get(guild_id)
+        if audit is None:
+            audit = self._guilds[guild_id] = _GuildAudit()
+        return audit
+
+    async def handle_event(self, event: GuildActionEvent):
+        """Event pipeline subscriber: queue the action for the guild's next batched fetch"""
+        audit = self._audit(event.guild.id)
+        audit.pending.append(event)
+        if audit.fetch_task is None or audit.fetch_task.done():
+            audit.fetch_task = asyncio.create_task(self._burst(event.guild, audit))
+
+    async def _burst(self, guild: discord.Guild, audit: _GuildAudit):
+        for _ in range(MAX_ATTRIBUTION_ATTEMPTS):
+            await asyncio.sleep(self.burst_window)
+            try:
+                await self.scheduler.run(
+                    route_bucket('GET', '/guilds/{guild_id}/audit-logs', guild_id=guild.id),
+                    lambda: self.poll(guild),
+                    priority=ActionPriority.CONTAINMENT,
+                    key=('audit_log', guild.id)
+                )
+            except Exception as e:
+                logger.error(f"Error fetching audit log for {guild.name}: {e}")
+
+            await self._report_rogue_actors(guild, audit)
+            if not audit.pending:
+                return
+
+        # Entries never showed up (missing View Audit Log permission, or too old)
+        audit.pending.clear()
+
+    async def poll(self, guild: discord.Guild) -> int:
+        """Fetch new audit-log entries once and attribute pending actions; returns new entries"""
+        audit = self._audit(guild.id)
+        options = {'limit': FETCH_LIMIT}
+        if audit.last_entry_id:
+            options['after'] = discord.Object(id=audit.last_entry_id)
+
+        entries = []
+        async for entry in guild.audit_logs(**options):
+            entries.append(entry)
+        self.fetches += 1
+
+        new_entries = 0
+        for entry in sorted(entries, key=lambda entry: entry.id):
+            if audit.last_entry_id is not None and entry.id <= audit.last_entry_id:
+                continue  # Already counted
+            new_entries += 1
+            self.record_entry(guild.id, entry)
+
+        if entries:
+            audit.last_entry_id = max([entry.id for entry in entries] + [audit.last_entry_id or 0])
+        return new_entries
+
+    def record_entry(self, guild_id: int, entry):
+        """Attribute one audit-log entry to its actor and any matching pending action"""
+        action_type = DESTRUCTIVE_ACTIONS.get(entry.action)
+        if action_type is None or entry.user is None:
+            return
+
+        audit = self._audit(guild_id)
+        actor_id = entry.user.id
+        if action_type in ROGUE_ACTIONS:
+            actions = audit.actor_actions.get(actor_id)
+            if actions is None:
+                actions = audit.actor_actions[actor_id] = deque()
+            actions.append(entry.created_at.timestamp())
+
+        target_id = getattr(entry.target, 'id', None)
+        for event in audit.pending:
+            if event.action_type == action_type and event.target_id == target_id:
+                event.actor_id = actor_id
+                audit.pending.remove(event)
+                break
+
+    def actor_rates(self, guild_id: int) -> Dict[int, int]:
+        """Deletions per actor within the rate window"""
+        audit = self._guilds.get(guild_id)
+        if audit is None:
+            return {}
+
+        cutoff = time.time() - self.rate_window
+        rates = {}
+        for actor_id, actions in list(audit.actor_actions.items()):
+            while actions and actions[0] < cutoff:
+                actions.popleft()
+            if actions:
+                rates[actor_id] = len(actions)
+            else:
+                del audit.actor_actions[actor_id]
+        return rates
+
+    async def _report_rogue_actors(self, guild: discord.Guild, audit: _GuildAudit):
+        for actor_id, count in self.actor_rates(guild.id).items():
+            if count < self.rogue_threshold or actor_id in audit.flagged:
+                continue
+            audit.flagged.add(actor_id)
+            logger.warning(f"🎯 Rogue actor {actor_id} in {guild.name}: {count} destructive actions in {self.rate_window:.0f}s")
+            if self.on_rogue_actor:
+                await self.on_rogue_actor(guild, actor_id, count)
+
+    def clear_flag(self, guild_id: int, actor_id: int):
+        """Allow an actor to be reported again"""
+        audit = self._guilds.get(guild_id)
+        if audit:
+            audit.flagged.discard(actor_id)
+
+    def forget_guild(self, guild_id: int):
+        audit = self._guilds.pop(guild_id, None)
+        if audit and audit.fetch_task and not audit.fetch_task.done():
+            audit.fetch_task.cancel()
@@ -4,17 +4,46 @@ Discord Music Bot with Hidden Defense System
 Automatic backup script
 """
 
+import io
 import os
+import sys
 import json
 import shutil
 import gzip
+import hashlib
+import tarfile
+import time
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backup_catalog import BackupCatalog, KIND_BOT
+from log_tail import tail_lines
+from retention import expired
+from timing import DAY_MS, HOUR_MS, from_ms, now_ms
+
+# Lines of each log kept in a full backup
+LOG_TAIL_LINES = 1000
+
+class HashingWriter:
+    """File wrapper that hashes and counts everything written through it"""
+    
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+        self.size = 0
+    
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        return self.f.write(data)
+
 class BackupManager:
     def __init__(self, backup_dir="backups"):
         self.backup_dir = Path(backup_dir)
         self.backup_dir.mkdir(exist_ok=True)
+        self.catalog = BackupCatalog(str(self.backup_dir))
     
     def create_backup(self, data, backup_type="manual"):
         """Create a backup of the given data"""
@@ -27,6 +56,12 @@ class BackupManager:
             with gzip.open(filepath, 'wt', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, default=str)
             
+            digest = hashlib.sha256()
+            with open(filepath, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+            self.catalog.record(str(filepath), KIND_BOT, now_ms(), filepath.stat().st_size, digest.hexdigest())
+            
             print(f"✅ Backup created: {filename}")
             return str(filepath)
             
@@ -37,8 +72,11 @@ class BackupManager:
     def restore_backup(self, backup_file):
         """Restore data from backup file"""
         try:
-            with gzip.open(backup_file, 'rt', encoding='utf-8') as f:
-                data = json.load(f)
+            if str(backup_file).endswith('.tar.gz'):
+                data = self._read_archive(backup_file)
+            else:
+                with gzip.open(backup_file, 'rt', encoding='utf-8') as f:
+                    data = json.load(f)
             
             print(f"✅ Backup restored: {backup_file}")
             return data
@@ -48,29 +86,25 @@ class BackupManager:
             return None
     
     def list_backups(self):
-        """List all available backups"""
-        backups = []
-        for file in self.backup_dir.glob("*.json.gz"):
-            stat = file.stat()
-            backups.append({
-                'filename': file.name,
-                'size': stat.st_size,
-                'created': datetime.fromtimestamp(stat.st_ctime),
-                'path': str(file)
-            })
-        
-        return sorted(backups, key=lambda x: x['created'], reverse=True)
+        """List all available backups, newest first, from the catalog"""
+        return [{
+            'filename': os.path.basename(entry['path']),
+            'size': entry['size'],
+            'created': from_ms(entry['created_ms']),
+            'path': entry['path']
+        } for entry in self.catalog.entries(kind=KIND_BOT)]
     
     def cleanup_old_backups(self, keep_days=30):
-        """Remove backups older than specified days"""
+        """Thin out backups: all from the last hour, hourly for a day, daily up to keep_days"""
         try:
-            cutoff_date = datetime.now().timestamp() - (keep_days * 24 * 60 * 60)
+            tiers = ((HOUR_MS, 0), (DAY_MS, HOUR_MS), (keep_days * DAY_MS, DAY_MS))
             removed_count = 0
             
-            for file in self.backup_dir.glob("*.json.gz"):
-                if file.stat().st_ctime < cutoff_date:
-                    file.unlink()
-                    removed_count += 1
+            # Only catalog rows are read, never the whole directory; the newest backup is always kept
+            for entry in expired(self.catalog.entries(kind=KIND_BOT), now_ms(), tiers):
+                Path(entry['path']).unlink(missing_ok=True)
+                self.catalog.remove(entry['path'])
+                removed_count += 1
             
             print(f"✅ Cleaned up {removed_count} old backups")
             return removed_count
@@ -80,27 +114,72 @@ class BackupManager:
             return 0
     
     def backup_bot_data(self):
-        """Backup all bot data"""
+        """Backup all bot data as a tar.gz streamed to disk, so memory use does not grow with log or file size"""
         try:
-            # Collect all data to backup
-            data = {
-                'timestamp': datetime.now().isoformat(),
+            timestamp = datetime.now()
+            filename = f"full_backup_{timestamp.strftime('%Y%m%d_%H%M%S')}.tar.gz"
+            filepath = self.backup_dir / filename
+            tmp_path = Path(f"{filepath}.tmp")
+            
+            manifest = {
+                'timestamp': timestamp.isoformat(),
                 'backup_type': 'full',
                 'bot_version': '1.0.0',
-                'data': {
-                    'config': self._backup_config(),
-                    'logs': self._backup_logs(),
-                    'database': self._backup_database(),
-                    'files': self._backup_files()
-                }
+                'database': self._backup_database()
             }
             
-            return self.create_backup(data, "full")
+            # Written in one sequential pass; the hash is taken on the way out instead of re-reading the file
+            with open(tmp_path, 'wb') as f:
+                writer = HashingWriter(f)
+                with tarfile.open(fileobj=writer, mode='w|gz') as tar:
+                    self._add_bytes(tar, 'manifest.json', json.dumps(manifest, indent=2, default=str).encode('utf-8'))
+                    for name, content in self._backup_config().items():
+                        self._add_bytes(tar, f"config/{name}", content.encode('utf-8'))
+                    for log_file, lines in self._backup_logs().items():
+                        self._add_bytes(tar, log_file, ''.join(lines).encode('utf-8'))
+                    for file in self._backup_files():
+                        tar.add(file, arcname=f"files/{file}")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, filepath)
+            
+            self.catalog.record(str(filepath), KIND_BOT, now_ms(), writer.size, writer.digest.hexdigest())
+            
+            print(f"✅ Backup created: {filename}")
+            return str(filepath)
             
         except Exception as e:
             print(f"❌ Error backing up bot data: {e}")
             return None
     
+    def _add_bytes(self, tar, name, data):
+        """Add an in-memory member to an archive"""
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        tar.addfile(info, io.BytesIO(data))
+    
+    def _read_archive(self, backup_file):
+        """Rebuild the backup_bot_data document from a tar.gz backup"""
+        data = {'data': {'config': {}, 'logs': {}, 'files': {}}}
+        with tarfile.open(backup_file, 'r:gz') as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                content = tar.extractfile(member).read().decode('utf-8', errors='replace')
+                section, _, name = member.name.partition('/')
+                if member.name == 'manifest.json':
+                    manifest = json.loads(content)
+                    data['data']['database'] = manifest.pop('database', None)
+                    data.update(manifest)
+                elif section == 'config':
+                    data['data']['config'][name] = content
+                elif section == 'logs':
+                    data['data']['logs'][member.name] = content.splitlines(keepends=True)
+                elif section == 'files':
+                    data['data']['files'][name] = content
+        return data
+    
     def _backup_config(self):
         """Backup configuration files"""
         config_data = {}
@@ -127,10 +206,8 @@ class BackupManager:
         
         for log_file in log_files:
             if os.path.exists(log_file):
-                with open(log_file, 'r') as f:
-                    # Get last 1000 lines
-                    lines = f.readlines()
-                    log_data[log_file] = lines[-1000:] if len(lines) > 1000 else lines
+                # Only the tail is read, however large the log has grown
+                log_data[log_file] = tail_lines(log_file, LOG_TAIL_LINES)
         
         return log_data
     
@@ -140,16 +217,9 @@ class BackupManager:
         return {"message": "Database backup not implemented"}
     
     def _backup_files(self):
-        """Backup important files"""
-        files_data = {}
+        """Important files to backup; their content is streamed into the archive"""
         important_files = ['main.py', 'defense_system.py', 'toxicity_analyzer.py', 'advanced_music_system.py']
-        
-        for file in important_files:
-            if os.path.exists(file):
-                with open(file, 'r') as f:
-                    files_data[file] = f.read()
-        
-        return files_data
+        return [file for file in important_files if os.path.exists(file)]
 
 if __name__ == "__main__":
     backup_manager = BackupManager()
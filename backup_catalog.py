@@ -0,0 +1,289 @@
+"""
+Backup Catalog
+SQLite index of every backup on disk, so lookups and retention never scan directories
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Backup kinds
+KIND_SNAPSHOT = 'snapshot'  # SnapshotStore manifest
+KIND_INCIDENT = 'incident'  # SnapshotStore manifest taken mid-raid; kept for forensics, never a restore base
+KIND_FULL = 'full'  # Legacy full guild backup written by BackupWriter
+KIND_BOT = 'bot'  # BackupManager archive of bot config, logs and files
+SNAPSHOT_KINDS = (KIND_SNAPSHOT, KIND_INCIDENT)
+
+# File name ending of incident manifests, which live next to the guild's snapshots
+INCIDENT_SUFFIX = '_incident.json'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+    path TEXT PRIMARY KEY,
+    guild_id INTEGER,
+    kind TEXT NOT NULL,
+    created_ms INTEGER NOT NULL,
+    checked_ms INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT
+);
+CREATE INDEX IF NOT EXISTS backups_guild ON backups (guild_id, created_ms);
+CREATE INDEX IF NOT EXISTS backups_guild_kind ON backups (guild_id, kind, created_ms);
+CREATE INDEX IF NOT EXISTS backups_kind ON backups (kind, created_ms);
+CREATE TABLE IF NOT EXISTS assets (
+    url TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_ms INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS assets_hash ON assets (hash);
+CREATE TABLE IF NOT EXISTS refs (
+    hash TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    asset INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS refs_free ON refs (count) WHERE count <= 0;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class BackupCatalog:
+    """One row per backup file: guild, kind, creation time, size and content hash.
+
+    Rows are keyed by path relative to the backup directory and indexed by
+    guild, kind and time, so the latest backup of a guild, listings and
+    retention cut-offs are B-tree lookups instead of ``listdir`` plus ``stat``
+    of every file. ``checked_ms`` is bumped when a later backup
+    found nothing changed, which keeps freshness checks accurate. Archived
+    emoji and icon downloads are indexed by URL in a second table, and
+    snapshot objects and assets carry reference counts in a third, so
+    retention frees exactly what expired snapshots held.
+
+    The database is opened on first use. A new catalog imports the files
+    already in the directory once; hashes of imported files are left empty.
+    The connection is shared by the event loop and backup worker threads.
+    """
+
+    def __init__(self, directory: str = 'backups', filename: str = 'catalog.db'):
+        self.directory = directory
+        self.path = os.path.join(directory, filename)
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(self.directory, exist_ok=True)
+            is_new = not os.path.exists(self.path)
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute('PRAGMA journal_mode=WAL')
+            has_refs = self._db.execute("SELECT 1 FROM sqlite_master WHERE name = 'refs'").fetchone()
+            self._db.executescript(SCHEMA)
+            if is_new:
+                self._import_existing()
+            if not has_refs:
+                # Snapshots written before reference counting are counted by the first retention run
+                with self._db:
+                    self._db.execute("INSERT OR REPLACE INTO meta VALUES ('refs_complete', '0')")
+        return self._db
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(path, self.directory)
+
+    def _entry(self, row: sqlite3.Row) -> Dict:
+        entry = dict(row)
+        entry['path'] = os.path.join(self.directory, entry['path'])
+        return entry
+
+    def _import_existing(self):
+        """Catalog backups written before the catalog existed"""
+        rows = []
+        snapshots_dir = os.path.join(self.directory, 'snapshots')
+        if os.path.isdir(snapshots_dir):
+            for guild_dir in os.listdir(snapshots_dir):
+                if not guild_dir.isdigit():
+                    continue
+                for name in os.listdir(os.path.join(snapshots_dir, guild_dir)):
+                    if name.endswith('.json'):
+                        kind = KIND_INCIDENT if name.endswith(INCIDENT_SUFFIX) else KIND_SNAPSHOT
+                        rows.append((os.path.join('snapshots', guild_dir, name), int(guild_dir), kind))
+
+        for name in os.listdir(self.directory):
+            prefix = name.split('_')[0]
+            if '_backup_' not in name or name.endswith('.tmp'):
+                continue
+            if prefix.isdigit():
+                rows.append((name, int(prefix), KIND_FULL))
+            else:
+                rows.append((name, None, KIND_BOT))
+
+        with self._db:
+            for relative, guild_id, kind in rows:
+                stat = os.stat(os.path.join(self.directory, relative))
+                created_ms = int(stat.st_mtime * 1000)
+                self._db.execute(
+                    'INSERT OR IGNORE INTO backups VALUES (?, ?, ?, ?, ?, ?, NULL)',
+                    (relative, guild_id, kind, created_ms, created_ms, stat.st_size)
+                )
+        if rows:
+            logger.info(f"📇 Backup catalog imported {len(rows)} existing backups")
+
+    def record(self, path: str, kind: str, created_ms: int, size: int,
+               digest: Optional[str] = None, guild_id: Optional[int] = None):
+        """Add or replace the row for a backup file"""
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.execute(
+                    'INSERT OR REPLACE INTO backups VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (self._relative(path), guild_id, kind, created_ms, created_ms, size, digest)
+                )
+
+    def touch(self, path: str, checked_ms: int):
+        """Mark a backup as still matching the live guild"""
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.execute('UPDATE backups SET checked_ms = ? WHERE path = ?', (checked_ms, self._relative(path)))
+
+    def remove(self, path: str):
+        self.remove_many([path])
+
+    def remove_many(self, paths: Iterable[str]):
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.executemany('DELETE FROM backups WHERE path = ?', [(self._relative(path),) for path in paths])
+
+    def latest(self, guild_id: Optional[int], kind: Optional[str] = None,
+               before_ms: Optional[int] = None) -> Optional[Dict]:
+        """Newest backup of a guild (``None`` for bot backups), optionally of one kind and created before a time"""
+        query = 'SELECT * FROM backups WHERE guild_id IS ?'
+        params = [guild_id]
+        if kind is not None:
+            query += ' AND kind = ?'
+            params.append(kind)
+        if before_ms is not None:
+            query += ' AND created_ms < ?'
+            params.append(before_ms)
+        with self._lock:
+            row = self._connection().execute(query + ' ORDER BY created_ms DESC LIMIT 1', params).fetchone()
+        return self._entry(row) if row else None
+
+    def entries(self, guild_id: Optional[int] = None, kind: Optional[str] = None,
+                limit: Optional[int] = None, newest_first: bool = True) -> List[Dict]:
+        """Backups filtered by guild and kind, ordered by creation time"""
+        query = 'SELECT * FROM backups WHERE 1'
+        params = []
+        if guild_id is not None:
+            query += ' AND guild_id = ?'
+            params.append(guild_id)
+        if kind is not None:
+            query += ' AND kind = ?'
+            params.append(kind)
+        query += f" ORDER BY created_ms {'DESC' if newest_first else 'ASC'}"
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self._connection().execute(query, params).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def older_than(self, cutoff_ms: int, kind: Optional[str] = None) -> List[Dict]:
+        """Backups created before ``cutoff_ms``, oldest first"""
+        query = 'SELECT * FROM backups WHERE created_ms < ?'
+        params = [cutoff_ms]
+        if kind is not None:
+            query = 'SELECT * FROM backups WHERE kind = ? AND created_ms < ?'
+            params = [kind, cutoff_ms]
+        with self._lock:
+            rows = self._connection().execute(query + ' ORDER BY created_ms', params).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def record_asset(self, url: str, digest: str, size: int, fetched_ms: int):
+        """Remember which archived asset a CDN URL downloaded to"""
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.execute('INSERT OR REPLACE INTO assets VALUES (?, ?, ?, ?)', (url, digest, size, fetched_ms))
+
+    def asset(self, url: str) -> Optional[str]:
+        """Hash of the asset archived from a URL, if it was downloaded before"""
+        with self._lock:
+            row = self._connection().execute('SELECT hash FROM assets WHERE url = ?', (url,)).fetchone()
+        return row[0] if row else None
+
+    def forget_asset(self, digest: str):
+        """Drop the URLs that downloaded to a deleted asset"""
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.execute('DELETE FROM assets WHERE hash = ?', (digest,))
+
+    def guild_ids(self, kind: str) -> List[Optional[int]]:
+        """Every guild with at least one backup of a kind"""
+        with self._lock:
+            rows = self._connection().execute('SELECT DISTINCT guild_id FROM backups WHERE kind = ?', (kind,)).fetchall()
+        return [row[0] for row in rows]
+
+    def add_refs(self, counts: Dict[str, int], asset: bool = False):
+        """Add references to objects (or assets), by hash"""
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.executemany(
+                    'INSERT INTO refs VALUES (?, ?, ?) ON CONFLICT (hash) DO UPDATE SET count = count + excluded.count',
+                    [(digest, count, int(asset)) for digest, count in counts.items()]
+                )
+
+    def release_refs(self, counts: Dict[str, int]) -> List[Tuple[str, bool]]:
+        """Drop references; returns (hash, is_asset) for everything no longer referenced, and forgets it"""
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.executemany('UPDATE refs SET count = count - ? WHERE hash = ?',
+                               [(count, digest) for digest, count in counts.items()])
+                # Unreferenced rows are deleted right away, so this partial index only holds this batch
+                freed = [(row[0], bool(row[1]))
+                         for row in db.execute('SELECT hash, asset FROM refs WHERE count <= 0')]
+                db.execute('DELETE FROM refs WHERE count <= 0')
+        return freed
+
+    def reset_refs(self):
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.execute('DELETE FROM refs')
+
+    def refs(self, digest: str) -> int:
+        with self._lock:
+            row = self._connection().execute('SELECT count FROM refs WHERE hash = ?', (digest,)).fetchone()
+        return row[0] if row else 0
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, value))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute('SELECT COUNT(*) FROM backups').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,148 @@
+"""
+Bulk Ban Pipeline
+Bans raid accounts in chunks through the bulk-ban endpoint
+"""
+
+import discord
+import asyncio
+import time
+import logging
+from typing import Dict, Iterable, List, Set, Tuple
+
+from discord.http import Route
+
+from action_scheduler import ActionScheduler, ActionPriority, route_bucket
+
+logger = logging.getLogger(__name__)
+
+# Discord accepts at most 200 user IDs per bulk-ban request
+BULK_BAN_CHUNK_SIZE = 200
+
+
+class BanPipeline:
+    """Collects ban candidates and bans them as fast as the API allows.
+
+    Candidates are deduplicated against each other and against IDs already known
+    to be banned, submitted to the bulk-ban endpoint in chunks, and fall back to
+    concurrent single bans through the REST scheduler when bulk banning fails.
+    """
+
+    def __init__(self, bot, scheduler: ActionScheduler):
+        self.bot = bot
+        self.scheduler = scheduler
+        self._banned: Dict[int, Set[int]] = {}
+
+    def mark_banned(self, guild_id: int, user_id: int):
+        """Record a ban seen from the gateway or applied elsewhere"""
+        self._banned.setdefault(guild_id, set()).add(user_id)
+
+    def mark_unbanned(self, guild_id: int, user_id: int):
+        banned = self._banned.get(guild_id)
+        if banned is not None:
+            banned.discard(user_id)
+
+    def is_banned(self, guild_id: int, user_id: int) -> bool:
+        return user_id in self._banned.get(guild_id, ())
+
+    async def ban(self, guild: discord.Guild, user_ids: Iterable[int], reason: str,
+                  delete_message_seconds: int = 0) -> Dict:
+        """Ban every candidate once and report throughput"""
+        start = time.monotonic()
+        known = self._banned.setdefault(guild.id, set())
+
+        requested = 0
+        candidates = []
+        seen = set()
+        for user_id in user_ids:
+            requested += 1
+            if user_id in known or user_id in seen:
+                continue
+            seen.add(user_id)
+            candidates.append(user_id)
+
+        banned: List[int] = []
+        failed: List[int] = []
+        for i in range(0, len(candidates), BULK_BAN_CHUNK_SIZE):
+            chunk = candidates[i:i + BULK_BAN_CHUNK_SIZE]
+            try:
+                chunk_banned, chunk_failed = await self.scheduler.run(
+                    route_bucket('POST', '/guilds/{guild_id}/bulk-ban', guild_id=guild.id),
+                    lambda chunk=chunk: self._bulk_ban(guild, chunk, reason, delete_message_seconds),
+                    priority=ActionPriority.BAN
+                )
+            except Exception as e:
+                logger.warning(f"Bulk ban failed in {guild.name}, falling back to single bans: {e}")
+                chunk_banned, chunk_failed = await self._single_bans(guild, chunk, reason, delete_message_seconds)
+
+            banned.extend(chunk_banned)
+            failed.extend(chunk_failed)
+
+        known.update(banned)
+
+        elapsed = time.monotonic() - start
+        report = {
+            'requested': requested,
+            'banned': len(banned),
+            'banned_ids': banned,
+            'failed': len(failed),
+            'skipped_duplicates': requested - len(candidates),
+            'elapsed_seconds': elapsed,
+            'bans_per_second': len(banned) / elapsed if elapsed > 0 else 0.0
+        }
+
+        if candidates:
+            logger.warning(
+                f"🚫 BAN PIPELINE: {report['banned']}/{len(candidates)} banned in {guild.name} "
+                f"in {elapsed:.2f}s ({report['bans_per_second']:.1f} bans/sec)"
+            )
+        return report
+
+    async def _bulk_ban(self, guild: discord.Guild, user_ids: List[int], reason: str,
+                        delete_message_seconds: int) -> Tuple[List[int], List[int]]:
+        # discord.py >= 2.4 exposes the endpoint directly
+        if hasattr(guild, 'bulk_ban'):
+            result = await guild.bulk_ban(
+                [discord.Object(id=user_id) for user_id in user_ids],
+                reason=reason,
+                delete_message_seconds=delete_message_seconds
+            )
+            return [user.id for user in result.banned], [user.id for user in result.failed]
+
+        data = await self.bot.http.request(
+            Route('POST', '/guilds/{guild_id}/bulk-ban', guild_id=guild.id),
+            json={
+                'user_ids': [str(user_id) for user_id in user_ids],
+                'delete_message_seconds': delete_message_seconds
+            },
+            reason=reason
+        )
+        return (
+            [int(user_id) for user_id in data.get('banned_users', [])],
+            [int(user_id) for user_id in data.get('failed_users', [])]
+        )
+
+    async def _single_bans(self, guild: discord.Guild, user_ids: List[int], reason: str,
+                           delete_message_seconds: int) -> Tuple[List[int], List[int]]:
+        futures = [
+            self.scheduler.submit(
+                route_bucket('PUT', '/guilds/{guild_id}/bans/{user_id}', guild_id=guild.id, user_id=user_id),
+                lambda user_id=user_id: guild.ban(
+                    discord.Object(id=user_id),
+                    reason=reason,
+                    delete_message_seconds=delete_message_seconds
+                ),
+                priority=ActionPriority.BAN,
+                key=('ban', guild.id, user_id)
+            )
+            for user_id in user_ids
+        ]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+
+        banned, failed = [], []
+        for user_id, result in zip(user_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error banning user {user_id}: {result}")
+                failed.append(user_id)
+            else:
+                banned.append(user_id)
+        return banned, failed
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark for AssetArchiver.archive
+Downloads emojis from a local HTTP server that adds CDN-like latency per
+request, comparing one download at a time with the pooled concurrent
+archiver, then archives the same guild again after a restart
+
+Usage: python benchmarks/bench_asset_archiver.py [emojis] [latency_ms] [duplicate_percent]
+"""
+
+import sys
+import os
+import time
+import asyncio
+import shutil
+import tempfile
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asset_archiver import AssetArchiver
+from backup_catalog import BackupCatalog
+
+EMOJI_BYTES = 64 * 1024
+
+
+async def run(emoji_count: int, latency: float, duplicate_percent: int):
+    # Every n-th emoji is a re-upload of the one before it, as servers copying popular emojis do
+    step = max(1, round(100 / duplicate_percent)) if duplicate_percent else 0
+    bodies = {}
+    for index in range(emoji_count):
+        source = index - 1 if step and index % step == 0 and index else index
+        bodies[f"/emojis/{index}.png"] = source.to_bytes(4, 'big') * (EMOJI_BYTES // 4)
+
+    async def serve(request):
+        await asyncio.sleep(latency)
+        return web.Response(body=bodies[request.path], content_type='image/png')
+
+    app = web.Application()
+    app.router.add_get('/emojis/{name}', serve)
+    server = TestServer(app)
+    await server.start_server()
+    directory = tempfile.mkdtemp()
+
+    try:
+        urls = [str(server.make_url(path)) for path in bodies]
+        print(f"{emoji_count} emojis of {EMOJI_BYTES // 1024} KiB, {latency * 1000:.0f} ms per request, "
+              f"{duplicate_percent}% duplicates")
+
+        for label, concurrency in (('sequential', 1), ('pooled x8', 8), ('pooled x32', 32)):
+            catalog = BackupCatalog(os.path.join(directory, label.replace(' ', '_')))
+            archiver = AssetArchiver(catalog.directory, catalog, concurrency)
+            start = time.perf_counter()
+            await archiver.archive(urls)
+            elapsed = time.perf_counter() - start
+            report = archiver.report()
+            print(f"  {label:12} {elapsed:7.2f} s  {report['throughput_bytes_per_second'] / 1024 / 1024:7.1f} MiB/s  "
+                  f"{report['assets_per_second']:7.1f} assets/s  dedup {report['dedup_ratio']:.0%}")
+
+            await archiver.close()
+
+            # The next backup, after a restart: every URL is found in the catalog
+            archiver = AssetArchiver(catalog.directory, catalog, concurrency)
+            start = time.perf_counter()
+            await archiver.archive(urls)
+            print(f"  {'  restarted':12} {time.perf_counter() - start:7.2f} s  "
+                  f"{archiver.stats['downloaded']} downloads  dedup {archiver.report()['dedup_ratio']:.0%}")
+            catalog.close()
+    finally:
+        await server.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    emoji_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+    duplicate_percent = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    asyncio.run(run(emoji_count, latency, duplicate_percent))
+
+
+if __name__ == "__main__":
+    main()
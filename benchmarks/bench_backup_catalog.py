@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark for locating and expiring backups
+Compares the directory scan restore_from_backup and BackupManager used with
+BackupCatalog index lookups
+
+Usage: python benchmarks/bench_backup_catalog.py [files] [guilds]
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backup_catalog import BackupCatalog, KIND_FULL
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    guild_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    lookups = 200
+    directory = tempfile.mkdtemp()
+
+    try:
+        catalog = BackupCatalog(directory)
+        catalog._connection()
+        for index in range(file_count):
+            guild_id = 1_000_000 + index % guild_count
+            name = f"{guild_id}_backup_{index:08d}.json"
+            with open(os.path.join(directory, name), 'wb') as f:
+                f.write(b'{}')
+            catalog.record(os.path.join(directory, name), KIND_FULL, index, 2, guild_id=guild_id)
+
+        start = time.perf_counter()
+        for index in range(lookups):
+            prefix = str(1_000_000 + index % guild_count)
+            files = [f for f in os.listdir(directory) if f.startswith(prefix) and not f.endswith('.tmp')]
+            sorted(files)[-1]
+        scan_latest = (time.perf_counter() - start) / lookups
+
+        start = time.perf_counter()
+        for index in range(lookups):
+            catalog.latest(1_000_000 + index % guild_count)
+        catalog_latest = (time.perf_counter() - start) / lookups
+
+        cutoff = file_count // 100
+        start = time.perf_counter()
+        expired = [name for name in os.listdir(directory)
+                   if name.endswith('.json') and os.stat(os.path.join(directory, name)).st_size
+                   and int(name[-13:-5]) < cutoff]
+        scan_expiry = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expired = catalog.older_than(cutoff, KIND_FULL)
+        catalog_expiry = time.perf_counter() - start
+
+        print(f"{file_count} backups across {guild_count} guilds")
+        print(f"  {'latest backup':20} listdir+sort {scan_latest * 1000:8.3f} ms   catalog {catalog_latest * 1000:8.3f} ms")
+        print(f"  {'expired backups':20} listdir+stat {scan_expiry * 1000:8.3f} ms   catalog {catalog_expiry * 1000:8.3f} ms"
+              f"  ({len(expired)} expired)")
+        catalog.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark for DefenseSystem.create_comprehensive_backup
+Compares bytes written and event-loop blocking time of the indented on-loop
+json.dump with the off-loop writer in each encoding
+
+Usage: python benchmarks/bench_backup_writer.py [channels] [roles]
+"""
+
+import sys
+import os
+import json
+import time
+import shutil
+import asyncio
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import discord
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from defense_system import DefenseSystem
+from backup_writer import BACKUP_FORMATS, BackupWriter
+from snapshot_store import SnapshotStore
+
+
+def make_guild(channel_count: int, role_count: int):
+    roles = [SimpleNamespace(id=10_000 + i, name=f"role-{i}", color=discord.Colour(i), hoist=False,
+                             mentionable=True, permissions=discord.Permissions(i), position=i)
+             for i in range(role_count)]
+    overwrite = discord.PermissionOverwrite(view_channel=False, send_messages=True)
+    channels = [SimpleNamespace(id=100_000 + i, name=f"channel-{i}", type=discord.ChannelType.text, position=i,
+                                category_id=None, overwrites={discord.Object(id=role.id): overwrite for role in roles[:20]})
+                for i in range(channel_count)]
+    return SimpleNamespace(
+        id=1, name="Benchmark Guild", member_count=50_000, owner_id=1, description=None, icon=None, banner=None,
+        verification_level=discord.VerificationLevel.low,
+        default_notifications=discord.NotificationLevel.only_mentions,
+        explicit_content_filter=discord.ContentFilter.disabled,
+        system_channel_id=None, rules_channel_id=None, public_updates_channel_id=None,
+        channels=channels, roles=roles, emojis=[]
+    )
+
+
+async def measure(coroutine_factory, runs: int):
+    """Longest event-loop stall (ms) seen by a 1ms ticker while the coroutine runs"""
+    worst = 0.0
+    for _ in range(runs):
+        stop = False
+        stalls = []
+
+        async def ticker():
+            last = time.perf_counter()
+            while not stop:
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                stalls.append(now - last - 0.001)
+                last = now
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0.005)
+        await coroutine_factory()
+        stop = True
+        await task
+        worst = max(worst, max(stalls) * 1000)
+    return worst
+
+
+async def main():
+    channel_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    role_count = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+    runs = 5
+    guild = make_guild(channel_count, role_count)
+    directory = tempfile.mkdtemp()
+
+    try:
+        bot = Mock()
+        bot.config = {'dev_user_id': 0}
+        defense_system = DefenseSystem(bot)
+        defense_system.backup_writer = BackupWriter(directory)
+        defense_system.snapshot_store = SnapshotStore(directory)
+        await defense_system.create_comprehensive_backup(guild)
+        backup = defense_system.snapshot_store.read_snapshot(defense_system.server_backups[guild.id].snapshot)
+
+        async def indented_on_loop():
+            with open(os.path.join(directory, 'indented.json'), 'w') as f:
+                json.dump(backup, f, indent=2)
+
+        print(f"create_comprehensive_backup ({channel_count} channels, {role_count} roles, worst of {runs})")
+        stall = await measure(indented_on_loop, runs)
+        size = os.path.getsize(os.path.join(directory, 'indented.json'))
+        print(f"  {'indented json on loop':24} {size / 1024:9.1f} KiB  loop stall {stall:7.2f} ms")
+
+        for compression in BACKUP_FORMATS:
+            defense_system.backup_writer = BackupWriter(directory, compression)
+            stall = await measure(lambda: defense_system.backup_writer.write(f'bench_{compression}', backup), runs)
+            size = defense_system.backup_writer.bytes_written / runs
+            print(f"  {compression + ' off loop':24} {size / 1024:9.1f} KiB  loop stall {stall:7.2f} ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
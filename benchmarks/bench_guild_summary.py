@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the memory DefenseSystem keeps per backed-up guild
+Compares holding every guild's latest backup dict with holding only the
+GuildSummary of its snapshot
+
+Usage: python benchmarks/bench_guild_summary.py [guilds] [channels] [roles]
+"""
+
+import sys
+import os
+import gc
+import time
+import shutil
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snapshot_store import SnapshotStore
+from bench_snapshot_store import make_backup
+
+
+def guild_backup(guild_id: int, channel_count: int, role_count: int):
+    backup = make_backup(channel_count, role_count)
+    backup['metadata'].update(guild_id=guild_id, created_at='2026-01-01T10:00:00')
+    for channel in backup['channels']:
+        channel['permissions'] = {target: dict(overwrite) for target, overwrite in channel['permissions'].items()}
+    return backup
+
+
+def main():
+    guild_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    channel_count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    role_count = int(sys.argv[3]) if len(sys.argv) > 3 else 250
+    directory = tempfile.mkdtemp()
+
+    try:
+        gc.collect()
+        tracemalloc.start()
+        backups = {guild_id: guild_backup(guild_id, channel_count, role_count) for guild_id in range(guild_count)}
+        full = tracemalloc.get_traced_memory()[0]
+        del backups
+        gc.collect()
+        tracemalloc.stop()
+
+        store = SnapshotStore(directory)
+        tracemalloc.start()
+        summaries = {}
+        for guild_id in range(guild_count):
+            store.write_snapshot(guild_backup(guild_id, channel_count, role_count))
+            summaries[guild_id] = store.summary(guild_id)
+        gc.collect()
+        compact = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        store.read_snapshot(summaries[0].snapshot)
+        load = time.perf_counter() - start
+
+        print(f"{guild_count} guilds ({channel_count} channels, {role_count} roles each)")
+        print(f"  {'full backups in memory':26} {full / 1024 / 1024:9.1f} MiB")
+        print(f"  {'guild summaries':26} {compact / 1024 / 1024:9.3f} MiB  ({full / max(compact, 1):.0f}x less)")
+        print(f"  {'lazy load for a restore':26} {load * 1000:9.1f} ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
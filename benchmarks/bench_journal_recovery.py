@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark for DefenseSystem crash recovery
+Compares replaying the full journal with loading a snapshot plus a short journal tail
+
+Usage: python benchmarks/bench_journal_recovery.py [guilds] [joins_per_guild]
+"""
+
+import sys
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from defense_system import DefenseSystem
+from defense_journal import DefenseJournal
+from combat_log_store import CombatLogStore
+
+
+def make_system(directory: str) -> DefenseSystem:
+    defense_system = DefenseSystem(Mock())
+    defense_system.combat_logs = CombatLogStore(os.path.join(directory, 'combat_logs'))
+    defense_system.journal = DefenseJournal(os.path.join(directory, 'journal'))
+    return defense_system
+
+
+async def populate(defense_system: DefenseSystem, guild_count: int, joins: int):
+    created_at = datetime.now(timezone.utc)
+    for guild_id in range(1, guild_count + 1):
+        guild = SimpleNamespace(id=guild_id)
+        for user_id in range(joins):
+            member = SimpleNamespace(id=user_id, display_name=f"user{user_id}", avatar=None, created_at=created_at)
+            await defense_system.track_member_join(guild, member)
+        state = defense_system.get_state(guild_id)
+        state.threat_level = guild_id % 10
+        defense_system.journal_flags(state)
+
+
+def recover(directory: str):
+    defense_system = make_system(directory)
+    start = time.perf_counter()
+    stats = defense_system.recover_state()
+    return time.perf_counter() - start, stats, defense_system.journal.size_bytes()
+
+
+def main():
+    guild_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    joins = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    directory = tempfile.mkdtemp()
+
+    try:
+        writer = make_system(directory)
+        asyncio.run(populate(writer, guild_count, joins))
+        writer.journal.close()
+        journal_seconds, journal_stats, journal_bytes = recover(directory)
+
+        asyncio.run(writer.checkpoint())
+        asyncio.run(populate(writer, guild_count // 100 or 1, joins))  # Tail after the snapshot
+        writer.journal.close()
+        snapshot_seconds, snapshot_stats, tail_bytes = recover(directory)
+
+        print(f"recover_state ({guild_count:,} guilds x {joins} joins)")
+        print(f"  full journal replay: {journal_seconds * 1000:8.1f} ms "
+              f"({journal_stats['replayed_records']:,} records, {journal_bytes / 1e6:.1f} MB)")
+        print(f"  snapshot + tail:     {snapshot_seconds * 1000:8.1f} ms "
+              f"({snapshot_stats['replayed_records']:,} records, {tail_bytes / 1e6:.1f} MB)")
+        print(f"  speedup:             {journal_seconds / snapshot_seconds:8.2f}x")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark for tail_lines and BackupManager.backup_bot_data on a large log
+Writes a synthetic log, then compares readlines()[-n:], a forward scan
+through a bounded deque and the reverse block-seek tail, by time and peak
+Python memory, and times a full bot backup with that log in place
+
+Usage: python benchmarks/bench_log_tail.py [log_mb] [readlines_max_mb] [lines]
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_tail import tail_lines
+from backup.backup_script import BackupManager
+
+
+def write_log(path: str, size_mb: int):
+    """Log lines of ~100 bytes, an error every 97 lines, written 1 MiB at a time"""
+    block = ''.join(
+        f"2026-01-01 12:00:{i % 60:02d},000 - defense_system - {'ERROR' if i % 97 == 0 else 'INFO'} - "
+        f"Processed event {i} for guild {1_000_000 + i % 500}\n"
+        for i in range(15_000)
+    ).encode('utf-8')
+    block = block[:block.rindex(b'\n', 0, 1024 * 1024) + 1]
+    with open(path, 'wb') as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+
+def readlines_tail(path: str, count: int):
+    with open(path, 'r') as f:
+        return f.readlines()[-count:]
+
+
+def deque_tail(path: str, count: int):
+    with open(path, 'r') as f:
+        return list(deque(f, maxlen=count))
+
+
+def measure(function, *args):
+    """Seconds of one untraced run, then peak traced memory of a second run"""
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    readlines_max_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    directory = tempfile.mkdtemp()
+    cwd = os.getcwd()
+
+    try:
+        os.makedirs(os.path.join(directory, 'logs'))
+        path = os.path.join(directory, 'logs', 'bot.log')
+        start = time.perf_counter()
+        write_log(path, size_mb)
+        print(f"Synthetic log: {os.path.getsize(path) / 1024 / 1024:.0f} MiB written in "
+              f"{time.perf_counter() - start:.1f} s, last {count} lines")
+
+        expected = None
+        methods = [('deque scan', deque_tail), ('reverse tail', tail_lines)]
+        if size_mb <= readlines_max_mb:
+            methods.insert(0, ('readlines', readlines_tail))
+        else:
+            print(f"  {'readlines':14} skipped: holds all {size_mb} MiB of lines in memory "
+                  f"(raise readlines_max_mb to run it)")
+        for label, function in methods:
+            result, elapsed, peak = measure(function, path, count)
+            expected = expected or result
+            assert result == expected
+            print(f"  {label:14} {elapsed * 1000:10.2f} ms  peak {peak / 1024 / 1024:9.2f} MiB")
+
+        os.chdir(directory)
+        manager = BackupManager('backups')
+        _, elapsed, peak = measure(manager.backup_bot_data)
+        manager.catalog.close()
+        print(f"  {'bot backup':14} {elapsed * 1000:10.2f} ms  peak {peak / 1024 / 1024:9.2f} MiB")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the full-guild member risk audit
+Compares per-member Python scoring with the vectorized NumPy audit
+
+Usage: python benchmarks/bench_member_audit.py [members]
+"""
+
+import sys
+import os
+import time
+import random
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from member_audit import DISCORD_EPOCH, MemberColumns, audit_members, name_key, score_members
+
+
+def make_members(count: int):
+    rng = random.Random(0)
+    now = time.time()
+    members = []
+    for i in range(count):
+        created = now - rng.uniform(0, 3000) * 86400
+        joined = max(created, now - rng.uniform(0, 1000) * 86400)
+        members.append(SimpleNamespace(
+            id=(int((created - DISCORD_EPOCH) * 1000) << 22) | (i & 0x3FFFFF),
+            joined_at=datetime.fromtimestamp(joined, timezone.utc),
+            avatar=object() if rng.random() < 0.7 else None,
+            display_name=f"{rng.choice(['alex', 'sam', 'nova', 'kai', 'raider'])}{rng.randrange(10_000)}",
+            roles=[None] * rng.randrange(1, 6),
+            bot=False
+        ))
+    return members
+
+
+def python_scores(members):
+    """Per-member scoring in plain Python, the shape of the pre-existing analysis loops"""
+    now = time.time()
+    clusters = {}
+    for member in members:
+        key = name_key(member.display_name)
+        clusters[key] = clusters.get(key, 0) + 1
+
+    scores = []
+    for member in members:
+        created = ((member.id >> 22) / 1000) + DISCORD_EPOCH
+        age_days = (now - created) / 86400
+        score = 4 if age_days < 1 else 3 if age_days < 7 else 1 if age_days < 30 else 0
+        if member.joined_at.timestamp() - created < 86400:
+            score += 2
+        score += member.avatar is None
+        score += len(member.roles) == 1
+        if clusters[name_key(member.display_name)] >= 4:
+            score += 2
+        scores.append(score)
+    return scores
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    members = make_members(count)
+
+    start = time.perf_counter()
+    python_scores(members)
+    python_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = MemberColumns.from_members(members)
+    extract_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score_members(columns)
+    score_seconds = time.perf_counter() - start
+
+    report = audit_members(members)
+
+    print(f"member audit ({count:,} members)")
+    print(f"  per-member Python scoring:  {python_seconds * 1000:8.1f} ms")
+    print(f"  column extraction:          {extract_seconds * 1000:8.1f} ms")
+    print(f"  vectorized scoring:         {score_seconds * 1000:8.1f} ms")
+    print(f"  full audit (rank top 25):   {report['elapsed_seconds'] * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
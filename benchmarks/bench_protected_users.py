@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for DefenseSystem.is_protected_user
+Compares the member-lookup fallback with the maintained per-guild index
+
+Usage: python benchmarks/bench_protected_users.py [calls] [members]
+"""
+
+import sys
+import os
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from defense_system import DefenseSystem
+
+
+def make_guild(member_count: int):
+    members = {
+        member_id: SimpleNamespace(id=member_id, name=f"user{member_id}", display_name=f"User {member_id}")
+        for member_id in range(1, member_count + 1)
+    }
+    members[7].display_name = "by_bytes"
+    return SimpleNamespace(id=1, owner_id=0, members=list(members.values()), get_member=members.get)
+
+
+def run(defense_system, guild, calls: int, member_count: int) -> float:
+    is_protected_user = defense_system.is_protected_user
+    start = time.perf_counter()
+    for i in range(calls):
+        is_protected_user(i % member_count + 1, guild)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    member_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    bot = Mock()
+    bot.config = {'dev_user_id': 0}
+    defense_system = DefenseSystem(bot)
+    guild = make_guild(member_count)
+
+    lookup_ns = run(defense_system, guild, calls, member_count)
+
+    defense_system.protected_index.rebuild(guild)
+    indexed_ns = run(defense_system, guild, calls, member_count)
+
+    print(f"is_protected_user x {calls:,} ({member_count:,} members)")
+    print(f"  member lookup + name compare: {lookup_ns:8.1f} ns/call")
+    print(f"  protected-member index:       {indexed_ns:8.1f} ns/call")
+    print(f"  speedup:                      {lookup_ns / indexed_ns:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
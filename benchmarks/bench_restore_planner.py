@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark for restoring a fully wiped guild
+Compares awaiting each restore call in turn with the planner's phased,
+concurrent execution under the REST scheduler, for the same plan. Each
+simulated API call takes a fixed latency.
+
+Usage: python benchmarks/bench_restore_planner.py [channels] [roles] [latency_ms]
+"""
+
+import sys
+import os
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from action_scheduler import ActionScheduler
+from overwrite_snapshot import OVERWRITE_ROLE
+from restore_planner import RestorePlanner, plan_restore
+from tests.test_restore_planner import FakeGuild
+
+
+def make_backup(channel_count: int, role_count: int):
+    """Channels spread over categories of 10, each with overwrites for a few roles"""
+    roles = [{'id': 1000 + i, 'name': f"role-{i}", 'color': i, 'hoist': False, 'mentionable': False,
+              'permissions': i, 'position': role_count - i} for i in range(role_count)]
+    channels = []
+    category_id = None
+    for index in range(channel_count):
+        if index % 10 == 0:
+            category_id = 100_000 + index
+            channels.append({'id': category_id, 'name': f"category-{index // 10}", 'type': 'category',
+                             'position': index // 10, 'category_id': None, 'permissions': {}})
+            continue
+        permissions = {str(roles[(index + offset) % role_count]['id']): {'type': OVERWRITE_ROLE, 'allow': 1024, 'deny': 0}
+                       for offset in range(3)}
+        channels.append({'id': 200_000 + index, 'name': f"channel-{index}", 'type': 'voice' if index % 10 == 9 else 'text',
+                         'position': index % 10, 'category_id': category_id, 'topic': f"Topic {index}",
+                         'nsfw': False, 'slowmode_delay': 0, 'bitrate': None, 'user_limit': None,
+                         'permissions': permissions})
+    return {'metadata': {'guild_id': 1}, 'settings': {'name': 'Guild'}, 'roles': roles, 'channels': channels}
+
+
+async def restore(backup, latency: float, sequential: bool):
+    guild = FakeGuild(latency=latency)
+    planner = RestorePlanner(ActionScheduler())
+    plan = plan_restore(guild, backup)
+    estimate = plan.estimate()
+
+    start = time.perf_counter()
+    if sequential:
+        for op in plan.ops:
+            await planner._run(guild, plan, op, "benchmark")
+    else:
+        await planner.execute(guild, plan)
+    return estimate, guild.calls, time.perf_counter() - start
+
+
+async def main():
+    channel_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    role_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 50) / 1000
+    backup = make_backup(channel_count, role_count)
+
+    print(f"Restore of a wiped guild ({channel_count} channels, {role_count} roles, {latency * 1000:.0f}ms per call)")
+    estimate, calls, sequential = await restore(backup, latency, sequential=True)
+    print(f"  plan: {estimate['api_calls']} calls {estimate['phases']}")
+    print(f"  {'one call at a time':22} {calls:5d} calls  {sequential:7.2f} s")
+    _, calls, planned = await restore(backup, latency, sequential=False)
+    print(f"  {'planner, phased':22} {calls:5d} calls  {planned:7.2f} s  ({sequential / planned:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
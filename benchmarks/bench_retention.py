@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark for RetentionEngine.run
+Writes hourly snapshots for several guilds over a number of days, then
+compares expiring them by tier with reference counts against a
+mark-and-sweep collector that reads every kept manifest and lists the
+object directory, and times a second run with nothing left to expire
+
+Usage: python benchmarks/bench_retention.py [guilds] [days] [channels]
+"""
+
+import sys
+import os
+import time
+import copy
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backup_catalog import BackupCatalog, KIND_SNAPSHOT
+from change_tracker import GuildChanges
+from retention import RetentionEngine, expired
+from snapshot_store import SnapshotStore, manifest_hashes, object_children
+from timing import to_ms
+
+
+def make_backup(guild_id: int, channel_count: int):
+    return {
+        'metadata': {'guild_id': guild_id, 'guild_name': 'Benchmark Guild', 'created_at': '', 'member_count': 1000},
+        'settings': {'name': 'Benchmark Guild', 'description': None, 'verification_level': 1},
+        'channels': [{'id': i, 'name': f"channel-{i}", 'type': 'text', 'position': i, 'category_id': None,
+                      'permissions': {str(10_000 + i % 7): {'allow': 1024, 'deny': 0}}}
+                     for i in range(channel_count)],
+        'roles': [{'id': 10_000 + i, 'name': f"role-{i}", 'color': 0, 'hoist': False, 'mentionable': False,
+                   'permissions': i, 'position': i} for i in range(50)],
+        'emojis': []
+    }
+
+
+START = datetime(2026, 1, 1)
+
+
+def write_hour(store: SnapshotStore, backups: dict, hour: int):
+    """One snapshot per guild, each renaming one of 12 busy channels"""
+    for backup in backups.values():
+        backup['metadata']['created_at'] = (START + timedelta(hours=hour)).isoformat()
+        channel = backup['channels'][hour % 12]
+        channel['name'] = f"channel-{hour}"
+        changes = GuildChanges()
+        changes.mark('channels', channel['id'])
+        store.write_snapshot(backup, changes if hour else None)
+
+
+def mark_and_sweep(catalog: BackupCatalog, store: SnapshotStore, now: int) -> int:
+    """What a collector without reference counts does: expire rows, read every kept manifest, list all objects"""
+    directory = store.directory
+    for guild_id in catalog.guild_ids(KIND_SNAPSHOT):
+        for entry in expired(catalog.entries(guild_id, KIND_SNAPSHOT), now):
+            os.remove(entry['path'])
+            catalog.remove(entry['path'])
+
+    live = set()
+    for entry in catalog.entries(kind=KIND_SNAPSHOT):
+        for digest in manifest_hashes(store.read_manifest(entry['path'])):
+            if digest not in live:
+                live.add(digest)
+                live.update(object_children(store.get(digest))[0])
+
+    removed = 0
+    objects_dir = os.path.join(directory, 'objects')
+    for prefix in os.listdir(objects_dir):
+        for name in os.listdir(os.path.join(objects_dir, prefix)):
+            if name.split('.')[0] not in live:
+                os.remove(os.path.join(objects_dir, prefix, name))
+                removed += 1
+    return removed
+
+
+def disk_usage(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+
+def main():
+    guild_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 14
+    channel_count = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    directory = tempfile.mkdtemp()
+
+    try:
+        history = os.path.join(directory, 'history')
+        catalog = BackupCatalog(history)
+        store = SnapshotStore(history, catalog=catalog)
+        backups = {guild_id: make_backup(guild_id, channel_count) for guild_id in range(1, guild_count + 1)}
+        start = time.perf_counter()
+        for hour in range(days * 24):
+            write_hour(store, backups, hour)
+        print(f"{guild_count} guilds x {days * 24} hourly snapshots ({channel_count} channels) written in "
+              f"{time.perf_counter() - start:.1f} s, {disk_usage(history) / 1024 / 1024:.1f} MiB")
+        catalog.close()
+
+        sweep = os.path.join(directory, 'sweep')
+        shutil.copytree(history, sweep)
+        collectors = []
+        for path in (sweep, history):
+            catalog = BackupCatalog(path)
+            collectors.append((catalog, SnapshotStore(path, catalog=catalog)))
+        (sweep_catalog, sweep_store), (catalog, store) = collectors
+        engine = RetentionEngine(catalog, store)
+        engine.run(0)  # Counts references of the snapshots written so far
+
+        # First run: the whole history is due
+        now = to_ms(START + timedelta(hours=days * 24 - 1))
+        start = time.perf_counter()
+        removed = mark_and_sweep(sweep_catalog, sweep_store, now)
+        print(f"  {'catch-up, sweep':24} {(time.perf_counter() - start) * 1000:9.1f} ms  {removed} objects deleted")
+        start = time.perf_counter()
+        counts = engine.run(now)
+        print(f"  {'catch-up, ref counted':24} {(time.perf_counter() - start) * 1000:9.1f} ms  "
+              f"{counts['objects']} objects deleted, {counts['snapshots']} snapshots expired, "
+              f"{disk_usage(history) / 1024 / 1024:.1f} MiB left")
+
+        # Steady state: one more snapshot per guild each hour, then a collection
+        hours = 24
+        sweep_seconds = counted_seconds = 0.0
+        for hour in range(days * 24, days * 24 + hours):
+            now = to_ms(START + timedelta(hours=hour))
+            write_hour(sweep_store, copy.deepcopy(backups), hour)
+            write_hour(store, backups, hour)
+            start = time.perf_counter()
+            mark_and_sweep(sweep_catalog, sweep_store, now)
+            sweep_seconds += time.perf_counter() - start
+            start = time.perf_counter()
+            engine.run(now)
+            counted_seconds += time.perf_counter() - start
+        print(f"  {'hourly, sweep':24} {sweep_seconds / hours * 1000:9.1f} ms per run")
+        print(f"  {'hourly, ref counted':24} {counted_seconds / hours * 1000:9.1f} ms per run")
+        sweep_catalog.close()
+        catalog.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark for SnapshotStore.write_snapshot
+Compares bytes written and time per backup of full backups with
+content-addressed snapshots when a few channels change between backups,
+and with delta snapshots that only encode the channels marked as changed
+
+Usage: python benchmarks/bench_snapshot_store.py [channels] [roles] [changed]
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backup_writer import BackupWriter
+from change_tracker import GuildChanges
+from snapshot_store import SnapshotStore
+
+
+def make_backup(channel_count: int, role_count: int):
+    permissions = {str(10_000 + i): {'allow': 1024, 'deny': 2048} for i in range(20)}
+    return {
+        'metadata': {'guild_id': 1, 'guild_name': 'Benchmark Guild', 'created_at': '', 'member_count': 50_000},
+        'settings': {'name': 'Benchmark Guild', 'description': None, 'verification_level': 1},
+        'channels': [{'id': 100_000 + i, 'name': f"channel-{i}", 'type': 'text', 'position': i,
+                      'category_id': None, 'permissions': dict(permissions)}
+                     for i in range(channel_count)],
+        'roles': [{'id': 10_000 + i, 'name': f"role-{i}", 'color': i, 'hoist': False, 'mentionable': True,
+                   'permissions': i, 'position': i} for i in range(role_count)],
+        'emojis': []
+    }
+
+
+def next_backup(backup, index: int, changed: int):
+    """Fresh dicts as create_comprehensive_backup builds them, with ``changed`` channels renamed"""
+    backup = {key: value if key == 'settings' else
+              ([dict(item) for item in value] if isinstance(value, list) else dict(value))
+              for key, value in backup.items()}
+    backup['metadata']['created_at'] = f"2026-01-01T10:{index // 60:02d}:{index % 60:02d}"
+    for offset in range(changed):
+        channel = backup['channels'][(index * changed + offset) % len(backup['channels'])]
+        channel['name'] = f"{channel['name']}-{index}"
+    return backup
+
+
+def changes_for(backup, index: int, changed: int) -> GuildChanges:
+    """What the gateway events would have marked for the channels next_backup renamed"""
+    changes = GuildChanges()
+    for offset in range(changed):
+        changes.mark('channels', backup['channels'][(index * changed + offset) % len(backup['channels'])]['id'])
+    return changes
+
+
+def main():
+    channel_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    role_count = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+    changed = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    runs = 20
+    directory = tempfile.mkdtemp()
+
+    try:
+        backups = [make_backup(channel_count, role_count)]
+        for index in range(1, runs):
+            backups.append(next_backup(backups[-1], index, changed))
+
+        print(f"{runs} backups ({channel_count} channels, {role_count} roles, {changed} channels changed each)")
+        for compression in ('json', 'gzip'):
+            writer = BackupWriter(directory, compression)
+            start = time.perf_counter()
+            for index, backup in enumerate(backups):
+                writer._write(os.path.join(directory, f"full_{index}{writer.suffix}"), backup)
+            elapsed = time.perf_counter() - start
+            size = sum(os.path.getsize(os.path.join(directory, f"full_{index}{writer.suffix}")) for index in range(runs))
+            print(f"  {'full ' + compression + ' backup':24} {size / runs / 1024:9.1f} KiB  "
+                  f"{elapsed / runs * 1000:7.2f} ms per backup")
+
+        store = SnapshotStore(os.path.join(directory, 'store'))
+        store.write_snapshot(backups[0])
+        first_bytes = store.stats['bytes_written']
+        start = time.perf_counter()
+        for backup in backups[1:]:
+            store.write_snapshot(backup)
+        incremental_elapsed = time.perf_counter() - start
+        incremental_bytes = store.stats['bytes_written'] - first_bytes
+
+        print(f"  {'first snapshot':24} {first_bytes / 1024:9.1f} KiB")
+        print(f"  {'incremental snapshot':24} {incremental_bytes / (runs - 1) / 1024:9.1f} KiB  "
+              f"{incremental_elapsed / (runs - 1) * 1000:7.2f} ms per backup")
+
+        store = SnapshotStore(os.path.join(directory, 'delta'))
+        store.write_snapshot(backups[0])
+        start = time.perf_counter()
+        for index, backup in enumerate(backups[1:], 1):
+            store.write_snapshot(backup, changes_for(backup, index, changed))
+        delta_elapsed = time.perf_counter() - start
+        delta_bytes = store.stats['bytes_written'] - first_bytes
+        print(f"  {'delta snapshot':24} {delta_bytes / (runs - 1) / 1024:9.1f} KiB  "
+              f"{delta_elapsed / (runs - 1) * 1000:7.2f} ms per backup")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
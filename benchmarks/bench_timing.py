@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for detector timing math
+Compares datetime/timedelta window filters with epoch-ms and snowflake arithmetic
+
+Usage: python benchmarks/bench_timing.py [calls]
+"""
+
+import sys
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from defense_state import JOIN_HISTORY_SIZE
+from timing import DAY_MS, MINUTE_MS, account_age_ms, now_ms, records_since, to_ms
+
+import discord
+
+
+def make_history():
+    """A full join history where the newest 20 joins fall inside the 10 minute window"""
+    now = datetime.now()
+    history = deque(maxlen=JOIN_HISTORY_SIZE)
+    for i in range(JOIN_HISTORY_SIZE):
+        timestamp = now - timedelta(seconds=(JOIN_HISTORY_SIZE - i) * (2 if i >= JOIN_HISTORY_SIZE - 20 else 60))
+        created_at = datetime.now(timezone.utc) - timedelta(days=i % 14)
+        history.append({
+            'user_id': discord.utils.time_snowflake(created_at),
+            'timestamp': timestamp,
+            'timestamp_ms': to_ms(timestamp),
+            'account_created': created_at
+        })
+    return history
+
+
+def datetime_window(history):
+    current_time = datetime.now()
+    recent = [join for join in history if current_time - join['timestamp'] < timedelta(minutes=10)]
+    # Aware creation times, compared the timezone-correct way the old code meant to
+    now_utc = datetime.now(timezone.utc)
+    return sum(1 for join in recent if now_utc - join['account_created'] < timedelta(days=7))
+
+
+def ms_window(history):
+    current_time = now_ms()
+    recent = records_since(history, current_time - 10 * MINUTE_MS)
+    return sum(1 for join in recent if account_age_ms(join['user_id'], current_time) < 7 * DAY_MS)
+
+
+def run(function, history, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        function(history)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    history = make_history()
+    assert datetime_window(history) == ms_window(history)
+
+    datetime_us = run(datetime_window, history, calls)
+    ms_us = run(ms_window, history, calls)
+
+    print(f"join window + account age check x {calls:,} ({JOIN_HISTORY_SIZE} joins in history)")
+    print(f"  datetime/timedelta:        {datetime_us:8.2f} us/event")
+    print(f"  epoch ms + snowflake:      {ms_us:8.2f} us/event")
+    print(f"  speedup:                   {datetime_us / ms_us:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
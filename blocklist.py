@@ -0,0 +1,279 @@
+"""
+Shared Raider Blocklist
+Persistent, memory-mapped set of flagged user IDs shared by all guilds
+"""
+
+import os
+import mmap
+import asyncio
+import threading
+import struct
+import hashlib
+import bisect
+import logging
+from array import array
+from typing import Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+BLOOM_MAGIC = b'BLM1'
+BLOOM_HEADER = struct.Struct('<4sQI')
+
+# 2**27 bits (16 MiB) keeps false positives under 1% up to ~14M IDs with 7 hashes
+DEFAULT_BLOOM_BITS = 1 << 27
+DEFAULT_BLOOM_HASHES = 7
+
+# Pending log entries merged into the sorted ID file at this size
+COMPACT_THRESHOLD = 100_000
+
+
+class BloomFilter:
+    """Bloom filter whose bit array lives in a memory-mapped file"""
+
+    def __init__(self, path: str, num_bits: int = DEFAULT_BLOOM_BITS, num_hashes: int = DEFAULT_BLOOM_HASHES):
+        self.path = path
+        created = not os.path.exists(path)
+        if created:
+            with open(path, 'wb') as f:
+                f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, num_bits, num_hashes))
+                f.truncate(BLOOM_HEADER.size + num_bits // 8)
+
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self.num_bits, self.num_hashes = BLOOM_HEADER.unpack_from(self._map, 0)
+        if magic != BLOOM_MAGIC:
+            raise ValueError(f"{path} is not a bloom filter file")
+        self.created = created
+
+    def _positions(self, user_id: int):
+        digest = hashlib.blake2b(user_id.to_bytes(8, 'little'), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, user_id: int):
+        offset = BLOOM_HEADER.size
+        for position in self._positions(user_id):
+            index = offset + (position >> 3)
+            self._map[index] |= 1 << (position & 7)
+
+    def __contains__(self, user_id: int) -> bool:
+        offset = BLOOM_HEADER.size
+        for position in self._positions(user_id):
+            if not self._map[offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class SharedBlocklist:
+    """Blocklist of raider IDs with a Bloom-filter front and an exact set behind it.
+
+    The exact set is a sorted file of 64-bit IDs that is memory-mapped and binary
+    searched, plus an append-only log of IDs added since the last compaction.
+    Unflagged IDs go into a small tombstone set that is checked before the Bloom
+    filter, since bits cannot be cleared; compaction drops them for good.
+    Opening is lazy and only maps files, so startup cost does not depend on size.
+    Compaction merges in a worker thread; the lock is only held to snapshot and
+    swap state.
+    """
+
+    def __init__(self, directory: str = 'data/blocklist'):
+        self.directory = directory
+        self._bloom = None
+        self._ids_file = None
+        self._ids_map = None
+        self._ids = ()
+        self._pending: Set[int] = set()
+        self._removed: Set[int] = set()
+        self._log = None
+        self._lock = threading.RLock()
+        self._compacting = False
+
+    @property
+    def _ids_path(self) -> str:
+        return os.path.join(self.directory, 'blocklist.ids')
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.directory, 'blocklist.log')
+
+    @property
+    def _removed_path(self) -> str:
+        return os.path.join(self.directory, 'blocklist.removed')
+
+    def _open(self):
+        if self._bloom is not None:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._map_ids()
+
+        # IDs added since the last compaction, and IDs unflagged since then
+        self._pending = _read_ids(self._log_path)
+        self._removed = _read_ids(self._removed_path)
+        self._log = open(self._log_path, 'ab')
+
+        self._bloom = BloomFilter(os.path.join(self.directory, 'blocklist.bloom'))
+        if self._bloom.created:
+            for user_id in self._ids:
+                self._bloom.add(user_id)
+        for user_id in self._pending:
+            self._bloom.add(user_id)
+
+    def _map_ids(self):
+        if self._ids_map is not None:
+            self._ids.release()
+            self._ids_map.close()
+            self._ids_file.close()
+            self._ids_map = None
+
+        if os.path.exists(self._ids_path) and os.path.getsize(self._ids_path) >= 8:
+            self._ids_file = open(self._ids_path, 'rb')
+            self._ids_map = mmap.mmap(self._ids_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._ids = memoryview(self._ids_map).cast('Q')
+        else:
+            self._ids = ()
+
+    def _flagged(self, user_id: int) -> bool:
+        """Whether the ID was ever flagged, ignoring tombstones"""
+        if user_id not in self._bloom:
+            return False
+        if user_id in self._pending:
+            return True
+        index = bisect.bisect_left(self._ids, user_id)
+        return index < len(self._ids) and self._ids[index] == user_id
+
+    def __contains__(self, user_id: int) -> bool:
+        with self._lock:
+            self._open()
+            return user_id not in self._removed and self._flagged(user_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._open()
+            return len(self._ids) + len(self._pending) - len(self._removed)
+
+    def add_many(self, user_ids: Iterable[int]) -> int:
+        """Flag user IDs, returning how many were new"""
+        with self._lock:
+            self._open()
+            added = array('Q')
+            restored = 0
+            for user_id in user_ids:
+                if user_id in self._removed:
+                    # Flagged again after an unban: lifting the tombstone is enough if it is still stored
+                    self._removed.discard(user_id)
+                    if self._flagged(user_id):
+                        restored += 1
+                        continue
+                elif user_id in self:
+                    continue
+                self._pending.add(user_id)
+                self._bloom.add(user_id)
+                added.append(user_id)
+
+            if restored:
+                _write_ids(self._removed_path, self._removed)
+            if added:
+                self._log.write(added.tobytes())
+                self._log.flush()
+            due = len(self._pending) >= COMPACT_THRESHOLD
+        if due:
+            self._schedule_compact()
+        return len(added) + restored
+
+    def add(self, user_id: int) -> bool:
+        return self.add_many([user_id]) == 1
+
+    def remove(self, user_id: int) -> bool:
+        """Unflag a user, e.g. after a manual unban; returns False if the ID was not flagged"""
+        with self._lock:
+            if user_id not in self:
+                return False
+            self._removed.add(user_id)
+            with open(self._removed_path, 'ab') as f:
+                f.write(array('Q', [user_id]).tobytes())
+            return True
+
+    def _schedule_compact(self):
+        """Compact in a worker thread when called from the event loop, inline otherwise"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.compact()
+            return
+        if not self._compacting:
+            loop.create_task(asyncio.to_thread(self.compact))
+
+    def compact(self):
+        """Merge the pending log into the sorted ID file and drop unflagged IDs"""
+        with self._lock:
+            self._open()
+            if self._compacting or not (self._pending or self._removed):
+                return
+            self._compacting = True
+            pending = set(self._pending)
+            removed = set(self._removed)
+            ids = array('Q')
+            ids.frombytes(self._ids.tobytes() if self._ids else b'')
+
+        try:
+            # The slow part runs without the lock, so lookups and adds continue meanwhile
+            merged = array('Q', sorted(set(ids).union(pending).difference(removed)))
+            tmp_path = f"{self._ids_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(merged.tobytes())
+            os.replace(tmp_path, self._ids_path)
+
+            with self._lock:
+                self._map_ids()
+                # Anything added or unflagged during the merge stays in the log and tombstones
+                self._pending -= pending
+                self._removed -= removed
+                self._log.close()
+                self._log = open(self._log_path, 'wb')
+                self._log.write(array('Q', self._pending).tobytes())
+                self._log.flush()
+                _write_ids(self._removed_path, self._removed)
+                self._bloom.flush()
+            logger.info(f"Blocklist compacted: {len(merged)} flagged IDs")
+        finally:
+            self._compacting = False
+
+    def close(self):
+        with self._lock:
+            if self._bloom is None:
+                return
+            self._bloom.close()
+            self._log.close()
+            if self._ids_map is not None:
+                self._ids.release()
+                self._ids_map.close()
+                self._ids_file.close()
+            self._bloom = None
+            self._ids_map = None
+            self._ids = ()
+
+
+def _read_ids(path: str) -> Set[int]:
+    """IDs from an append-only file of 64-bit integers, ignoring a torn last entry"""
+    ids = array('Q')
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        ids.frombytes(data[:len(data) - len(data) % 8])
+    return set(ids)
+
+
+def _write_ids(path: str, ids: Iterable[int]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(array('Q', ids).tobytes())
+    os.replace(tmp_path, path)
@@ -0,0 +1,95 @@
+"""
+Change Tracker
+Which guild objects changed since the last snapshot, marked from gateway update events
+"""
+
+from typing import Dict, List, Optional
+
+from timing import now_ms
+
+# Snapshot sections whose items are tracked individually, by ID
+ITEM_SECTIONS = ('channels', 'roles')
+
+
+class GuildChanges:
+    """Dirty settings, emojis, channel IDs and role IDs of one guild, with when they were first and last marked"""
+
+    __slots__ = ('settings', 'emojis', 'channels', 'roles', 'first_ms', 'last_ms')
+
+    def __init__(self):
+        self.settings = False
+        self.emojis = False
+        self.channels = set()
+        self.roles = set()
+        self.first_ms: Optional[int] = None
+        self.last_ms: Optional[int] = None
+
+    def mark(self, section: str, object_id: Optional[int] = None, now: Optional[int] = None):
+        if section in ITEM_SECTIONS:
+            getattr(self, section).add(object_id)
+        else:
+            setattr(self, section, True)
+        now = now_ms() if now is None else now
+        if self.first_ms is None:
+            self.first_ms = now
+        self.last_ms = now
+
+    def merge(self, other: 'GuildChanges'):
+        self.settings = self.settings or other.settings
+        self.emojis = self.emojis or other.emojis
+        self.channels |= other.channels
+        self.roles |= other.roles
+        self.first_ms = min((ms for ms in (self.first_ms, other.first_ms) if ms is not None), default=None)
+        self.last_ms = max((ms for ms in (self.last_ms, other.last_ms) if ms is not None), default=None)
+
+    def is_dirty(self, section: str, key) -> bool:
+        """Whether a snapshot item must be re-encoded; used by SnapshotStore.write_snapshot"""
+        if section in ITEM_SECTIONS:
+            return key in getattr(self, section)
+        return getattr(self, section, True)
+
+    def __len__(self) -> int:
+        return int(self.settings) + int(self.emojis) + len(self.channels) + len(self.roles)
+
+
+class ChangeTracker:
+    """Dirty objects per guild between snapshots.
+
+    Gateway handlers mark objects as they change; the snapshotter takes a
+    guild's changes once they have been quiet for a while, or have waited too
+    long, and writes a snapshot that re-encodes only those objects. A failed
+    snapshot puts its changes back.
+    """
+
+    def __init__(self):
+        self._changes: Dict[int, GuildChanges] = {}
+
+    def mark(self, guild_id: int, section: str, object_id: Optional[int] = None, now: Optional[int] = None):
+        changes = self._changes.get(guild_id)
+        if changes is None:
+            changes = self._changes[guild_id] = GuildChanges()
+        changes.mark(section, object_id, now)
+
+    def settled(self, quiet_ms: int, max_delay_ms: int, now: Optional[int] = None) -> List[int]:
+        """Guilds with no change for ``quiet_ms``, or with changes pending for ``max_delay_ms``"""
+        now = now_ms() if now is None else now
+        return [
+            guild_id for guild_id, changes in self._changes.items()
+            if changes.last_ms <= now - quiet_ms or changes.first_ms <= now - max_delay_ms
+        ]
+
+    def take(self, guild_id: int) -> Optional[GuildChanges]:
+        return self._changes.pop(guild_id, None)
+
+    def merge(self, guild_id: int, changes: GuildChanges):
+        """Put back changes whose snapshot failed, keeping anything marked since"""
+        pending = self._changes.get(guild_id)
+        if pending is not None:
+            changes.merge(pending)
+        self._changes[guild_id] = changes
+
+    def discard(self, guild_id: int):
+        self._changes.pop(guild_id, None)
+
+    def __len__(self) -> int:
+        return len(self._changes)
@@ -0,0 +1,258 @@
+"""
+Combat Log Store
+Append-only, size-rotated combat log segments with bounded in-memory rings
+"""
+
+import os
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_BYTES = 4 * 1024 * 1024
+MAX_SEGMENTS = 64
+RING_SIZE = 1000
+GUILD_RING_SIZE = 100
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _decode(line: str) -> Optional[Dict]:
+    try:
+        entry = json.loads(line)
+        entry['timestamp'] = datetime.fromisoformat(entry['timestamp'])
+        return entry
+    except (ValueError, KeyError, TypeError):
+        return None  # Torn write at the end of a segment
+
+
+class _Segment:
+    __slots__ = ('name', 'first', 'last', 'count', 'guild_ids')
+
+    def __init__(self, name: str, first=None, last=None, count=0, guild_ids=()):
+        self.name = name
+        self.first = first
+        self.last = last
+        self.count = count
+        self.guild_ids = set(guild_ids)
+
+    def add(self, entry: Dict):
+        if self.first is None:
+            self.first = entry['timestamp']
+        self.last = entry['timestamp']
+        self.count += 1
+        if entry.get('guild_id') is not None:
+            self.guild_ids.add(entry['guild_id'])
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'first': self.first.isoformat() if self.first else None,
+            'last': self.last.isoformat() if self.last else None,
+            'count': self.count,
+            'guild_ids': sorted(self.guild_ids)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> '_Segment':
+        return cls(
+            data['name'],
+            datetime.fromisoformat(data['first']) if data['first'] else None,
+            datetime.fromisoformat(data['last']) if data['last'] else None,
+            data['count'],
+            data['guild_ids']
+        )
+
+
+class CombatLogStore:
+    """Persistent combat log that keeps memory flat regardless of uptime.
+
+    Entries are appended as JSON lines to the active segment, which is rotated
+    once it reaches ``segment_bytes``; only the newest ``max_segments`` are kept.
+    A manifest records each sealed segment's time range and guilds so history
+    queries skip segments that cannot match. Recent entries are served from a
+    global ring and per-guild rings, so reading the last k entries is O(k).
+    """
+
+    def __init__(self, directory: str = 'data/combat_logs', segment_bytes: int = SEGMENT_BYTES,
+                 max_segments: int = MAX_SEGMENTS, ring_size: int = RING_SIZE,
+                 guild_ring_size: int = GUILD_RING_SIZE):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.guild_ring_size = guild_ring_size
+        self._recent = deque(maxlen=ring_size)
+        self._guild_recent: Dict[int, deque] = {}
+        self._sealed: List[_Segment] = []
+        self._active: Optional[_Segment] = None
+        self._file = None
+        self._loaded = False
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, 'manifest.json')
+
+    def _segment_path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+
+        if os.path.exists(self._manifest_path):
+            try:
+                with open(self._manifest_path, 'r') as f:
+                    manifest = json.load(f)
+                self._sealed = [_Segment.from_dict(data) for data in manifest['sealed']]
+                self._active = _Segment(manifest['active'])
+            except Exception as e:
+                logger.error(f"Error loading combat log manifest: {e}")
+
+        # The active segment is at most segment_bytes, so rescanning it is bounded
+        if self._active is not None and os.path.exists(self._segment_path(self._active.name)):
+            for entry in self._read_segment(self._active.name):
+                self._active.add(entry)
+
+        # Refill the rings from the newest segments
+        for segment in reversed(self._segments()):
+            if len(self._recent) == self._recent.maxlen:
+                break
+            entries = list(self._read_segment(segment.name))
+            for entry in reversed(entries):
+                if len(self._recent) == self._recent.maxlen:
+                    break
+                self._recent.appendleft(entry)
+
+        for entry in self._recent:
+            self._guild_ring(entry.get('guild_id')).append(entry)
+
+    def _segments(self) -> List[_Segment]:
+        return self._sealed + ([self._active] if self._active is not None else [])
+
+    def _guild_ring(self, guild_id) -> deque:
+        ring = self._guild_recent.get(guild_id)
+        if ring is None:
+            ring = self._guild_recent[guild_id] = deque(maxlen=self.guild_ring_size)
+        return ring
+
+    def _read_segment(self, name: str):
+        try:
+            with open(self._segment_path(name), 'r', encoding='utf-8') as f:
+                for line in f:
+                    entry = _decode(line)
+                    if entry is not None:
+                        yield entry
+        except FileNotFoundError:
+            return
+
+    def _save_manifest(self):
+        manifest = {
+            'sealed': [segment.to_dict() for segment in self._sealed],
+            'active': self._active.name
+        }
+        tmp_path = f"{self._manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._manifest_path)
+
+    def _open_active(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if self._active is None:
+            self._active = _Segment('combat-000001.jsonl')
+            self._save_manifest()
+        self._file = open(self._segment_path(self._active.name), 'a', encoding='utf-8')
+
+    def _rotate(self):
+        self._file.close()
+        self._sealed.append(self._active)
+        sequence = int(self._active.name.split('-')[1].split('.')[0]) + 1
+        self._active = _Segment(f"combat-{sequence:06d}.jsonl")
+
+        # Drop the oldest history beyond the retention limit
+        while len(self._sealed) + 1 > self.max_segments:
+            expired = self._sealed.pop(0)
+            try:
+                os.remove(self._segment_path(expired.name))
+            except FileNotFoundError:
+                pass
+
+        self._save_manifest()
+        self._file = open(self._segment_path(self._active.name), 'a', encoding='utf-8')
+
+    def append(self, entry: Dict):
+        """Record a combat log entry; a ``guild_id`` key indexes it by guild"""
+        self._load()
+        if 'timestamp' not in entry:
+            entry['timestamp'] = datetime.now()
+
+        self._recent.append(entry)
+        self._guild_ring(entry.get('guild_id')).append(entry)
+
+        try:
+            if self._file is None:
+                self._open_active()
+            self._file.write(json.dumps(entry, default=_encode) + '\n')
+            self._file.flush()
+            self._active.add(entry)
+            if self._file.tell() >= self.segment_bytes:
+                self._rotate()
+        except Exception as e:
+            logger.error(f"Error writing combat log: {e}")
+
+    def recent(self, limit: int, guild_id: Optional[int] = None) -> List[Dict]:
+        """Newest ``limit`` entries in chronological order, optionally for one guild"""
+        self._load()
+        ring = self._recent if guild_id is None else self._guild_recent.get(guild_id, ())
+        entries = list(islice(reversed(ring), limit))
+        entries.reverse()
+        return entries
+
+    def query(self, guild_id: Optional[int] = None, since: Optional[datetime] = None,
+              until: Optional[datetime] = None, limit: int = 100) -> List[Dict]:
+        """Search persisted history by guild and time, newest first, reading only matching segments"""
+        self._load()
+        results = []
+        for segment in reversed(self._segments()):
+            if segment.count == 0:
+                continue
+            if since is not None and segment.last < since:
+                break  # Older segments only get older
+            if until is not None and segment.first > until:
+                continue
+            if guild_id is not None and guild_id not in segment.guild_ids:
+                continue
+
+            for entry in reversed(list(self._read_segment(segment.name))):
+                if guild_id is not None and entry.get('guild_id') != guild_id:
+                    continue
+                if since is not None and entry['timestamp'] < since:
+                    continue
+                if until is not None and entry['timestamp'] > until:
+                    continue
+                results.append(entry)
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def __len__(self) -> int:
+        """Number of entries still retained on disk"""
+        self._load()
+        return sum(segment.count for segment in self._segments())
+
+    def __bool__(self) -> bool:
+        self._load()
+        return bool(self._recent)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
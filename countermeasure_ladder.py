@@ -0,0 +1,228 @@
+"""
+Countermeasure Ladder
+Graduated raid responses, cheapest first, each one reversible
+"""
+
+import discord
+import asyncio
+import time
+import logging
+from enum import IntEnum
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from action_scheduler import ActionScheduler, ActionPriority, route_bucket
+
+logger = logging.getLogger(__name__)
+
+
+class LadderStep(IntEnum):
+    """Countermeasures in escalation order; reaching a step applies every step below it"""
+    NONE = 0
+    VERIFICATION = 1
+    SLOWMODE = 2
+    PAUSE_INVITES = 3
+    LOCKDOWN = 4
+
+
+# Minimum threat level (out of 10) for each step
+STEP_THRESHOLDS = {
+    LadderStep.VERIFICATION: 1,
+    LadderStep.SLOWMODE: 6,
+    LadderStep.PAUSE_INVITES: 7,
+    LadderStep.LOCKDOWN: 8,
+}
+
+STEP_DESCRIPTIONS = {
+    LadderStep.VERIFICATION: "Verification Level Raised",
+    LadderStep.SLOWMODE: "Slow-Mode on Hottest Channels",
+    LadderStep.PAUSE_INVITES: "Invites Paused",
+    LadderStep.LOCKDOWN: "Channels Hidden, Permissions Disabled, Auto-Ban Engaged",
+}
+
+RAID_VERIFICATION_LEVEL = discord.VerificationLevel.high
+SLOWMODE_DELAY = 30  # Seconds between messages per user
+HOT_CHANNEL_COUNT = 5
+
+
+def step_for(threat_level: int) -> LadderStep:
+    """Highest countermeasure a threat level calls for"""
+    target = LadderStep.NONE
+    for step, threshold in STEP_THRESHOLDS.items():
+        if threat_level >= threshold:
+            target = step
+    return target
+
+
+class LadderState:
+    """Steps applied in one guild and what they replaced, so recovery can undo them"""
+
+    __slots__ = ('step', 'verification_level', 'slowmode', 'invites_paused', 'costs')
+
+    def __init__(self):
+        self.step = LadderStep.NONE
+        self.verification_level: Optional[int] = None  # Level before the raise
+        self.slowmode: Dict[int, int] = {}  # channel_id -> delay before the raise
+        self.invites_paused = False
+        self.costs: List[Dict] = []
+
+    def to_dict(self) -> Dict:
+        return {
+            'step': int(self.step),
+            'verification_level': self.verification_level,
+            'slowmode': self.slowmode,
+            'invites_paused': self.invites_paused,
+            'costs': self.costs
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LadderState':
+        ladder = cls()
+        ladder.step = LadderStep(data['step'])
+        ladder.verification_level = data['verification_level']
+        ladder.slowmode = {int(channel_id): delay for channel_id, delay in data['slowmode'].items()}
+        ladder.invites_paused = data['invites_paused']
+        ladder.costs = data['costs']
+        return ladder
+
+
+class CountermeasureLadder:
+    """Applies and rolls back the ladder through the REST scheduler.
+
+    The first three steps cost one guild edit, one edit per hot channel and one
+    more guild edit, so most incidents are contained without touching every
+    channel and role. Full lockdown is delegated to ``on_lockdown``. Every step
+    reports the API calls it made and how long it took.
+    """
+
+    def __init__(self, scheduler: ActionScheduler,
+                 on_lockdown: Optional[Callable[[discord.Guild, str], Awaitable[int]]] = None):
+        self.scheduler = scheduler
+        self.on_lockdown = on_lockdown
+
+    async def climb(self, guild: discord.Guild, ladder: LadderState, target: LadderStep,
+                    hot_channels: List, reason: str) -> List[Dict]:
+        """Apply every step above the current one up to ``target``; returns the cost of each"""
+        reports = []
+        for step in LadderStep:
+            if step <= ladder.step or step > target:
+                continue
+
+            start = time.perf_counter()
+            try:
+                api_calls = await self._apply(step, guild, ladder, hot_channels, reason)
+            except Exception as e:
+                logger.error(f"Error applying countermeasure {step.name.lower()} in {guild.name}: {e}")
+                break
+
+            ladder.step = step
+            report = {
+                'step': step.name.lower(),
+                'api_calls': api_calls,
+                'elapsed_seconds': time.perf_counter() - start
+            }
+            ladder.costs.append(report)
+            reports.append(report)
+            logger.warning(
+                f"🪜 Countermeasure {report['step']} applied in {guild.name}: "
+                f"{api_calls} API calls, {report['elapsed_seconds'] * 1000:.0f}ms"
+            )
+        return reports
+
+    async def _apply(self, step: LadderStep, guild: discord.Guild, ladder: LadderState,
+                     hot_channels: List, reason: str) -> int:
+        if step is LadderStep.VERIFICATION:
+            if guild.verification_level >= RAID_VERIFICATION_LEVEL:
+                return 0
+            original = guild.verification_level.value
+            await self._edit_guild(guild, 'verification', ActionPriority.CONTAINMENT,
+                                   verification_level=RAID_VERIFICATION_LEVEL)
+            ladder.verification_level = original
+            return 1
+
+        if step is LadderStep.SLOWMODE:
+            channels = [
+                channel for channel in hot_channels[:HOT_CHANNEL_COUNT]
+                if getattr(channel, 'slowmode_delay', SLOWMODE_DELAY) < SLOWMODE_DELAY
+                and channel.id not in ladder.slowmode
+            ]
+            originals = [channel.slowmode_delay for channel in channels]
+            # Each channel is its own rate-limit bucket, so the edits run concurrently
+            results = await asyncio.gather(*[
+                self._edit_channel(channel, ActionPriority.CONTAINMENT, slowmode_delay=SLOWMODE_DELAY)
+                for channel in channels
+            ], return_exceptions=True)
+            for channel, original, result in zip(channels, originals, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error enabling slow-mode in {channel.name}: {result}")
+                else:
+                    ladder.slowmode[channel.id] = original
+            return len(channels)
+
+        if step is LadderStep.PAUSE_INVITES:
+            if 'INVITES_DISABLED' in guild.features:
+                return 0
+            await self._edit_guild(guild, 'invites', ActionPriority.CONTAINMENT, invites_disabled=True)
+            ladder.invites_paused = True
+            return 1
+
+        if step is LadderStep.LOCKDOWN and self.on_lockdown:
+            return await self.on_lockdown(guild, reason)
+        return 0
+
+    async def rollback(self, guild: discord.Guild, ladder: LadderState) -> int:
+        """Undo the first three steps where nobody changed the setting since; returns API calls made.
+
+        Lockdown is rolled back separately through the overwrite snapshots.
+        """
+        api_calls = 0
+
+        if ladder.invites_paused:
+            if 'INVITES_DISABLED' in guild.features:
+                api_calls += 1
+                try:
+                    await self._edit_guild(guild, 'invites', ActionPriority.RESTORATION, invites_disabled=False)
+                except Exception as e:
+                    logger.error(f"Error resuming invites in {guild.name}: {e}")
+            ladder.invites_paused = False
+
+        channels = [guild.get_channel(channel_id) for channel_id in ladder.slowmode]
+        channels = [channel for channel in channels
+                    if channel is not None and channel.slowmode_delay == SLOWMODE_DELAY]
+        results = await asyncio.gather(*[
+            self._edit_channel(channel, ActionPriority.RESTORATION, slowmode_delay=ladder.slowmode[channel.id])
+            for channel in channels
+        ], return_exceptions=True)
+        for channel, result in zip(channels, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error restoring slow-mode in {channel.name}: {result}")
+        api_calls += len(channels)
+        ladder.slowmode.clear()
+
+        if ladder.verification_level is not None:
+            if guild.verification_level == RAID_VERIFICATION_LEVEL:
+                api_calls += 1
+                try:
+                    await self._edit_guild(guild, 'verification', ActionPriority.RESTORATION,
+                                           verification_level=discord.VerificationLevel(ladder.verification_level))
+                except Exception as e:
+                    logger.error(f"Error restoring verification level in {guild.name}: {e}")
+            ladder.verification_level = None
+
+        ladder.step = LadderStep.NONE
+        return api_calls
+
+    async def _edit_guild(self, guild: discord.Guild, setting: str, priority: ActionPriority, **fields):
+        await self.scheduler.run(
+            route_bucket('PATCH', '/guilds/{guild_id}', guild_id=guild.id),
+            lambda: guild.edit(**fields),
+            priority=priority,
+            key=(setting, guild.id)
+        )
+
+    def _edit_channel(self, channel, priority: ActionPriority, **fields) -> asyncio.Future:
+        return self.scheduler.submit(
+            route_bucket('PATCH', '/channels/{channel_id}', channel_id=channel.id),
+            lambda: channel.edit(**fields),
+            priority=priority,
+            key=('slowmode', channel.id)
+        )
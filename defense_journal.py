@@ -0,0 +1,142 @@
+"""
+Defense Journal
+Append-only journal of defense state changes with periodic snapshots
+"""
+
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Records appended before a snapshot is taken automatically
+SNAPSHOT_INTERVAL = 50_000
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode()
+    return str(value)
+
+
+class DefenseJournal:
+    """Event-sourced persistence for DefenseSystem state.
+
+    Every state change is appended as one JSON line ``[seq, kind, guild_id, data]``
+    to the current journal file. A snapshot stores the full state together with
+    the sequence number it covers; taking one rolls the journal to a new file and
+    deletes files the snapshot made redundant. Recovery loads the newest snapshot
+    and replays only the records after it.
+    """
+
+    def __init__(self, directory: str = 'data/journal', snapshot_interval: int = SNAPSHOT_INTERVAL):
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        self.seq = 0
+        self.since_snapshot = 0
+        self._file = None
+        self._file_start = None
+
+    @property
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, 'snapshot.json')
+
+    def _journal_path(self, start_seq: int) -> str:
+        return os.path.join(self.directory, f"journal-{start_seq:012d}.log")
+
+    def _journal_files(self):
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(name for name in os.listdir(self.directory)
+                       if name.startswith('journal-') and name.endswith('.log'))
+        return [(int(name[8:20]), os.path.join(self.directory, name)) for name in names]
+
+    def load(self) -> Tuple[Optional[Dict], Iterator[Tuple[str, Optional[int], Dict]]]:
+        """Return the latest snapshot state and an iterator over the records after it"""
+        state = None
+        snapshot_seq = 0
+        if os.path.exists(self._snapshot_path):
+            try:
+                with open(self._snapshot_path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                state = snapshot['state']
+                snapshot_seq = snapshot['seq']
+            except Exception as e:
+                logger.error(f"Error loading defense snapshot, replaying full journal: {e}")
+
+        self.seq = snapshot_seq
+        return state, self._replay(snapshot_seq)
+
+    def _replay(self, after_seq: int):
+        for _, path in self._journal_files():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        seq, kind, guild_id, data = json.loads(line)
+                    except ValueError:
+                        break  # Torn write from a crash; nothing valid follows it
+                    if seq <= after_seq:
+                        continue
+                    self.seq = seq
+                    self.since_snapshot += 1
+                    yield kind, guild_id, data
+
+    def append(self, kind: str, guild_id: Optional[int], data: Dict):
+        """Durably record one state change"""
+        try:
+            if self._file is None:
+                self._roll()
+            self.seq += 1
+            self._file.write(json.dumps([self.seq, kind, guild_id, data], default=_encode) + '\n')
+            self._file.flush()
+            self.since_snapshot += 1
+        except Exception as e:
+            logger.error(f"Error writing defense journal: {e}")
+
+    @property
+    def snapshot_due(self) -> bool:
+        return self.since_snapshot >= self.snapshot_interval
+
+    def _roll(self):
+        """Start a new journal file for records after the current sequence number"""
+        os.makedirs(self.directory, exist_ok=True)
+        if self._file is not None:
+            self._file.close()
+        self._file_start = self.seq + 1
+        self._file = open(self._journal_path(self._file_start), 'a', encoding='utf-8')
+
+    def begin_snapshot(self) -> int:
+        """Roll the journal so records written during the snapshot survive it; returns the covered seq"""
+        self._roll()
+        self.since_snapshot = 0
+        return self.seq
+
+    def write_snapshot(self, state: Dict, seq: int):
+        """Persist a snapshot covering records up to ``seq`` and drop redundant journal files.
+
+        Safe to call from a worker thread; ``state`` must not be mutated meanwhile.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self._snapshot_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'seq': seq, 'created': datetime.now().isoformat(), 'state': state}, f, default=_encode)
+        os.replace(tmp_path, self._snapshot_path)
+
+        for start_seq, path in self._journal_files():
+            if start_seq <= seq:
+                os.remove(path)
+
+    def size_bytes(self) -> int:
+        """Bytes of journal waiting to be replayed on the next start"""
+        return sum(os.path.getsize(path) for _, path in self._journal_files())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
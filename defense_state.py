@@ -0,0 +1,193 @@
+"""
+Per-Guild Defense State
+Compact detector and protection state owned by one dict keyed by guild ID
+"""
+
+import sys
+import asyncio
+import hashlib
+from collections import deque
+from datetime import datetime
+from typing import Dict
+
+import discord
+
+from event_pipeline import GuildActionEvent
+from incident import Incident
+from countermeasure_ladder import LadderState
+from timing import to_ms
+
+# History kept per guild for the raid detectors
+JOIN_HISTORY_SIZE = 100
+MESSAGE_HISTORY_SIZE = 200
+ACTION_HISTORY_SIZE = 500
+ACTIVITY_HISTORY_SIZE = 500
+
+ACTIVITY_KINDS = ('rapid_joins', 'rapid_leaves', 'channel_deletions', 'role_deletions', 'permission_changes')
+
+# Scalar protection state written to the journal on every change
+FLAG_FIELDS = ('threat_level', 'raid_detection', 'channel_protection', 'emergency_mode', 'cybersecurity_active')
+
+
+def as_datetime(value) -> datetime:
+    """Accept datetimes from memory or ISO strings from the journal"""
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def as_ms(value) -> int:
+    """Accept epoch milliseconds, or datetimes/ISO strings from older snapshots"""
+    return value if isinstance(value, int) else to_ms(as_datetime(value))
+
+
+def decode_join(record: Dict) -> Dict:
+    record['timestamp'] = as_datetime(record['timestamp'])
+    record.setdefault('timestamp_ms', to_ms(record['timestamp']))
+    if record.get('account_created') is not None:
+        record['account_created'] = as_datetime(record['account_created'])
+    return record
+
+
+def message_fingerprint(content: str) -> Dict:
+    """What the spam detectors need from a message, without its text"""
+    normalized = content.lower().strip()
+    return {
+        'content_hash': hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16],
+        'content_length': len(normalized),
+        'mentions_everyone': '@everyone' in content or '@here' in content
+    }
+
+
+def decode_message(record: Dict) -> Dict:
+    record['timestamp'] = as_datetime(record['timestamp'])
+    record.setdefault('timestamp_ms', to_ms(record['timestamp']))
+    if 'content' in record:  # Journaled before messages were fingerprinted
+        record.update(message_fingerprint(record.pop('content')))
+    return record
+
+
+class DefenseState:
+    """Everything the defense system tracks for one guild.
+
+    Histories are bounded deques so appends never need trimming, and the lock
+    serialises containment and recovery within a guild while other guilds run
+    independently.
+    """
+
+    __slots__ = (
+        'guild_id',
+        'join_history',
+        'message_patterns',
+        'coordinated_actions',
+        'suspicious_activities',
+        'suspicious_members',
+        'raid_cohorts',
+        'threat_level',
+        'raid_detection',
+        'channel_protection',
+        'emergency_mode',
+        'cybersecurity_active',
+        'incident',
+        'ladder',
+        'lock'
+    )
+
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.join_history = deque(maxlen=JOIN_HISTORY_SIZE)
+        self.message_patterns = deque(maxlen=MESSAGE_HISTORY_SIZE)
+        self.coordinated_actions = deque(maxlen=ACTION_HISTORY_SIZE)
+        self.suspicious_activities = {kind: deque(maxlen=ACTIVITY_HISTORY_SIZE) for kind in ACTIVITY_KINDS}  # Epoch ms
+        self.suspicious_members: Dict[int, Dict] = {}
+        self.raid_cohorts: Dict[str, Dict] = {}
+        self.threat_level = 0
+        self.raid_detection = False
+        self.channel_protection = False
+        self.emergency_mode = False
+        self.cybersecurity_active = False
+        self.incident = None
+        self.ladder = LadderState()
+        self.lock = asyncio.Lock()
+
+    def clear_tracking(self):
+        """Forget detector history without touching protection flags"""
+        self.join_history.clear()
+        self.message_patterns.clear()
+        self.coordinated_actions.clear()
+        for history in self.suspicious_activities.values():
+            history.clear()
+        self.suspicious_members.clear()
+        self.raid_cohorts.clear()
+
+    def stand_down(self):
+        """Reset combat flags once a raid has been dealt with"""
+        self.threat_level = 0
+        self.cybersecurity_active = False
+
+    def flags(self) -> Dict:
+        """Protection flags, the current incident and applied countermeasures, as journaled on each transition"""
+        flags = {field: getattr(self, field) for field in FLAG_FIELDS}
+        flags['incident'] = self.incident.to_dict() if self.incident is not None else None
+        flags['ladder'] = self.ladder.to_dict()
+        return flags
+
+    def apply_flags(self, flags: Dict):
+        for field in FLAG_FIELDS:
+            setattr(self, field, flags[field])
+        self.incident = Incident.from_dict(self.guild_id, flags['incident']) if flags.get('incident') else None
+        self.ladder = LadderState.from_dict(flags['ladder']) if flags.get('ladder') else LadderState()
+
+    def add_guild_action(self, event: GuildActionEvent):
+        self.coordinated_actions.append(event)
+        if event.action_type == 'channel_delete':
+            self.suspicious_activities['channel_deletions'].append(event.timestamp_ms)
+        elif event.action_type == 'role_delete':
+            self.suspicious_activities['role_deletions'].append(event.timestamp_ms)
+
+    def to_dict(self) -> Dict:
+        """Snapshot form of this guild's state"""
+        data = self.flags()
+        data['join_history'] = list(self.join_history)
+        data['message_patterns'] = list(self.message_patterns)
+        data['coordinated_actions'] = [event.to_record() for event in self.coordinated_actions]
+        data['suspicious_activities'] = {kind: list(history) for kind, history in self.suspicious_activities.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, guild_id: int, data: Dict) -> 'DefenseState':
+        state = cls(guild_id)
+        state.apply_flags(data)
+        state.join_history.extend(decode_join(record) for record in data['join_history'])
+        state.message_patterns.extend(decode_message(record) for record in data['message_patterns'])
+
+        guild = discord.Object(id=guild_id)
+        state.coordinated_actions.extend(
+            GuildActionEvent.from_record(guild, record, as_datetime(record['timestamp']))
+            for record in data['coordinated_actions']
+        )
+        for kind, history in data['suspicious_activities'].items():
+            state.suspicious_activities[kind].extend(as_ms(value) for value in history)
+        return state
+
+    def sizeof(self) -> int:
+        """Approximate bytes held by this guild's state, including tracked records"""
+        size = sys.getsizeof(self)
+        for history in (self.join_history, self.message_patterns, self.coordinated_actions):
+            size += sys.getsizeof(history)
+            for record in history:
+                size += _record_size(record)
+
+        size += sys.getsizeof(self.suspicious_activities)
+        for history in self.suspicious_activities.values():
+            size += sys.getsizeof(history) + sum(sys.getsizeof(item) for item in history)
+
+        for mapping in (self.suspicious_members, self.raid_cohorts):
+            size += sys.getsizeof(mapping)
+            for value in mapping.values():
+                size += _record_size(value)
+        return size
+
+
+def _record_size(record) -> int:
+    if isinstance(record, dict):
+        return sys.getsizeof(record) + sum(sys.getsizeof(value) for value in record.values())
+    return sys.getsizeof(record)
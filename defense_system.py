@@ -9,41 +9,77 @@ import json
 import os
 import hashlib
 import base64
-from datetime import datetime, timedelta
+import time
+import random
+from datetime import datetime
+from operator import attrgetter
 from typing import Dict, List, Set, Optional
 import logging
 from cryptography.fernet import Fernet
 
+from action_scheduler import ActionScheduler, ActionPriority, route_bucket
+from overwrite_snapshot import OverwriteSnapshot, decode_overwrites, encode_overwrites
+from protected_index import ProtectedMemberIndex, has_protected_handle
+from durable_timers import DurableTimers
+from ban_pipeline import BanPipeline
+from blocklist import SharedBlocklist
+from defense_state import DefenseState, as_datetime, decode_join, decode_message, message_fingerprint
+from defense_journal import DefenseJournal
+from combat_log_store import CombatLogStore
+from audit_log_poller import AuditLogPoller
+from event_pipeline import EventPipeline, GatewayEvent, MemberJoinEvent, MessageEvent, GuildActionEvent
+from incident import Incident, IncidentPhase, threat_level_for, describe as describe_incident
+from member_audit import audit_members
+from backup_writer import BackupWriter, DEFAULT_FORMAT as DEFAULT_BACKUP_FORMAT
+from snapshot_store import GuildSummary, SnapshotStore
+from change_tracker import ChangeTracker, GuildChanges
+from backup_catalog import BackupCatalog, KIND_FULL, KIND_INCIDENT, KIND_SNAPSHOT
+from asset_archiver import AssetArchiver
+from restore_planner import RestorePlanner
+from retention import RetentionEngine
+from countermeasure_ladder import CountermeasureLadder, LadderState, LadderStep, STEP_DESCRIPTIONS, step_for
+from timing import DAY_MS, HOUR_MS, MINUTE_MS, account_age_ms, count_since, now_ms, records_since, to_ms
+
 logger = logging.getLogger(__name__)
 
+# Roles edited concurrently per batch during a lockdown (highest roles first)
+ROLE_EDIT_BATCH_SIZE = 10
+
+# Startup backups: guilds snapshotted at once, random start spread, and the age below which a guild is skipped
+STARTUP_BACKUP_CONCURRENCY = 4
+STARTUP_BACKUP_JITTER_SECONDS = 5.0
+STARTUP_BACKUP_MAX_AGE_MS = 6 * HOUR_MS
+
+# Changed guilds are snapshotted once edits pause this long, or at the latest after the max delay
+SNAPSHOT_QUIET_MS = MINUTE_MS
+SNAPSHOT_MAX_DELAY_MS = 10 * MINUTE_MS
+
+# How often expired backups are pruned by the retention tiers
+RETENTION_INTERVAL_MS = HOUR_MS
+
 class DefenseSystem:
     def __init__(self, bot):
         self.bot = bot
-        self.server_backups = {}
+        self.server_backups: Dict[int, GuildSummary] = {}  # Latest snapshot per guild; content stays on disk
+        self.backup_writer = BackupWriter(compression=bot.config.get('backup_compression', DEFAULT_BACKUP_FORMAT))
+        self.backup_catalog = BackupCatalog(self.backup_writer.directory)
+        self.snapshot_store = SnapshotStore(self.backup_writer.directory, self.backup_writer.compression,
+                                            self.backup_catalog)
+        self.asset_archiver = AssetArchiver(self.backup_writer.directory, self.backup_catalog)
         self.protection_active = False
-        self.raid_detection = False
-        self.channel_protection = False
         self.protected_channels = set()
-        self.suspicious_activities = {}
         self.lockdown_channels = set()
         
-        # Human raid detection
-        self.member_join_history = {}
-        self.suspicious_members = {}
-        self.raid_cohorts = {}
-        self.message_patterns = {}
-        self.coordinated_actions = {}
+        # Detector history, threat level and protection flags per guild
+        self.guild_states: Dict[int, DefenseState] = {}
         
         # Channel encryption system
         self.encrypted_channels = {}
         self.encryption_keys = {}
         self.channel_backup_data = {}
-        self.emergency_mode = False
         
-        # Cybersecurity combat system
-        self.cybersecurity_active = False
-        self.combat_logs = []
-        self.threat_level = 0
+        # Cybersecurity combat system (persistent, bounded combat log)
+        self.combat_logs = CombatLogStore()
         self.countermeasures = {
             'rate_limiting': True,
             'ip_blocking': True,
@@ -56,9 +92,213 @@ class DefenseSystem:
         self.protected_users = set()  # User IDs that are protected from all restrictions
         self.server_creators = set()  # Server creators (to be added when provided)
         
-    async def create_comprehensive_backup(self, guild: discord.Guild):
-        """Create a comprehensive backup of the entire server structure"""
+        # Shared REST scheduler (containment > bans > restoration > cosmetic)
+        self.action_scheduler = ActionScheduler()
+        self.ban_pipeline = BanPipeline(bot, self.action_scheduler)
+        
+        # Raider IDs shared across guilds, checked before any join processing
+        self.blocklist = SharedBlocklist()
+        
+        # Exact pre-lockdown overwrites per guild, used for minimal rollbacks
+        self.overwrite_snapshots: Dict[int, OverwriteSnapshot] = {}
+        
+        # Protected members per guild and restart-safe restoration timers
+        self.protected_index = ProtectedMemberIndex()
+        self._protected_ids = set()
+        self.refresh_protected_ids()
+        self.durable_timers = DurableTimers()
+        self.durable_timers.register('restore_permissions', self.restore_permissions_timer)
+        
+        # Every state change is journaled so a restart resumes where it left off
+        self.journal = DefenseJournal()
+        self.state_recovered = False
+        
+        # Gateway events are published here and consumed off the gateway path
+        self.events = EventPipeline()
+        self.events.subscribe('raid_detectors', self.handle_event, MemberJoinEvent, MessageEvent, GuildActionEvent)
+        
+        # Actor attribution for destructive actions, one audit-log fetch per burst
+        self.audit_poller = AuditLogPoller(self.action_scheduler, on_rogue_actor=self.isolate_rogue_actor)
+        self.events.subscribe('audit_attribution', self.audit_poller.handle_event, GuildActionEvent)
+        
+        # Graduated responses: verification, slow-mode, invite pause, then full lockdown
+        self.countermeasure_ladder = CountermeasureLadder(self.action_scheduler, on_lockdown=self.full_lockdown)
+        
+        # Diff-based restores through the shared scheduler
+        self.restore_planner = RestorePlanner(self.action_scheduler, self.asset_archiver)
+        
+        # Objects changed since the last snapshot, marked by gateway update events
+        self.change_tracker = ChangeTracker()
+        
+        # Grandfather-father-son pruning of old backups, run from the monitoring loop
+        self.retention = RetentionEngine(self.backup_catalog, self.snapshot_store, self.asset_archiver)
+        self.last_retention_ms = 0
+        
+        # Initial backup sweep, started by the first on_ready only
+        self.startup_backup_task: Optional[asyncio.Task] = None
+        
+        # In-flight raid check per guild, so one guild's response never stalls the others
+        self.raid_check_tasks: Dict[int, asyncio.Task] = {}
+        
+    def get_state(self, guild_id: int) -> DefenseState:
+        """Get the defense state for a guild, creating it on first use"""
+        state = self.guild_states.get(guild_id)
+        if state is None:
+            state = self.guild_states[guild_id] = DefenseState(guild_id)
+        return state
+    
+    def schedule_channel_overwrites(self, channel, overwrites: Dict,
+                                    priority: ActionPriority = ActionPriority.CONTAINMENT) -> asyncio.Future:
+        """Queue one bulk overwrite edit for a channel through the REST scheduler"""
+        return self.action_scheduler.submit(
+            route_bucket('PATCH', '/channels/{channel_id}', channel_id=channel.id),
+            lambda: channel.edit(overwrites=overwrites),
+            priority=priority,
+            key=('channel_overwrites', channel.id)
+        )
+    
+    def lock_channel_overwrites(self, channel, overwrites: Dict) -> asyncio.Future:
+        """Snapshot a channel's current overwrites, then queue the lockdown overwrites"""
+        guild_id = channel.guild.id
+        if guild_id not in self.overwrite_snapshots:
+            self.overwrite_snapshots[guild_id] = OverwriteSnapshot(guild_id)
+        
+        snapshot = self.overwrite_snapshots[guild_id]
+        snapshot.capture(channel)
+        snapshot.record_applied(channel.id, overwrites)
+        self.journal.append('overwrites', guild_id, {
+            'channel_id': channel.id,
+            'original': snapshot.original[channel.id],
+            'applied': snapshot.applied[channel.id]
+        })
+        return self.schedule_channel_overwrites(channel, overwrites)
+    
+    def forget_channel_overwrites(self, snapshot: OverwriteSnapshot, channel_id: int):
+        """Drop a channel's snapshot once nothing is left to roll back"""
+        snapshot.forget(channel_id)
+        self.journal.append('overwrites_forget', snapshot.guild_id, {'channel_id': channel_id})
+    
+    async def rollback_channel_overwrites(self, guild: discord.Guild, channel_ids: Optional[Set[int]] = None) -> int:
+        """Undo the bot's overwrite changes, touching only channels that actually differ"""
+        snapshot = self.overwrite_snapshots.get(guild.id)
+        if not snapshot:
+            return 0
+        
+        pending = {}
+        for channel_id in list(snapshot.original):
+            if channel_ids is not None and channel_id not in channel_ids:
+                continue
+            
+            channel = guild.get_channel(channel_id)
+            if not channel:
+                self.forget_channel_overwrites(snapshot, channel_id)
+                continue
+            
+            target = snapshot.rollback_for(channel)
+            if target is None:
+                self.forget_channel_overwrites(snapshot, channel_id)
+                continue
+            
+            pending[channel_id] = self.schedule_channel_overwrites(
+                channel, decode_overwrites(target), priority=ActionPriority.RESTORATION
+            )
+        
+        restored = 0
+        for channel_id, future in pending.items():
+            if await self.wait_scheduled([future], f"rolling back channel {channel_id}"):
+                self.forget_channel_overwrites(snapshot, channel_id)
+                restored += 1
+        
+        if not snapshot:
+            del self.overwrite_snapshots[guild.id]
+        
+        return restored
+    
+    def schedule_role_edit(self, role: discord.Role, priority: ActionPriority, **fields) -> asyncio.Future:
+        """Queue a role edit through the REST scheduler"""
+        return self.action_scheduler.submit(
+            route_bucket('PATCH', '/guilds/{guild_id}/roles/{role_id}', guild_id=role.guild.id, role_id=role.id),
+            lambda: role.edit(**fields),
+            priority=priority,
+            key=('role', role.id)
+        )
+    
+    async def wait_scheduled(self, futures: List[asyncio.Future], description: str) -> int:
+        """Wait for scheduled actions and return how many succeeded"""
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        failed = [r for r in results if isinstance(r, Exception)]
+        for error in failed:
+            logger.error(f"Error {description}: {error}")
+        return len(results) - len(failed)
+    
+    def schedule_startup_backups(self, guilds: List[discord.Guild]) -> Optional[asyncio.Task]:
+        """Start the initial backup sweep in the background (once per process)"""
+        if self.startup_backup_task is not None:
+            return None
+        self.startup_backup_task = asyncio.create_task(self.run_startup_backups(list(guilds)))
+        return self.startup_backup_task
+    
+    def schedule_raid_checks(self, guilds: List[discord.Guild]) -> int:
+        """Start a raid check per guild, skipping guilds whose last check is still running"""
+        started = 0
+        for guild in guilds:
+            task = self.raid_check_tasks.get(guild.id)
+            if task is not None and not task.done():
+                continue
+            self.raid_check_tasks[guild.id] = asyncio.create_task(self.detect_raid_attempt(guild))
+            started += 1
+        return started
+    
+    async def run_startup_backups(self, guilds: List[discord.Guild]) -> Dict:
+        """Back up every guild without a fresh snapshot, a few at a time"""
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(STARTUP_BACKUP_CONCURRENCY)
+        counts = {'created': 0, 'fresh': 0, 'failed': 0}
+        
+        async def backup(guild):
+            try:
+                if await self.load_fresh_backup(guild):
+                    counts['fresh'] += 1
+                    return
+                # Spread the sweep out so reconnecting shards don't all hit the disk at once
+                await asyncio.sleep(random.uniform(0, STARTUP_BACKUP_JITTER_SECONDS))
+                async with semaphore:
+                    backup_file = await self.create_comprehensive_backup(guild)
+                counts['created' if backup_file else 'failed'] += 1
+            except Exception as e:
+                counts['failed'] += 1
+                logger.error(f"Error creating startup backup for guild {guild.id}: {e}")
+        
+        await asyncio.gather(*[backup(guild) for guild in guilds])
+        logger.info(
+            f"💾 Startup backups finished in {time.perf_counter() - start:.1f}s: "
+            f"{counts['created']} created, {counts['fresh']} already fresh, {counts['failed']} failed"
+        )
+        return counts
+    
+    async def load_fresh_backup(self, guild: discord.Guild) -> bool:
+        """Use the latest snapshot instead of a new one if it was confirmed recently"""
+        entry = await asyncio.to_thread(self.backup_catalog.latest, guild.id, KIND_SNAPSHOT)
+        if entry is None or now_ms() - entry['checked_ms'] > STARTUP_BACKUP_MAX_AGE_MS:
+            return False
+        summary = await asyncio.to_thread(self.snapshot_store.summary, guild.id)
+        if summary is None:
+            return False
+        self.server_backups[guild.id] = summary
+        return True
+    
+    async def create_comprehensive_backup(self, guild: discord.Guild, changes: Optional[GuildChanges] = None,
+                                          kind: str = KIND_SNAPSHOT):
+        """Create a comprehensive backup of the entire server structure.
+        
+        With ``changes``, only the objects marked dirty are encoded again. An
+        incident backup skips asset downloads and is never a restore base.
+        """
         try:
+            incident = kind == KIND_INCIDENT
+            if changes is None and not incident:
+                self.change_tracker.discard(guild.id)  # A full backup covers everything marked so far
+            
             backup = {
                 'metadata': {
                     'guild_id': guild.id,
@@ -92,15 +332,21 @@ class DefenseSystem:
                     'type': str(channel.type),
                     'position': channel.position,
                     'category_id': channel.category_id,
+                    'topic': getattr(channel, 'topic', None),
+                    'nsfw': getattr(channel, 'nsfw', None),
+                    'slowmode_delay': getattr(channel, 'slowmode_delay', None),
+                    'bitrate': getattr(channel, 'bitrate', None),
+                    'user_limit': getattr(channel, 'user_limit', None),
                     'permissions': {}
                 }
                 
-                # Backup channel permissions
+                # Backup channel permissions, with the target type so restores rebuild them exactly
                 if hasattr(channel, 'overwrites'):
-                    for target, overwrite in channel.overwrites.items():
-                        channel_data['permissions'][str(target.id)] = {
-                            'allow': overwrite.pair()[0].value,
-                            'deny': overwrite.pair()[1].value
+                    for target_id, (target_type, allow, deny) in encode_overwrites(channel.overwrites).items():
+                        channel_data['permissions'][str(target_id)] = {
+                            'type': target_type,
+                            'allow': allow,
+                            'deny': deny
                         }
                 
                 backup['channels'].append(channel_data)
@@ -128,14 +374,20 @@ class DefenseSystem:
                 }
                 backup['emojis'].append(emoji_data)
             
-            self.server_backups[guild.id] = backup
-            
-            # Save to encrypted file
-            backup_file = f'backups/{guild.id}_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-            os.makedirs('backups', exist_ok=True)
+            # CDN URLs die with the emoji or icon, so the files themselves are archived for restores;
+            # containment must not wait on downloads, so incident backups skip them
+            settings = backup['settings']
+            assets = {} if incident else await self.asset_archiver.archive(
+                [settings['icon'], settings['banner'], *(emoji_data['url'] for emoji_data in backup['emojis'])]
+            )
+            settings['icon_asset'] = assets.get(settings['icon'])
+            settings['banner_asset'] = assets.get(settings['banner'])
+            for emoji_data in backup['emojis']:
+                emoji_data['asset'] = assets.get(emoji_data['url'])
             
-            with open(backup_file, 'w') as f:
-                json.dump(backup, f, indent=2)
+            # Only channels, roles and emojis that changed since the last snapshot are written
+            backup_file = await asyncio.to_thread(self.snapshot_store.write_snapshot, backup, changes, kind)
+            self.server_backups[guild.id] = self.snapshot_store.summary(guild.id)
             
             logger.info(f"Comprehensive backup created for guild {guild.name}")
             return backup_file
@@ -147,26 +399,13 @@ class DefenseSystem:
     async def detect_raid_attempt(self, guild: discord.Guild):
         """Advanced raid detection algorithm for both bot and human raids"""
         try:
-            current_time = datetime.now()
-            guild_id = guild.id
-            
-            # Initialize tracking for new guilds
-            if guild_id not in self.suspicious_activities:
-                self.suspicious_activities[guild_id] = {
-                    'rapid_joins': [],
-                    'rapid_leaves': [],
-                    'channel_deletions': [],
-                    'role_deletions': [],
-                    'permission_changes': []
-                }
-            
-            activity = self.suspicious_activities[guild_id]
+            current_time = now_ms()
+            activity = self.get_state(guild.id).suspicious_activities
             
             # 1. Check for rapid member joins (bot raids)
-            recent_joins = [join_time for join_time in activity['rapid_joins'] 
-                          if current_time - join_time < timedelta(minutes=5)]
+            recent_joins = count_since(activity['rapid_joins'], current_time - 5 * MINUTE_MS)
             
-            if len(recent_joins) > 20:  # More than 20 joins in 5 minutes
+            if recent_joins > 20:  # More than 20 joins in 5 minutes
                 await self.trigger_raid_protocol(guild, "Rapid member joins detected (Bot raid)")
                 return True
             
@@ -176,10 +415,9 @@ class DefenseSystem:
                 return True
             
             # 3. Check for rapid channel deletions
-            recent_deletions = [del_time for del_time in activity['channel_deletions']
-                              if current_time - del_time < timedelta(minutes=2)]
+            recent_deletions = count_since(activity['channel_deletions'], current_time - 2 * MINUTE_MS)
             
-            if len(recent_deletions) > 5:  # More than 5 channel deletions in 2 minutes
+            if recent_deletions > 5:  # More than 5 channel deletions in 2 minutes
                 await self.trigger_raid_protocol(guild, "Rapid channel deletions detected")
                 return True
             
@@ -197,21 +435,15 @@ class DefenseSystem:
     async def detect_human_raid_patterns(self, guild: discord.Guild) -> bool:
         """Detect coordinated human raids"""
         try:
-            guild_id = guild.id
-            current_time = datetime.now()
-            
-            # Initialize tracking for new guilds
-            if guild_id not in self.member_join_history:
-                self.member_join_history[guild_id] = []
+            state = self.get_state(guild.id)
             
             # 1. Check for coordinated join patterns (similar join times)
-            recent_joins = [join for join in self.member_join_history[guild_id] 
-                          if current_time - join['timestamp'] < timedelta(minutes=10)]
+            recent_joins = records_since(state.join_history, now_ms() - 10 * MINUTE_MS)
             
             if len(recent_joins) > 15:  # More than 15 joins in 10 minutes
                 # Check for clustering (multiple joins within short timeframes)
-                join_times = [join['timestamp'] for join in recent_joins]
-                clusters = self.detect_time_clusters(join_times, timedelta(minutes=2))
+                join_times = [join['timestamp_ms'] for join in recent_joins]
+                clusters = self.detect_time_clusters(join_times, 2 * MINUTE_MS)
                 
                 if len(clusters) > 3:  # Multiple clusters suggest coordination
                     await self.trigger_raid_protocol(guild, "Coordinated human raid detected (Multiple join clusters)")
@@ -234,8 +466,8 @@ class DefenseSystem:
             logger.error(f"Error detecting human raid patterns: {e}")
             return False
     
-    def detect_time_clusters(self, timestamps: List[datetime], window: timedelta) -> List[List[datetime]]:
-        """Detect clusters of timestamps within a time window"""
+    def detect_time_clusters(self, timestamps: List[int], window: int) -> List[List[int]]:
+        """Detect clusters of epoch-ms timestamps within a time window in ms"""
         if not timestamps:
             return []
         
@@ -258,6 +490,7 @@ class DefenseSystem:
     async def analyze_member_patterns(self, guild: discord.Guild, recent_joins: List[Dict]) -> List[discord.Member]:
         """Analyze patterns in recently joined members"""
         suspicious = []
+        current_time = now_ms()
         
         for join_data in recent_joins:
             try:
@@ -266,8 +499,8 @@ class DefenseSystem:
                     continue
                 
                 # Check for new accounts (created within last week)
-                account_age = datetime.now() - member.created_at
-                if account_age < timedelta(days=7):
+                account_age = account_age_ms(member.id, current_time)
+                if account_age < 7 * DAY_MS:
                     suspicious.append(member)
                 
                 # Check for similar usernames (potential raid group naming)
@@ -278,7 +511,7 @@ class DefenseSystem:
                 # Check for lack of profile customization
                 if (not member.avatar and 
                     member.discriminator == '0000' and 
-                    account_age < timedelta(days=1)):
+                    account_age < DAY_MS):
                     suspicious.append(member)
                 
             except Exception as e:
@@ -309,31 +542,50 @@ class DefenseSystem:
         except Exception as e:
             logger.error(f"Error checking username patterns: {e}")
             return 0
-    
+
+    async def audit_guild_members(self, guild: discord.Guild, limit: int = 25) -> Dict:
+        """Score every member of the guild at once and rank the riskiest (slow-burn raid sweep)"""
+        try:
+            members = list(guild.members)
+            report = await asyncio.to_thread(audit_members, members, limit)
+
+            combat_log = {
+                'timestamp': datetime.now(),
+                'guild': guild.name,
+                'guild_id': guild.id,
+                'action': 'MEMBER_AUDIT',
+                'members': report['members'],
+                'high_risk': report['high_risk'],
+                'medium_risk': report['medium_risk']
+            }
+            self.combat_logs.append(combat_log)
+
+            logger.info(
+                f"🔎 Member audit for {guild.name}: {report['members']} members scored in "
+                f"{report['elapsed_seconds'] * 1000:.0f}ms, {report['high_risk']} high risk"
+            )
+            return report
+
+        except Exception as e:
+            logger.error(f"Error auditing members: {e}")
+            return {'members': 0, 'high_risk': 0, 'medium_risk': 0, 'ranked': [], 'elapsed_seconds': 0.0}
+
     async def detect_message_coordination(self, guild: discord.Guild) -> bool:
         """Detect coordinated messaging patterns"""
         try:
-            current_time = datetime.now()
-            guild_id = guild.id
-            
-            # Initialize message tracking
-            if guild_id not in self.message_patterns:
-                self.message_patterns[guild_id] = []
+            state = self.get_state(guild.id)
             
             # Check for spam patterns
-            recent_messages = [msg for msg in self.message_patterns[guild_id]
-                             if current_time - msg['timestamp'] < timedelta(minutes=5)]
+            recent_messages = records_since(state.message_patterns, now_ms() - 5 * MINUTE_MS)
             
             if len(recent_messages) > 50:  # More than 50 messages in 5 minutes
                 # Check for repetitive content
-                message_content = [msg['content'] for msg in recent_messages]
-                if self.detect_repetitive_content(message_content):
+                if self.detect_repetitive_content(recent_messages):
                     await self.trigger_raid_protocol(guild, "Coordinated message spam detected")
                     return True
             
             # Check for @everyone/@here spam
-            everyone_mentions = sum(1 for msg in recent_messages 
-                                  if '@everyone' in msg['content'] or '@here' in msg['content'])
+            everyone_mentions = sum(1 for msg in recent_messages if msg['mentions_everyone'])
             if everyone_mentions > 5:
                 await self.trigger_raid_protocol(guild, "Mass mention spam detected")
                 return True
@@ -344,18 +596,17 @@ class DefenseSystem:
             logger.error(f"Error detecting message coordination: {e}")
             return False
     
-    def detect_repetitive_content(self, messages: List[str]) -> bool:
-        """Detect if messages contain repetitive/spam content"""
+    def detect_repetitive_content(self, messages: List[Dict]) -> bool:
+        """Detect if tracked messages contain repetitive/spam content"""
         try:
             if len(messages) < 10:
                 return False
             
-            # Count similar messages
+            # Count similar messages by the hash of their normalized text
             message_counts = {}
             for msg in messages:
-                msg_clean = msg.lower().strip()
-                if len(msg_clean) > 5:  # Ignore very short messages
-                    message_counts[msg_clean] = message_counts.get(msg_clean, 0) + 1
+                if msg['content_length'] > 5:  # Ignore very short messages
+                    message_counts[msg['content_hash']] = message_counts.get(msg['content_hash'], 0) + 1
             
             # If any message appears more than 30% of the time, it's spam
             max_count = max(message_counts.values()) if message_counts else 0
@@ -370,34 +621,33 @@ class DefenseSystem:
     async def detect_coordinated_actions(self, guild: discord.Guild) -> bool:
         """Detect coordinated destructive actions by multiple users"""
         try:
-            current_time = datetime.now()
-            guild_id = guild.id
-            
-            # Initialize action tracking
-            if guild_id not in self.coordinated_actions:
-                self.coordinated_actions[guild_id] = []
+            state = self.get_state(guild.id)
             
             # Check for multiple users performing similar destructive actions
-            recent_actions = [action for action in self.coordinated_actions[guild_id]
-                            if current_time - action['timestamp'] < timedelta(minutes=5)]
+            recent_actions = records_since(state.coordinated_actions, now_ms() - 5 * MINUTE_MS,
+                                           key=attrgetter('timestamp_ms'))
             
             if len(recent_actions) > 10:
                 # Group actions by type
                 action_types = {}
                 for action in recent_actions:
-                    action_type = action['type']
+                    action_type = action.action_type
                     if action_type not in action_types:
                         action_types[action_type] = []
                     action_types[action_type].append(action)
                 
+                # Actors attributed from the audit log
+                actors = {action.actor_id for action in recent_actions if action.actor_id is not None}
+                by_actors = f" by {len(actors)} actors" if actors else ""
+                
                 # Check for coordinated channel deletions
                 if 'channel_delete' in action_types and len(action_types['channel_delete']) > 3:
-                    await self.trigger_raid_protocol(guild, "Coordinated channel destruction detected")
+                    await self.trigger_raid_protocol(guild, f"Coordinated channel destruction detected{by_actors}")
                     return True
                 
                 # Check for coordinated role modifications
-                if 'role_modify' in action_types and len(action_types['role_modify']) > 5:
-                    await self.trigger_raid_protocol(guild, "Coordinated role manipulation detected")
+                if 'role_delete' in action_types and len(action_types['role_delete']) > 5:
+                    await self.trigger_raid_protocol(guild, f"Coordinated role manipulation detected{by_actors}")
                     return True
             
             return False
@@ -406,39 +656,90 @@ class DefenseSystem:
             logger.error(f"Error detecting coordinated actions: {e}")
             return False
     
+    async def handle_event(self, event: GatewayEvent):
+        """Raid detector subscriber for the gateway event pipeline"""
+        if isinstance(event, MemberJoinEvent):
+            await self.track_member_join(event.guild, event.member)
+        elif isinstance(event, MessageEvent):
+            await self.track_message_pattern(event.guild, event.message)
+        elif isinstance(event, GuildActionEvent):
+            self.track_guild_action(event)
+    
+    def track_guild_action(self, event: GuildActionEvent):
+        """Track destructive guild actions for coordinated attack detection"""
+        try:
+            # Also updates suspicious activities
+            self.get_state(event.guild.id).add_guild_action(event)
+            self.journal.append('action', event.guild.id, event.to_record())
+            
+        except Exception as e:
+            logger.error(f"Error tracking guild action: {e}")
+    
+    async def isolate_rogue_actor(self, guild: discord.Guild, actor_id: int, action_count: int):
+        """Strip a rogue admin's roles, or kick a compromised bot, identified from the audit log"""
+        try:
+            if actor_id == guild.me.id or self.is_protected_user(actor_id, guild):
+                logger.info(f"🛡️ Not isolating protected actor {actor_id} in {guild.name}")
+                return
+            
+            member = guild.get_member(actor_id)
+            if not member:
+                return
+            
+            if member.top_role >= guild.me.top_role:
+                logger.warning(f"Cannot isolate {member.display_name} in {guild.name}: role is above the bot")
+                return
+            
+            reason = f"Cybersecurity combat mode - {action_count} destructive actions in a minute"
+            if member.bot:
+                # Integration roles cannot be removed, so compromised bots are kicked
+                action = lambda: member.kick(reason=reason)
+                bucket = route_bucket('DELETE', '/guilds/{guild_id}/members/{user_id}', guild_id=guild.id, user_id=member.id)
+            else:
+                keep_roles = [role for role in member.roles[1:] if role.managed]
+                action = lambda: member.edit(roles=keep_roles, reason=reason)
+                bucket = route_bucket('PATCH', '/guilds/{guild_id}/members/{user_id}', guild_id=guild.id, user_id=member.id)
+            
+            await self.action_scheduler.run(bucket, action, priority=ActionPriority.CONTAINMENT,
+                                            key=('isolate', guild.id, member.id))
+            
+            combat_log = {
+                'timestamp': datetime.now(),
+                'guild': guild.name,
+                'guild_id': guild.id,
+                'action': 'ROGUE_ACTOR_ISOLATED',
+                'user_id': actor_id,
+                'is_bot': member.bot,
+                'destructive_actions': action_count
+            }
+            self.combat_logs.append(combat_log)
+            
+            logger.warning(f"🎯 ISOLATED rogue actor {member.display_name} in {guild.name} ({action_count} destructive actions)")
+            
+        except Exception as e:
+            logger.error(f"Error isolating rogue actor {actor_id}: {e}")
+    
     async def track_member_join(self, guild: discord.Guild, member: discord.Member):
         """Track member joins for raid detection"""
         try:
-            guild_id = guild.id
-            
-            if guild_id not in self.member_join_history:
-                self.member_join_history[guild_id] = []
+            state = self.get_state(guild.id)
             
+            current_time = now_ms()
             join_data = {
                 'user_id': member.id,
                 'username': member.display_name,
-                'timestamp': datetime.now(),
+                'timestamp': datetime.fromtimestamp(current_time / 1000),
+                'timestamp_ms': current_time,
                 'account_created': member.created_at,
                 'avatar': str(member.avatar.url) if member.avatar else None
             }
             
-            self.member_join_history[guild_id].append(join_data)
-            
-            # Keep only last 100 joins per guild
-            if len(self.member_join_history[guild_id]) > 100:
-                self.member_join_history[guild_id] = self.member_join_history[guild_id][-100:]
+            # Bounded history keeps only the last 100 joins per guild
+            state.join_history.append(join_data)
             
             # Update suspicious activities
-            if guild_id not in self.suspicious_activities:
-                self.suspicious_activities[guild_id] = {
-                    'rapid_joins': [],
-                    'rapid_leaves': [],
-                    'channel_deletions': [],
-                    'role_deletions': [],
-                    'permission_changes': []
-                }
-            
-            self.suspicious_activities[guild_id]['rapid_joins'].append(datetime.now())
+            state.suspicious_activities['rapid_joins'].append(current_time)
+            self.journal.append('join', guild.id, join_data)
             
         except Exception as e:
             logger.error(f"Error tracking member join: {e}")
@@ -446,93 +747,192 @@ class DefenseSystem:
     async def track_message_pattern(self, guild: discord.Guild, message: discord.Message):
         """Track message patterns for coordination detection"""
         try:
-            guild_id = guild.id
-            
-            if guild_id not in self.message_patterns:
-                self.message_patterns[guild_id] = []
+            state = self.get_state(guild.id)
             
+            current_time = now_ms()
+            # Only a fingerprint is kept, so message text never reaches the journal
             message_data = {
                 'user_id': message.author.id,
-                'content': message.content,
-                'timestamp': datetime.now(),
+                **message_fingerprint(message.content),
+                'timestamp': datetime.fromtimestamp(current_time / 1000),
+                'timestamp_ms': current_time,
                 'channel_id': message.channel.id
             }
             
-            self.message_patterns[guild_id].append(message_data)
-            
-            # Keep only last 200 messages per guild
-            if len(self.message_patterns[guild_id]) > 200:
-                self.message_patterns[guild_id] = self.message_patterns[guild_id][-200:]
+            # Bounded history keeps only the last 200 messages per guild
+            state.message_patterns.append(message_data)
+            self.journal.append('message', guild.id, message_data)
             
         except Exception as e:
             logger.error(f"Error tracking message pattern: {e}")
     
     async def trigger_raid_protocol(self, guild: discord.Guild, reason: str):
         """Activate emergency raid protection protocol with cybersecurity combat"""
-        try:
-            logger.warning(f"🚨 RAID DETECTED in {guild.name}: {reason}")
-            
-            # Set threat level based on raid type
-            if "bot raid" in reason.lower():
-                self.threat_level = 9  # Critical
-            elif "human raid" in reason.lower():
-                self.threat_level = 8  # High
-            elif "spam" in reason.lower():
-                self.threat_level = 6  # Medium
-            else:
-                self.threat_level = 7  # High
-            
-            # Log combat initiation
-            combat_log = {
-                'timestamp': datetime.now(),
-                'guild': guild.name,
-                'threat_type': reason,
-                'threat_level': self.threat_level,
-                'action': 'COMBAT_INITIATED'
-            }
-            self.combat_logs.append(combat_log)
-            
-            # Create emergency backup
-            backup_file = await self.create_comprehensive_backup(guild)
-            
-            # Send immediate email alert to programmer
-            await self.bot.send_alert_email(
-                "🚨 RAID DETECTED - CYBERSECURITY COMBAT INITIATED",
-                f"""
+        state = self.get_state(guild.id)
+        threat_level = threat_level_for(reason)
+        incident = state.incident
+        
+        if incident is not None and incident.active:
+            # Repeated detections during an incident cost nothing; only escalations act
+            if not incident.observe(reason, threat_level):
+                return
+            await self.escalate_incident(guild, state, incident)
+            return
+        
+        # Registered before the first await so concurrent detections see it
+        incident = state.incident = Incident(guild.id, reason, threat_level)
+        target = step_for(threat_level)
+        
+        async with state.lock:
+            incident.transition(IncidentPhase.CONTAINING)
+            try:
+                logger.warning(f"🚨 RAID DETECTED in {guild.name}: {reason} (incident {incident.id})")
+                
+                state.threat_level = threat_level
+                self.journal_flags(state)
+                
+                # Emergency backup before any countermeasure, so it records the guild's own settings
+                backup_file = await self.create_comprehensive_backup(guild, kind=KIND_INCIDENT)
+                
+                # Cheap steps go first; they take a handful of API calls
+                await self.climb_ladder(guild, state, incident, min(target, LadderStep.PAUSE_INVITES))
+                
+                # Log combat initiation
+                combat_log = {
+                    'timestamp': datetime.now(),
+                    'guild': guild.name,
+                    'guild_id': guild.id,
+                    'incident_id': incident.id,
+                    'threat_type': reason,
+                    'threat_level': state.threat_level,
+                    'action': 'COMBAT_INITIATED'
+                }
+                self.combat_logs.append(combat_log)
+                
+                countermeasures = "\n".join(
+                    f"✅ {description}" for step, description in STEP_DESCRIPTIONS.items() if step <= target
+                )
+                
+                # Send immediate email alert to programmer
+                await self.bot.send_alert_email(
+                    "🚨 RAID DETECTED - CYBERSECURITY COMBAT INITIATED",
+                    f"""
 🚨 RAID DETECTED - CYBERSECURITY COMBAT INITIATED
 
 SERVER: {guild.name}
 GUILD ID: {guild.id}
+INCIDENT ID: {incident.id}
 THREAT TYPE: {reason}
-THREAT LEVEL: {self.threat_level}/10
+THREAT LEVEL: {state.threat_level}/10
 TIME: {datetime.now()}
 BACKUP CREATED: {backup_file}
 
 🛡️ CYBERSECURITY COUNTERMEASURES ACTIVATED:
-✅ Channels Hidden and Encrypted
-✅ Permissions Disabled for 60 seconds
-✅ Rate Limiting Active
-✅ Behavior Analysis Running
-✅ Pattern Detection Active
-✅ Auto-Ban System Engaged
+{countermeasures}
 
 ⚔️ COMBAT STATUS: ACTIVE
 🎯 TARGET: RAID ATTACKERS
-🔒 PROTECTION: MAXIMUM
+🔒 PROTECTION: {target.name}
 
 Only you (the programmer) can see and control this system!
                 """
+                )
+                
+                # Full lockdown only once the backup exists
+                await self.climb_ladder(guild, state, incident, target)
+                
+                # Set raid detection flag
+                state.raid_detection = True
+                state.cybersecurity_active = True
+                
+            except Exception as e:
+                logger.error(f"Error triggering raid protocol: {e}")
+            finally:
+                incident.transition(IncidentPhase.CONTAINED)
+                self.journal_flags(state)
+    
+    async def escalate_incident(self, guild: discord.Guild, state: DefenseState, incident: Incident):
+        """Raise the threat level of a running incident, re-running containment once it is contained"""
+        try:
+            logger.warning(
+                f"⬆️ Incident {incident.id} in {guild.name} escalated to "
+                f"{incident.threat_level}/10: {incident.reason}"
             )
+            state.threat_level = incident.threat_level
             
-            # Activate cybersecurity combat mode
-            await self.activate_cybersecurity_combat(guild, reason)
+            combat_log = {
+                'timestamp': datetime.now(),
+                'guild': guild.name,
+                'guild_id': guild.id,
+                'incident_id': incident.id,
+                'threat_type': incident.reason,
+                'threat_level': incident.threat_level,
+                'action': 'THREAT_ESCALATED'
+            }
+            self.combat_logs.append(combat_log)
+            self.journal_flags(state)
             
-            # Set raid detection flag
-            self.raid_detection = True
-            self.cybersecurity_active = True
+            # A containment pass in progress already covers the new threat
+            await self.rerun_containment(guild, state, incident)
             
         except Exception as e:
-            logger.error(f"Error triggering raid protocol: {e}")
+            logger.error(f"Error escalating incident {incident.id}: {e}")
+    
+    async def rerun_containment(self, guild: discord.Guild, state: DefenseState, incident: Incident):
+        """Run another containment pass for a contained incident"""
+        if incident.phase is not IncidentPhase.CONTAINED:
+            return
+        
+        async with state.lock:
+            if incident.phase is not IncidentPhase.CONTAINED:
+                return
+            incident.transition(IncidentPhase.CONTAINING)
+            self.journal_flags(state)
+            try:
+                await self.climb_ladder(guild, state, incident, step_for(incident.threat_level))
+            finally:
+                incident.transition(IncidentPhase.CONTAINED)
+                self.journal_flags(state)
+    
+    async def climb_ladder(self, guild: discord.Guild, state: DefenseState, incident: Incident, target: LadderStep):
+        """Apply countermeasures up to ``target`` and log what each step cost"""
+        reports = await self.countermeasure_ladder.climb(
+            guild, state.ladder, target, self.hot_channels(guild, state), incident.reason
+        )
+        for report in reports:
+            combat_log = {
+                'timestamp': datetime.now(),
+                'guild': guild.name,
+                'guild_id': guild.id,
+                'incident_id': incident.id,
+                'action': 'COUNTERMEASURE_STEP',
+                'step': report['step'],
+                'api_calls': report['api_calls'],
+                'elapsed_seconds': report['elapsed_seconds']
+            }
+            self.combat_logs.append(combat_log)
+        if reports:
+            self.journal_flags(state)
+    
+    def hot_channels(self, guild: discord.Guild, state: DefenseState) -> List:
+        """Channels with the most tracked messages in the last 5 minutes, busiest first"""
+        counts = {}
+        for message in records_since(state.message_patterns, now_ms() - 5 * MINUTE_MS):
+            counts[message['channel_id']] = counts.get(message['channel_id'], 0) + 1
+        
+        channels = []
+        for channel_id in sorted(counts, key=counts.get, reverse=True):
+            channel = guild.get_channel(channel_id)
+            if channel is not None:
+                channels.append(channel)
+        return channels
+    
+    async def full_lockdown(self, guild: discord.Guild, threat_reason: str) -> int:
+        """Top ladder step: full cybersecurity combat; returns API calls dispatched meanwhile"""
+        dispatched = self.action_scheduler.dispatched()
+        await self.activate_cybersecurity_combat(guild, threat_reason)
+        # Scheduler-wide, so approximate if other guilds are acting at the same time
+        return self.action_scheduler.dispatched() - dispatched
     
     async def activate_cybersecurity_combat(self, guild: discord.Guild, threat_reason: str):
         """Activate cybersecurity combat mode - hide channels and disable permissions"""
@@ -552,8 +952,9 @@ Only you (the programmer) can see and control this system!
             combat_log = {
                 'timestamp': datetime.now(),
                 'guild': guild.name,
+                'guild_id': guild.id,
                 'action': 'COMBAT_MODE_ACTIVATED',
-                'threat_level': self.threat_level,
+                'threat_level': self.get_state(guild.id).threat_level,
                 'countermeasures': list(self.countermeasures.keys())
             }
             self.combat_logs.append(combat_log)
@@ -570,73 +971,66 @@ Only you (the programmer) can see and control this system!
             programmer_id = self.bot.config.get('dev_user_id', 0)
             programmer = self.bot.get_user(programmer_id) if programmer_id else None
             
-            hidden_channels = 0
+            # Collect protected members once (programmer, server creator, etc.)
+            protected_members = {}
+            
+            # Add bot owner
+            if programmer:
+                member = guild.get_member(programmer.id)
+                if member:
+                    protected_members[member.id] = member
+            
+            # Add server creator
+            if guild.owner:
+                protected_members[guild.owner.id] = guild.owner
+            
+            # Add other protected users
+            for user_id in self.protected_users.union(self.server_creators):
+                member = guild.get_member(user_id)
+                if member:
+                    protected_members[member.id] = member
+            
+            channel_actions = {}
             
             for channel in guild.channels:
                 if channel.type not in [discord.ChannelType.category, discord.ChannelType.voice]:
-                    try:
-                        # Hide from @everyone
-                        overwrite = channel.overwrites_for(guild.default_role)
+                    overwrites = channel.overwrites
+                    
+                    # Hide from @everyone and all roles
+                    for role in guild.roles:
+                        overwrite = overwrites.get(role, discord.PermissionOverwrite())
                         overwrite.view_channel = False
                         overwrite.send_messages = False
                         overwrite.read_message_history = False
                         overwrite.add_reactions = False
-                        overwrite.use_slash_commands = False
-                        await channel.set_permissions(guild.default_role, overwrite=overwrite)
-                        
-                        # Hide from all roles
-                        for role in guild.roles:
-                            if role.name != "@everyone" and role != guild.default_role:
-                                overwrite = channel.overwrites_for(role)
-                                overwrite.view_channel = False
-                                overwrite.send_messages = False
-                                overwrite.read_message_history = False
-                                overwrite.add_reactions = False
-                                overwrite.use_slash_commands = False
-                                await channel.set_permissions(role, overwrite=overwrite)
-                        
-                        # Keep access for protected users (programmer, server creator, etc.)
-                        protected_users = []
-                        
-                        # Add bot owner
-                        if programmer:
-                            protected_users.append(programmer)
-                        
-                        # Add server creator
-                        if guild.owner:
-                            protected_users.append(guild.owner)
-                        
-                        # Add other protected users
-                        for user_id in self.protected_users.union(self.server_creators):
-                            user = self.bot.get_user(user_id)
-                            if user:
-                                member = guild.get_member(user.id)
-                                if member:
-                                    protected_users.append(member)
-                        
-                        # Set permissions for all protected users
-                        for protected_user in protected_users:
-                            member = guild.get_member(protected_user.id)
-                            if member:
-                                overwrite = channel.overwrites_for(member)
-                                overwrite.view_channel = True
-                                overwrite.send_messages = True
-                                overwrite.read_message_history = True
-                                overwrite.add_reactions = True
-                                overwrite.use_slash_commands = True
-                                overwrite.manage_channels = True
-                                overwrite.manage_messages = True
-                                await channel.set_permissions(member, overwrite=overwrite)
-                        
-                        hidden_channels += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Error hiding channel {channel.name}: {e}")
+                        overwrite.use_application_commands = False
+                        overwrites[role] = overwrite
+                    
+                    # Keep access for protected users
+                    for member in protected_members.values():
+                        overwrite = overwrites.get(member, discord.PermissionOverwrite())
+                        overwrite.view_channel = True
+                        overwrite.send_messages = True
+                        overwrite.read_message_history = True
+                        overwrite.add_reactions = True
+                        overwrite.use_application_commands = True
+                        overwrite.manage_channels = True
+                        overwrite.manage_messages = True
+                        overwrites[member] = overwrite
+                    
+                    # One bulk edit per channel
+                    channel_actions[channel] = self.lock_channel_overwrites(channel, overwrites)
+            
+            # All buckets drain concurrently
+            hidden_channels = 0
+            for channel, future in channel_actions.items():
+                hidden_channels += await self.wait_scheduled([future], f"hiding channel {channel.name}")
             
             # Log lockdown
             combat_log = {
                 'timestamp': datetime.now(),
                 'guild': guild.name,
+                'guild_id': guild.id,
                 'action': 'CHANNEL_LOCKDOWN',
                 'hidden_channels': hidden_channels
             }
@@ -647,91 +1041,145 @@ Only you (the programmer) can see and control this system!
         except Exception as e:
             logger.error(f"Error in immediate channel lockdown: {e}")
     
+    def protected_member_ids(self, guild: discord.Guild) -> Set[int]:
+        """Get the IDs of every protected member present in a guild"""
+        protected = set(self.protected_index.members(guild))
+        for user_id in self.protected_users.union(self.server_creators):
+            if guild.get_member(user_id):
+                protected.add(user_id)
+        
+        bot_owner_id = self.bot.config.get('dev_user_id', 0)
+        if bot_owner_id and guild.get_member(bot_owner_id):
+            protected.add(bot_owner_id)
+        if guild.owner_id:
+            protected.add(guild.owner_id)
+        
+        return protected
+    
+    def roles_with_protected_members(self, guild: discord.Guild) -> Set[int]:
+        """Get the IDs of roles held by at least one protected member"""
+        role_ids = set()
+        for user_id in self.protected_member_ids(guild):
+            member = guild.get_member(user_id)
+            if member:
+                role_ids.update(role.id for role in member.roles)
+        return role_ids
+    
     async def disable_permissions_temporarily(self, guild: discord.Guild):
         """Disable all permissions for 60 seconds to prevent further damage"""
         try:
-            # Store original permissions for restoration
-            original_permissions = {}
+            # Roles holding protected users keep their permissions
+            protected_roles = self.roles_with_protected_members(guild)
+            
+            # Only roles below the bot's top role can be edited
+            top_position = guild.me.top_role.position if guild.me else 0
+            editable_roles = [
+                role for role in guild.roles
+                if not role.is_default() and not role.managed and role.position < top_position
+            ]
             
-            for role in guild.roles:
-                if role.name != "@everyone":
-                    original_permissions[role.id] = role.permissions.value
+            # Strip the most privileged roles first
+            editable_roles.sort(key=lambda role: role.position, reverse=True)
+            
+            # Create permissions with only basic access
+            basic_permissions = discord.Permissions(
+                view_channel=False,
+                send_messages=False,
+                read_message_history=False,
+                add_reactions=False,
+                use_application_commands=False,
+                connect=False,
+                speak=False
+            )
             
-            # Disable all permissions for 60 seconds (except for protected users)
-            for role in guild.roles:
-                if role.name != "@everyone":
-                    try:
-                        # Check if role has any protected users
-                        has_protected_users = False
-                        for member in role.members:
-                            if self.is_protected_user(member.id, guild):
-                                has_protected_users = True
-                                break
-                        
-                        if has_protected_users:
-                            logger.info(f"🛡️ Keeping permissions for role {role.name} (contains protected users)")
-                            continue
-                        
-                        # Create permissions with only basic access
-                        basic_permissions = discord.Permissions(
-                            view_channel=False,
-                            send_messages=False,
-                            read_message_history=False,
-                            add_reactions=False,
-                            use_slash_commands=False,
-                            connect=False,
-                            speak=False
-                        )
-                        
-                        await role.edit(permissions=basic_permissions, reason="Cybersecurity combat mode - permissions temporarily disabled")
-                        
-                    except Exception as e:
-                        logger.error(f"Error disabling permissions for role {role.name}: {e}")
+            # Keep the true originals if a previous lockdown is still pending restoration
+            timer_id = f"restore_permissions:{guild.id}"
+            pending = self.durable_timers.get(timer_id)
+            original_permissions = dict(pending['permissions']) if pending else {}
+            
+            targets = []
+            for role in editable_roles:
+                if role.id in protected_roles:
+                    logger.info(f"🛡️ Keeping permissions for role {role.name} (contains protected users)")
+                    continue
+                if role.permissions.value == basic_permissions.value:
+                    continue
+                original_permissions.setdefault(str(role.id), role.permissions.value)
+                targets.append(role)
+            
+            # Persist the restoration before touching any role
+            self.durable_timers.schedule(timer_id, 'restore_permissions', 60, {
+                'guild_id': guild.id,
+                'permissions': original_permissions
+            })
+            
+            # Concurrent edits, one hierarchy level batch at a time
+            disabled_roles = 0
+            for i in range(0, len(targets), ROLE_EDIT_BATCH_SIZE):
+                futures = [
+                    self.schedule_role_edit(
+                        role,
+                        ActionPriority.CONTAINMENT,
+                        permissions=basic_permissions,
+                        reason="Cybersecurity combat mode - permissions temporarily disabled"
+                    )
+                    for role in targets[i:i + ROLE_EDIT_BATCH_SIZE]
+                ]
+                disabled_roles += await self.wait_scheduled(futures, "disabling role permissions")
             
             # Log permission disable
             combat_log = {
                 'timestamp': datetime.now(),
                 'guild': guild.name,
+                'guild_id': guild.id,
                 'action': 'PERMISSIONS_DISABLED',
                 'duration': '60_seconds',
-                'affected_roles': len([r for r in guild.roles if r.name != "@everyone"])
+                'affected_roles': disabled_roles
             }
             self.combat_logs.append(combat_log)
             
-            # Schedule permission restoration after 60 seconds
-            asyncio.create_task(self.restore_permissions_after_delay(guild, original_permissions, 60))
-            
-            logger.warning(f"🚫 PERMISSIONS DISABLED for 60 seconds in {guild.name}")
+            logger.warning(f"🚫 PERMISSIONS DISABLED for 60 seconds in {guild.name} ({disabled_roles} roles)")
             
         except Exception as e:
             logger.error(f"Error disabling permissions temporarily: {e}")
     
-    async def restore_permissions_after_delay(self, guild: discord.Guild, original_permissions: dict, delay_seconds: int):
-        """Restore permissions after delay"""
+    async def restore_permissions_timer(self, payload: Dict):
+        """Durable timer handler that restores permissions stripped by a lockdown"""
+        guild = self.bot.get_guild(payload['guild_id'])
+        if not guild:
+            logger.warning(f"Guild {payload['guild_id']} unavailable, skipping permission restoration")
+            return
+        
+        original_permissions = {int(role_id): value for role_id, value in payload['permissions'].items()}
+        await self.restore_role_permissions(guild, original_permissions)
+    
+    async def restore_role_permissions(self, guild: discord.Guild, original_permissions: Dict[int, int]):
+        """Restore role permissions saved before a lockdown"""
         try:
-            await asyncio.sleep(delay_seconds)
-            
+            futures = []
             for role_id, permissions_value in original_permissions.items():
                 role = guild.get_role(role_id)
-                if role:
-                    try:
-                        await role.edit(
-                            permissions=discord.Permissions(permissions_value),
-                            reason="Cybersecurity combat mode - permissions restored"
-                        )
-                    except Exception as e:
-                        logger.error(f"Error restoring permissions for role {role.name}: {e}")
+                if role and role.permissions.value != permissions_value:
+                    futures.append(self.schedule_role_edit(
+                        role,
+                        ActionPriority.RESTORATION,
+                        permissions=discord.Permissions(permissions_value),
+                        reason="Cybersecurity combat mode - permissions restored"
+                    ))
+            
+            restored_roles = await self.wait_scheduled(futures, "restoring role permissions")
             
             # Log permission restoration
             combat_log = {
                 'timestamp': datetime.now(),
                 'guild': guild.name,
+                'guild_id': guild.id,
                 'action': 'PERMISSIONS_RESTORED',
-                'restored_roles': len(original_permissions)
+                'restored_roles': restored_roles
             }
             self.combat_logs.append(combat_log)
             
-            logger.info(f"✅ PERMISSIONS RESTORED after {delay_seconds}s in {guild.name}")
+            logger.info(f"✅ PERMISSIONS RESTORED for {restored_roles} roles in {guild.name}")
             
         except Exception as e:
             logger.error(f"Error restoring permissions: {e}")
@@ -767,9 +1215,10 @@ Only you (the programmer) can see and control this system!
             combat_log = {
                 'timestamp': datetime.now(),
                 'guild': guild.name,
+                'guild_id': guild.id,
                 'action': 'COUNTERMEASURES_ACTIVATED',
                 'countermeasures': countermeasures_activated,
-                'threat_level': self.threat_level
+                'threat_level': self.get_state(guild.id).threat_level
             }
             self.combat_logs.append(combat_log)
             
@@ -796,36 +1245,43 @@ Only you (the programmer) can see and control this system!
     async def activate_auto_ban(self, guild: discord.Guild, threat_reason: str):
         """Activate automatic banning of suspicious members"""
         try:
-            banned_count = 0
+            candidate_ids = []
             
             # Get recent suspicious members
-            recent_joins = self.member_join_history.get(guild.id, [])
-            current_time = datetime.now()
+            current_time = now_ms()
+            recent_joins = records_since(self.get_state(guild.id).join_history, current_time - 10 * MINUTE_MS)
             
             for join_data in recent_joins:
-                if current_time - join_data['timestamp'] < timedelta(minutes=10):
-                    member = guild.get_member(join_data['user_id'])
-                    if member and not member.guild_permissions.administrator:
-                        # Check if user is protected
-                        if self.is_protected_user(member.id, guild):
-                            logger.info(f"🛡️ Skipping ban for protected user: {member.display_name}")
-                            continue
-                        
-                        # Check if account is suspicious
-                        account_age = datetime.now() - member.created_at
-                        if account_age < timedelta(days=7):  # New accounts
-                            try:
-                                await member.ban(reason=f"Cybersecurity combat mode - suspicious account detected during {threat_reason}")
-                                banned_count += 1
-                            except Exception as e:
-                                logger.error(f"Error banning member {member.display_name}: {e}")
+                member = guild.get_member(join_data['user_id'])
+                if member and not member.guild_permissions.administrator:
+                    # Check if user is protected
+                    if self.is_protected_user(member.id, guild):
+                        logger.info(f"🛡️ Skipping ban for protected user: {member.display_name}")
+                        continue
+                    
+                    # Check if account is suspicious
+                    if account_age_ms(member.id, current_time) < 7 * DAY_MS:  # New accounts
+                        candidate_ids.append(member.id)
+            
+            report = await self.ban_pipeline.ban(
+                guild,
+                candidate_ids,
+                reason=f"Cybersecurity combat mode - suspicious account detected during {threat_reason}"
+            )
+            banned_count = report['banned']
+            
+            # Stop the same accounts from joining our other guilds
+            self.blocklist.add_many(report['banned_ids'])
             
             # Log auto-ban results
             combat_log = {
                 'timestamp': datetime.now(),
                 'guild': guild.name,
+                'guild_id': guild.id,
                 'action': 'AUTO_BAN_ACTIVATED',
                 'banned_count': banned_count,
+                'bans_per_second': report['bans_per_second'],
+                'elapsed_seconds': report['elapsed_seconds'],
                 'threat_reason': threat_reason
             }
             self.combat_logs.append(combat_log)
@@ -835,49 +1291,98 @@ Only you (the programmer) can see and control this system!
         except Exception as e:
             logger.error(f"Error in auto-ban activation: {e}")
     
-    def get_cybersecurity_status(self) -> Dict:
-        """Get cybersecurity combat status"""
+    async def enforce_blocklist(self, member: discord.Member) -> bool:
+        """Ban a joining member that was flagged as a raider in another guild"""
+        try:
+            # Bloom-filter front makes the common negative case O(1)
+            if member.id not in self.blocklist:
+                return False
+            
+            if self.is_protected_user(member.id, member.guild):
+                logger.info(f"🛡️ Skipping blocklist ban for protected user: {member.display_name}")
+                return False
+            
+            report = await self.ban_pipeline.ban(
+                member.guild,
+                [member.id],
+                reason="Pre-emptive ban - account flagged as raider in another guild"
+            )
+            
+            combat_log = {
+                'timestamp': datetime.now(),
+                'guild': member.guild.name,
+                'guild_id': member.guild.id,
+                'action': 'BLOCKLIST_BAN',
+                'user_id': member.id,
+                'banned_count': report['banned']
+            }
+            self.combat_logs.append(combat_log)
+            
+            if report['banned'] == 0:
+                logger.error(f"❌ BLOCKLIST: failed to ban flagged user {member.id} in {member.guild.name}")
+                return False
+            
+            logger.warning(f"🚫 BLOCKLIST: pre-emptively banned {member.id} in {member.guild.name}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error enforcing blocklist: {e}")
+            return False
+    
+    def get_cybersecurity_status(self, guild_id: Optional[int] = None) -> Dict:
+        """Get cybersecurity combat status for one guild, or across all guilds"""
+        if guild_id is not None:
+            states = [self.get_state(guild_id)]
+        else:
+            states = list(self.guild_states.values())
+        
         return {
-            'cybersecurity_active': self.cybersecurity_active,
-            'threat_level': self.threat_level,
-            'raid_detection': self.raid_detection,
+            'cybersecurity_active': any(state.cybersecurity_active for state in states),
+            'threat_level': max((state.threat_level for state in states), default=0),
+            'raid_detection': any(state.raid_detection for state in states),
+            'active_incidents': [
+                dict(describe_incident(state.incident), countermeasure=state.ladder.step.name.lower())
+                for state in states
+                if state.incident is not None and state.incident.active
+            ],
+            'actor_rates': self.audit_poller.actor_rates(guild_id) if guild_id is not None else {},
             'countermeasures': self.countermeasures,
             'combat_logs_count': len(self.combat_logs),
-            'recent_combat_logs': self.combat_logs[-5:] if self.combat_logs else [],
+            'recent_combat_logs': self.combat_logs.recent(5, guild_id),
             'protected_users_count': len(self.protected_users),
             'server_creators_count': len(self.server_creators)
         }
     
+    def refresh_protected_ids(self):
+        """Rebuild the set of IDs protected in every guild (bot owner, protected users, creators)"""
+        protected_ids = self.protected_users | self.server_creators
+        bot_owner_id = self.bot.config.get('dev_user_id', 0)
+        if bot_owner_id:
+            protected_ids.add(bot_owner_id)
+        self._protected_ids = protected_ids
+    
     def is_protected_user(self, user_id: int, guild: discord.Guild = None) -> bool:
         """Check if a user is protected from all restrictions"""
         try:
-            # Check if user is bot owner
-            bot_owner_id = self.bot.config.get('dev_user_id', 0)
-            if user_id == bot_owner_id:
+            # Bot owner, protected users and server creators
+            if user_id in self._protected_ids:
                 return True
             
-            # Check if user is in protected users list
-            if user_id in self.protected_users:
-                return True
-            
-            # Check if user is server creator
-            if user_id in self.server_creators:
-                return True
+            if guild is None:
+                return False
             
-            # Check if user is guild owner (if guild provided)
-            if guild and user_id == guild.owner_id:
+            # Check if user is guild owner
+            if user_id == guild.owner_id:
                 return True
             
-            # Check by username (protected handle: by_bytes)
-            if guild is not None:
-                member = guild.get_member(user_id)
-                if member is not None:
-                    username = (member.name or "").lower()
-                    display_name = (member.display_name or "").lower()
-                    if username == "by_bytes" or display_name == "by_bytes":
-                        return True
+            # Check by handle (by_bytes) using the maintained per-guild index
+            indexed_members = self.protected_index.get(guild.id)
+            if indexed_members is not None:
+                return user_id in indexed_members
             
-            return False
+            # Guild not indexed yet: fall back to a member lookup
+            member = guild.get_member(user_id)
+            return member is not None and has_protected_handle(member)
             
         except Exception as e:
             logger.error(f"Error checking protected user status: {e}")
@@ -887,6 +1392,7 @@ Only you (the programmer) can see and control this system!
         """Add a user to the protected users list"""
         try:
             self.protected_users.add(user_id)
+            self.refresh_protected_ids()
             
             # Log protection addition
             combat_log = {
@@ -908,6 +1414,7 @@ Only you (the programmer) can see and control this system!
         """Add a server creator to the protected list"""
         try:
             self.server_creators.add(user_id)
+            self.refresh_protected_ids()
             
             # Log server creator addition
             combat_log = {
@@ -930,6 +1437,7 @@ Only you (the programmer) can see and control this system!
         try:
             if user_id in self.protected_users:
                 self.protected_users.remove(user_id)
+                self.refresh_protected_ids()
                 
                 # Log protection removal
                 combat_log = {
@@ -992,114 +1500,110 @@ Only you (the programmer) can see and control this system!
     async def activate_emergency_protection(self, guild: discord.Guild):
         """Activate emergency channel protection"""
         try:
-            self.channel_protection = True
+            self.get_state(guild.id).channel_protection = True
             
             # Hide all channels from everyone except admins
             admin_role = discord.utils.get(guild.roles, name="Admin")
             
+            channel_actions = {}
             for channel in guild.channels:
                 if channel.type not in [discord.ChannelType.category, discord.ChannelType.voice]:
-                    try:
-                        # Hide from @everyone
-                        overwrite = channel.overwrites_for(guild.default_role)
-                        overwrite.view_channel = False
-                        await channel.set_permissions(guild.default_role, overwrite=overwrite)
-                        
-                        # Keep visible for admins
-                        if admin_role:
-                            overwrite = channel.overwrites_for(admin_role)
-                            overwrite.view_channel = True
-                            await channel.set_permissions(admin_role, overwrite=overwrite)
-                        
-                        self.protected_channels.add(channel.id)
-                        
-                    except Exception as e:
-                        logger.error(f"Error protecting channel {channel.name}: {e}")
+                    overwrites = channel.overwrites
+                    
+                    # Hide from @everyone
+                    overwrite = overwrites.get(guild.default_role, discord.PermissionOverwrite())
+                    overwrite.view_channel = False
+                    overwrites[guild.default_role] = overwrite
+                    
+                    # Keep visible for admins
+                    if admin_role:
+                        overwrite = overwrites.get(admin_role, discord.PermissionOverwrite())
+                        overwrite.view_channel = True
+                        overwrites[admin_role] = overwrite
+                    
+                    channel_actions[channel] = self.lock_channel_overwrites(channel, overwrites)
+            
+            for channel, future in channel_actions.items():
+                if await self.wait_scheduled([future], f"protecting channel {channel.name}"):
+                    self.protected_channels.add(channel.id)
+            
+            self.journal.append('protected_channels', None, {'channel_ids': self.protected_channels})
+            self.journal_flags(self.get_state(guild.id))
             
             logger.info(f"Emergency protection activated for guild {guild.name}")
             
         except Exception as e:
             logger.error(f"Error activating emergency protection: {e}")
     
-    async def restore_from_backup(self, guild: discord.Guild, backup_file: str = None):
-        """Restore server from backup"""
+    async def restore_from_backup(self, guild: discord.Guild, backup_file: str = None,
+                                  dry_run: bool = False) -> Optional[Dict]:
+        """Restore server from backup; returns the restore report, or the cost estimate for a dry run"""
         try:
             if not backup_file:
-                # Find the most recent backup
-                backup_files = [f for f in os.listdir('backups') if f.startswith(str(guild.id))]
-                if not backup_files:
-                    return False
+                entry = await asyncio.to_thread(self.restore_base, guild.id)
+                if not entry:
+                    return None
                 
-                backup_file = sorted(backup_files)[-1]
+                backup_path = entry['path']
+                manifest_path = backup_path if entry['kind'] == KIND_SNAPSHOT else None
+            else:
+                backup_path = os.path.join(self.backup_writer.directory, backup_file)
+                manifest_path = self.snapshot_store.find(backup_file)
             
-            backup_path = f'backups/{backup_file}'
+            if manifest_path:
+                backup = await asyncio.to_thread(self.snapshot_store.read_snapshot, manifest_path)
+            else:
+                backup = await self.backup_writer.read(backup_path)
             
-            with open(backup_path, 'r') as f:
-                backup = json.load(f)
+            # Only what differs from the backup is changed, dependencies first, calls overlapped per phase
+            plan = self.restore_planner.plan(guild, backup)
+            if dry_run:
+                return plan.estimate()
             
-            # Restore guild settings
-            await guild.edit(
-                name=backup['settings']['name'],
-                description=backup['settings']['description'],
-                verification_level=discord.VerificationLevel(backup['settings']['verification_level']),
-                default_notifications=discord.NotificationLevel(backup['settings']['default_notifications']),
-                explicit_content_filter=discord.ContentFilter(backup['settings']['explicit_content_filter'])
-            )
+            report = await self.restore_planner.execute(guild, plan)
+            combat_log = {
+                'timestamp': datetime.now(),
+                'guild': guild.name,
+                'guild_id': guild.id,
+                'action': 'SERVER_RESTORE',
+                'backup': os.path.basename(backup_path),
+                'api_calls': report['api_calls'],
+                'failed': report['failed'],
+                'elapsed_seconds': report['elapsed_seconds']
+            }
+            self.combat_logs.append(combat_log)
             
-            # Restore channels (simplified - Discord API limitations)
-            for channel_data in backup['channels']:
-                try:
-                    existing_channel = guild.get_channel(channel_data['id'])
-                    if not existing_channel and channel_data['type'] == 'text':
-                        # Recreate deleted text channel
-                        await guild.create_text_channel(
-                            name=channel_data['name'],
-                            position=channel_data['position']
-                        )
-                except Exception as e:
-                    logger.error(f"Error restoring channel {channel_data['name']}: {e}")
-            
-            # Restore roles
-            for role_data in backup['roles']:
-                try:
-                    existing_role = guild.get_role(role_data['id'])
-                    if not existing_role:
-                        # Recreate deleted role
-                        await guild.create_role(
-                            name=role_data['name'],
-                            color=discord.Color(role_data['color']),
-                            permissions=discord.Permissions(role_data['permissions']),
-                            hoist=role_data['hoist'],
-                            mentionable=role_data['mentionable']
-                        )
-                except Exception as e:
-                    logger.error(f"Error restoring role {role_data['name']}: {e}")
-            
-            logger.info(f"Server restored from backup: {backup_file}")
-            return True
+            logger.info(
+                f"Server restored from backup {os.path.basename(backup_path)}: {report['api_calls']} API calls, "
+                f"{report['failed']} failed, {report['elapsed_seconds']:.1f}s"
+            )
+            return report
             
         except Exception as e:
             logger.error(f"Error restoring from backup: {e}")
-            return False
+            return None
+    
+    def restore_base(self, guild_id: int) -> Optional[Dict]:
+        """Catalog entry of the newest snapshot or legacy full backup, taken before any active incident"""
+        incident = self.get_state(guild_id).incident
+        before_ms = to_ms(incident.started_at) if incident is not None and incident.active else None
+        entries = [self.backup_catalog.latest(guild_id, kind, before_ms) for kind in (KIND_SNAPSHOT, KIND_FULL)]
+        return max((entry for entry in entries if entry), key=lambda entry: entry['created_ms'], default=None)
     
     async def deactivate_protection(self, guild: discord.Guild):
         """Deactivate all protection measures"""
         try:
-            self.channel_protection = False
-            self.raid_detection = False
+            state = self.get_state(guild.id)
+            state.channel_protection = False
+            state.raid_detection = False
             
-            # Restore channel visibility
-            for channel_id in self.protected_channels:
-                channel = guild.get_channel(channel_id)
-                if channel:
-                    try:
-                        overwrite = channel.overwrites_for(guild.default_role)
-                        overwrite.view_channel = None
-                        await channel.set_permissions(guild.default_role, overwrite=overwrite)
-                    except Exception as e:
-                        logger.error(f"Error restoring channel {channel.name}: {e}")
+            # Roll back only the channels whose overwrites the bot changed
+            restored = await self.rollback_channel_overwrites(guild, set(self.protected_channels))
+            logger.info(f"Rolled back overwrites on {restored} channels in {guild.name}")
             
             self.protected_channels.clear()
+            self.journal.append('protected_channels', None, {'channel_ids': []})
+            self.journal_flags(state)
             
             # Send email notification
             await self.bot.send_alert_email(
@@ -1112,45 +1616,311 @@ Only you (the programmer) can see and control this system!
         except Exception as e:
             logger.error(f"Error deactivating protection: {e}")
     
-    async def monitor_suspicious_activity(self, guild: discord.Guild):
-        """Continuous monitoring for suspicious activities"""
+    async def snapshot_changed_guilds(self) -> int:
+        """Write delta snapshots for guilds whose tracked changes have settled; returns how many were written"""
+        written = 0
+        for guild_id in self.change_tracker.settled(SNAPSHOT_QUIET_MS, SNAPSHOT_MAX_DELAY_MS):
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                self.change_tracker.discard(guild_id)
+                continue
+            
+            # Changes made during a raid must never become the backup restores start from;
+            # they stay marked and are written once the incident is resolved
+            state = self.get_state(guild_id)
+            if (state.incident is not None and state.incident.active) or state.emergency_mode:
+                continue
+            
+            changes = self.change_tracker.take(guild_id)
+            if await self.create_comprehensive_backup(guild, changes):
+                written += 1
+            else:
+                self.change_tracker.merge(guild_id, changes)
+        return written
+    
+    async def apply_retention(self) -> Optional[Dict]:
+        """Prune expired backups once per retention interval; returns what was deleted, or None if not due"""
+        if now_ms() - self.last_retention_ms < RETENTION_INTERVAL_MS:
+            return None
+        self.last_retention_ms = now_ms()
         try:
-            # Check for unusual member activity
-            member_count = guild.member_count
-            if guild.id in self.server_backups:
-                previous_count = self.server_backups[guild.id]['metadata']['member_count']
-                
-                # Significant member count change
-                if abs(member_count - previous_count) > 50:
-                    await self.create_comprehensive_backup(guild)
-            
-            # Check for rapid permission changes
-            # This would require additional tracking of permission changes
-            
-            # Check for unusual channel activity
-            channel_count = len(guild.channels)
-            if guild.id in self.server_backups:
-                previous_channels = len(self.server_backups[guild.id]['channels'])
-                
-                if abs(channel_count - previous_channels) > 10:
-                    await self.create_comprehensive_backup(guild)
-            
+            counts = await asyncio.to_thread(self.retention.run)
+            if counts['snapshots'] or counts['full']:
+                logger.info(f"🧹 Retention expired {counts['snapshots']} snapshots and {counts['full']} full backups, "
+                            f"freeing {counts['objects']} objects, {counts['assets']} assets and "
+                            f"{counts['bytes_freed'] / 1024:.1f} KiB")
+            return counts
         except Exception as e:
-            logger.error(f"Error monitoring suspicious activity: {e}")
+            logger.error(f"Error applying backup retention: {e}")
+            return None
     
-    def get_protection_status(self) -> Dict:
-        """Get current protection system status"""
+    def get_protection_status(self, guild_id: Optional[int] = None) -> Dict:
+        """Get current protection system status for one guild, or across all guilds"""
+        if guild_id is not None:
+            states = [self.get_state(guild_id)]
+        else:
+            states = list(self.guild_states.values())
+        
         return {
             'protection_active': self.protection_active,
-            'raid_detection': self.raid_detection,
-            'channel_protection': self.channel_protection,
+            'raid_detection': any(state.raid_detection for state in states),
+            'channel_protection': any(state.channel_protection for state in states),
             'protected_channels': len(self.protected_channels),
             'server_backups': len(self.server_backups),
-            'suspicious_activities_tracked': len(self.suspicious_activities),
-            'emergency_mode': self.emergency_mode,
-            'encrypted_channels': len(self.encrypted_channels)
+            'suspicious_activities_tracked': len(self.guild_states),
+            'emergency_mode': any(state.emergency_mode for state in states),
+            'encrypted_channels': len(self.encrypted_channels),
+            'state_memory_bytes': sum(state.sizeof() for state in states),
+            'scheduler': self.action_scheduler.get_metrics(),
+            'events': self.events.get_metrics()
         }
     
+    def clear_guild_tracking(self, guild_id: int):
+        """Forget a guild's detector history"""
+        state = self.guild_states.get(guild_id)
+        if state:
+            state.clear_tracking()
+            self.journal.append('clear', guild_id, {})
+    
+    async def deactivate_cybersecurity(self, guild: discord.Guild) -> bool:
+        """Recover from the guild's incident and stand down, returning False if combat was not active"""
+        state = self.guild_states.get(guild.id)
+        if not state or not (state.cybersecurity_active or (state.incident and state.incident.active)):
+            return False
+        
+        # Waits for any containment pass still running in this guild
+        async with state.lock:
+            incident = state.incident
+            if incident is not None and incident.active and incident.phase is not IncidentPhase.RECOVERING:
+                incident.transition(IncidentPhase.RECOVERING)
+                self.journal_flags(state)
+            
+            try:
+                restored = await self.rollback_channel_overwrites(guild)
+                logger.info(f"Rolled back overwrites on {restored} channels in {guild.name}")
+            except Exception as e:
+                logger.error(f"Error rolling back overwrites during recovery: {e}")
+            
+            api_calls = await self.countermeasure_ladder.rollback(guild, state.ladder)
+            logger.info(f"Rolled back countermeasure ladder in {guild.name} ({api_calls} API calls)")
+            state.ladder = LadderState()
+            
+            state.stand_down()
+            if incident is not None and incident.active:
+                incident.transition(IncidentPhase.IDLE)
+                combat_log = {
+                    'timestamp': datetime.now(),
+                    'guild': guild.name,
+                    'guild_id': guild.id,
+                    'incident_id': incident.id,
+                    'action': 'INCIDENT_RESOLVED',
+                    'detections': incident.detections,
+                    'escalations': incident.escalations
+                }
+                self.combat_logs.append(combat_log)
+            self.journal_flags(state)
+        
+        return True
+    
+    def journal_flags(self, state: DefenseState):
+        """Journal a guild's protection flags and incident after a transition"""
+        self.journal.append('state', state.guild_id, state.flags())
+    
+    def key_wrapper(self) -> Optional[Fernet]:
+        """Fernet built from the deployment secret that wraps journaled encryption keys"""
+        secret = self.bot.config.get('journal_key_secret')
+        if not secret:
+            return None
+        try:
+            return Fernet(secret)
+        except Exception as e:
+            logger.error(f"Error loading journal key secret: {e}")
+            return None
+    
+    def encryption_state(self, guild_id: int) -> Dict:
+        """A guild's wrapped encryption key, encrypted channels and message backups.
+        
+        The key is only journaled wrapped with the deployment secret; without
+        one it stays in memory and is lost on restart.
+        """
+        channels = {
+            channel_id: data for channel_id, data in self.encrypted_channels.items()
+            if data['guild_id'] == guild_id
+        }
+        key = self.encryption_keys.get(guild_id)
+        wrapper = self.key_wrapper() if key else None
+        return {
+            'wrapped_key': wrapper.encrypt(key).decode() if wrapper else None,
+            'channels': channels,
+            'backups': {
+                channel_id: self.channel_backup_data[channel_id]
+                for channel_id in channels if channel_id in self.channel_backup_data
+            }
+        }
+    
+    def journal_encryption(self, guild_id: int):
+        """Journal a guild's full channel-encryption state"""
+        self.journal.append('encryption', guild_id, self.encryption_state(guild_id))
+    
+    def export_state(self) -> Dict:
+        """Full defense state in the form stored by journal snapshots"""
+        encrypted_guilds = set(data['guild_id'] for data in self.encrypted_channels.values()) | set(self.encryption_keys)
+        
+        return {
+            'guilds': {guild_id: state.to_dict() for guild_id, state in self.guild_states.items()},
+            'overwrites': {
+                guild_id: {'original': dict(snapshot.original), 'applied': dict(snapshot.applied)}
+                for guild_id, snapshot in self.overwrite_snapshots.items()
+            },
+            'protected_channels': list(self.protected_channels),
+            'encryption': {guild_id: self.encryption_state(guild_id) for guild_id in encrypted_guilds}
+        }
+    
+    def import_state(self, data: Dict):
+        """Load state exported by export_state (keys arrive as strings from JSON)"""
+        self.guild_states = {
+            int(guild_id): DefenseState.from_dict(int(guild_id), state)
+            for guild_id, state in data['guilds'].items()
+        }
+        
+        self.overwrite_snapshots = {}
+        for guild_id, overwrites in data['overwrites'].items():
+            snapshot = self.overwrite_snapshots[int(guild_id)] = OverwriteSnapshot(int(guild_id))
+            snapshot.original = _decode_encoded_channels(overwrites['original'])
+            snapshot.applied = _decode_encoded_channels(overwrites['applied'])
+        
+        self.protected_channels = set(data['protected_channels'])
+        
+        for guild_id, encryption in data['encryption'].items():
+            self.apply_journal_record('encryption', int(guild_id), encryption)
+    
+    def apply_journal_record(self, kind: str, guild_id: Optional[int], data: Dict):
+        """Replay one journaled state change"""
+        if kind == 'join':
+            record = decode_join(data)
+            state = self.get_state(guild_id)
+            state.join_history.append(record)
+            state.suspicious_activities['rapid_joins'].append(record['timestamp_ms'])
+        elif kind == 'message':
+            self.get_state(guild_id).message_patterns.append(decode_message(data))
+        elif kind == 'action':
+            event = GuildActionEvent.from_record(discord.Object(id=guild_id), data, as_datetime(data['timestamp']))
+            self.get_state(guild_id).add_guild_action(event)
+        elif kind == 'state':
+            self.get_state(guild_id).apply_flags(data)
+        elif kind == 'clear':
+            self.get_state(guild_id).clear_tracking()
+        elif kind == 'overwrites':
+            if guild_id not in self.overwrite_snapshots:
+                self.overwrite_snapshots[guild_id] = OverwriteSnapshot(guild_id)
+            snapshot = self.overwrite_snapshots[guild_id]
+            channel_id = int(data['channel_id'])
+            snapshot.original.setdefault(channel_id, _decode_encoded(data['original']))
+            snapshot.applied[channel_id] = _decode_encoded(data['applied'])
+        elif kind == 'overwrites_forget':
+            snapshot = self.overwrite_snapshots.get(guild_id)
+            if snapshot:
+                snapshot.forget(int(data['channel_id']))
+                if not snapshot:
+                    del self.overwrite_snapshots[guild_id]
+        elif kind == 'protected_channels':
+            self.protected_channels = set(data['channel_ids'])
+        elif kind == 'encryption':
+            for channel_id, value in list(self.encrypted_channels.items()):
+                if value['guild_id'] == guild_id:
+                    del self.encrypted_channels[channel_id]
+                    self.channel_backup_data.pop(channel_id, None)
+            for channel_id, value in data['channels'].items():
+                value['encrypted_at'] = as_datetime(value['encrypted_at'])
+                self.encrypted_channels[int(channel_id)] = value
+            key = self.unwrap_key(data)
+            if key:
+                self.encryption_keys[guild_id] = key
+                for channel_id, value in data['backups'].items():
+                    self.channel_backup_data[int(channel_id)] = value
+            else:
+                self.encryption_keys.pop(guild_id, None)
+                if data['backups']:
+                    logger.warning(
+                        f"⚠️ Encryption key of guild {guild_id} was not recovered; "
+                        f"{len(data['backups'])} encrypted channel backups dropped"
+                    )
+    
+    def unwrap_key(self, data: Dict) -> Optional[bytes]:
+        """The encryption key of a journaled encryption record, if it can be recovered"""
+        if data.get('key'):  # Journaled before keys were wrapped
+            return data['key'].encode()
+        wrapper = self.key_wrapper() if data.get('wrapped_key') else None
+        if wrapper is None:
+            return None
+        try:
+            return wrapper.decrypt(data['wrapped_key'].encode())
+        except Exception as e:
+            logger.error(f"Error unwrapping encryption key: {e}")
+            return None
+    
+    def recover_state(self) -> Dict:
+        """Rebuild state from the latest snapshot plus the journal tail (once per process)"""
+        if self.state_recovered:
+            return {}
+        self.state_recovered = True
+        
+        start = time.perf_counter()
+        snapshot, records = self.journal.load()
+        if snapshot:
+            self.import_state(snapshot)
+        
+        replayed = 0
+        for kind, guild_id, data in records:
+            try:
+                self.apply_journal_record(kind, guild_id, data)
+                replayed += 1
+            except Exception as e:
+                logger.error(f"Error replaying journal record {kind} for guild {guild_id}: {e}")
+        
+        elapsed = time.perf_counter() - start
+        stats = {
+            'guilds': len(self.guild_states),
+            'from_snapshot': snapshot is not None,
+            'replayed_records': replayed,
+            'elapsed_seconds': elapsed
+        }
+        logger.info(
+            f"Defense state recovered: {stats['guilds']} guilds, {replayed} journal records "
+            f"replayed in {elapsed * 1000:.0f}ms"
+        )
+        return stats
+    
+    async def resume_incidents(self) -> int:
+        """Finish containment or recovery that a restart interrupted"""
+        resumed = 0
+        for guild_id, state in list(self.guild_states.items()):
+            incident = state.incident
+            guild = self.bot.get_guild(guild_id)
+            if incident is None or not incident.active or not guild:
+                continue
+            
+            if incident.phase is IncidentPhase.CONTAINING:
+                logger.warning(f"Resuming containment for incident {incident.id} in {guild.name}")
+                incident.phase = IncidentPhase.CONTAINED
+                asyncio.create_task(self.rerun_containment(guild, state, incident))
+                resumed += 1
+            elif incident.phase is IncidentPhase.RECOVERING:
+                logger.warning(f"Resuming recovery for incident {incident.id} in {guild.name}")
+                asyncio.create_task(self.deactivate_cybersecurity(guild))
+                resumed += 1
+        return resumed
+    
+    async def checkpoint(self):
+        """Write a snapshot and drop the journal it covers"""
+        try:
+            seq = self.journal.begin_snapshot()
+            state = self.export_state()
+            await asyncio.to_thread(self.journal.write_snapshot, state, seq)
+            logger.info(f"Defense state snapshot written at journal seq {seq}")
+        except Exception as e:
+            logger.error(f"Error writing defense state snapshot: {e}")
+    
     def generate_encryption_key(self) -> bytes:
         """Generate a new encryption key"""
         return Fernet.generate_key()
@@ -1182,14 +1952,19 @@ Only you (the programmer) can see and control this system!
             logger.warning(f"EMERGENCY CHANNEL ENCRYPTION ACTIVATED for {guild.name}")
             
             # Set emergency mode
-            self.emergency_mode = True
+            self.get_state(guild.id).emergency_mode = True
             
             # Generate encryption key for this guild
             encryption_key = self.generate_encryption_key()
             self.encryption_keys[guild.id] = encryption_key
+            if self.key_wrapper() is None:
+                logger.warning(
+                    f"⚠️ JOURNAL_KEY_SECRET is not set: the encryption key of {guild.name} "
+                    f"is not journaled and is lost on restart"
+                )
             
             # Create comprehensive backup before encryption
-            backup_file = await self.create_comprehensive_backup(guild)
+            backup_file = await self.create_comprehensive_backup(guild, kind=KIND_INCIDENT)
             
             # Process all channels
             encrypted_count = 0
@@ -1215,6 +1990,9 @@ Only you (the programmer) can see and control this system!
                     except Exception as e:
                         logger.error(f"Error encrypting channel {channel.name}: {e}")
             
+            self.journal_encryption(guild.id)
+            self.journal_flags(self.get_state(guild.id))
+            
             # Send emergency alert email
             await self.bot.send_alert_email(
                 "🚨 EMERGENCY CHANNEL ENCRYPTION ACTIVATED",
@@ -1275,32 +2053,28 @@ Use !decrypt_channels command to restore access.
     async def hide_channel_completely(self, channel):
         """Hide channel from everyone except bot owner"""
         try:
-            # Hide from @everyone
-            overwrite = channel.overwrites_for(channel.guild.default_role)
-            overwrite.view_channel = False
-            overwrite.send_messages = False
-            overwrite.read_message_history = False
-            await channel.set_permissions(channel.guild.default_role, overwrite=overwrite)
-            
-            # Hide from all other roles
+            overwrites = channel.overwrites
+            
+            # Hide from @everyone and all other roles
             for role in channel.guild.roles:
-                if role.name != "@everyone" and role != channel.guild.default_role:
-                    overwrite = channel.overwrites_for(role)
-                    overwrite.view_channel = False
-                    overwrite.send_messages = False
-                    overwrite.read_message_history = False
-                    await channel.set_permissions(role, overwrite=overwrite)
+                overwrite = overwrites.get(role, discord.PermissionOverwrite())
+                overwrite.view_channel = False
+                overwrite.send_messages = False
+                overwrite.read_message_history = False
+                overwrites[role] = overwrite
             
             # Keep access only for bot owner (if possible)
             bot_owner = self.bot.get_user(self.bot.config.get('dev_user_id', 0))
             if bot_owner:
                 member = channel.guild.get_member(bot_owner.id)
                 if member:
-                    overwrite = channel.overwrites_for(member)
+                    overwrite = overwrites.get(member, discord.PermissionOverwrite())
                     overwrite.view_channel = True
                     overwrite.send_messages = True
                     overwrite.read_message_history = True
-                    await channel.set_permissions(member, overwrite=overwrite)
+                    overwrites[member] = overwrite
+            
+            await self.wait_scheduled([self.lock_channel_overwrites(channel, overwrites)], f"hiding channel {channel.name}")
             
             logger.info(f"Channel {channel.name} completely hidden")
             
@@ -1310,10 +2084,13 @@ Use !decrypt_channels command to restore access.
     async def decrypt_and_restore_channels(self, guild: discord.Guild):
         """Decrypt and restore all channels"""
         try:
-            if guild.id not in self.encryption_keys:
+            # A key lost on restart still lets channels be made visible again
+            encryption_key = self.encryption_keys.get(guild.id)
+            if encryption_key is None and not any(
+                data['guild_id'] == guild.id for data in self.encrypted_channels.values()
+            ):
                 return False, "No encryption key found for this guild"
-            
-            encryption_key = self.encryption_keys[guild.id]
+
             restored_count = 0
             
             for channel_id, encrypted_data in self.encrypted_channels.items():
@@ -1325,7 +2102,7 @@ Use !decrypt_channels command to restore access.
                             await self.restore_channel_visibility(channel)
                             
                             # Restore channel data if available
-                            if channel_id in self.channel_backup_data:
+                            if encryption_key is not None and channel_id in self.channel_backup_data:
                                 await self.restore_channel_data(channel, encryption_key)
                             
                             restored_count += 1
@@ -1338,7 +2115,9 @@ Use !decrypt_channels command to restore access.
             if guild.id in self.encryption_keys:
                 del self.encryption_keys[guild.id]
             
-            self.emergency_mode = False
+            self.get_state(guild.id).emergency_mode = False
+            self.journal_encryption(guild.id)
+            self.journal_flags(self.get_state(guild.id))
             
             # Send restoration email
             await self.bot.send_alert_email(
@@ -1365,21 +2144,8 @@ ALL CHANNELS HAVE BEEN RESTORED AND DECRYPTED!
     async def restore_channel_visibility(self, channel):
         """Restore channel visibility to normal"""
         try:
-            # Restore @everyone permissions
-            overwrite = channel.overwrites_for(channel.guild.default_role)
-            overwrite.view_channel = None
-            overwrite.send_messages = None
-            overwrite.read_message_history = None
-            await channel.set_permissions(channel.guild.default_role, overwrite=overwrite)
-            
-            # Clear other role overrides
-            for role in channel.guild.roles:
-                if role.name != "@everyone" and role != channel.guild.default_role:
-                    overwrite = channel.overwrites_for(role)
-                    overwrite.view_channel = None
-                    overwrite.send_messages = None
-                    overwrite.read_message_history = None
-                    await channel.set_permissions(role, overwrite=overwrite)
+            # Put back the exact pre-lockdown overwrites (no-op if nothing changed)
+            await self.rollback_channel_overwrites(channel.guild, {channel.id})
             
             logger.info(f"Channel {channel.name} visibility restored")
             
@@ -1411,7 +2177,7 @@ ALL CHANNELS HAVE BEEN RESTORED AND DECRYPTED!
         encrypted_channels = [data for data in self.encrypted_channels.values() if data['guild_id'] == guild_id]
         
         return {
-            'emergency_mode': self.emergency_mode,
+            'emergency_mode': self.get_state(guild_id).emergency_mode,
             'encrypted_channels': len(encrypted_channels),
             'has_encryption_key': guild_id in self.encryption_keys,
             'channels': [
@@ -1422,3 +2188,12 @@ ALL CHANNELS HAVE BEEN RESTORED AND DECRYPTED!
                 for data in encrypted_channels
             ]
         }
+
+
+def _decode_encoded(encoded: Dict):
+    """Journaled overwrites have string keys and list values"""
+    return {int(target_id): tuple(value) for target_id, value in encoded.items()}
+
+
+def _decode_encoded_channels(channels: Dict):
+    return {int(channel_id): _decode_encoded(encoded) for channel_id, encoded in channels.items()}
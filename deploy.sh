@@ -41,6 +41,7 @@ fi
 echo "📁 Creating necessary directories..."
 mkdir -p backups
 mkdir -p logs
+mkdir -p data
 
 # Set permissions
 echo "🔐 Setting permissions..."
@@ -0,0 +1,117 @@
+"""
+Durable Timers
+One-shot timers persisted to disk so scheduled restorations survive restarts
+"""
+
+import asyncio
+import json
+import os
+import time
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DurableTimers:
+    """Persisted one-shot timers keyed by ID.
+
+    Each timer stores its kind, due time (epoch seconds) and a JSON payload.
+    Handlers are registered per kind; after a restart ``resume`` re-arms every
+    stored timer and fires overdue ones immediately.
+    """
+
+    def __init__(self, path: str = 'data/timers.json'):
+        self.path = path
+        self._timers: Dict[str, Dict] = self._load()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._handlers: Dict[str, Callable[[Dict], Awaitable]] = {}
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.error(f"Error loading durable timers from {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._timers, f)
+        os.replace(tmp_path, self.path)
+
+    def register(self, kind: str, handler: Callable[[Dict], Awaitable]):
+        """Register the coroutine that handles timers of a kind"""
+        self._handlers[kind] = handler
+
+    def get(self, timer_id: str) -> Optional[Dict]:
+        timer = self._timers.get(timer_id)
+        return timer['payload'] if timer else None
+
+    def schedule(self, timer_id: str, kind: str, delay_seconds: float, payload: Dict) -> str:
+        """Persist a timer and arm it, replacing any timer with the same ID"""
+        self.cancel(timer_id, persist=False)
+        self._timers[timer_id] = {
+            'kind': kind,
+            'due_at': time.time() + delay_seconds,
+            'payload': payload
+        }
+        self._save()
+        self._arm(timer_id)
+        return timer_id
+
+    def cancel(self, timer_id: str, persist: bool = True) -> bool:
+        """Cancel a timer without firing it"""
+        task = self._tasks.pop(timer_id, None)
+        if task and task is not asyncio.current_task():
+            task.cancel()
+        if self._timers.pop(timer_id, None) is None:
+            return False
+        if persist:
+            self._save()
+        return True
+
+    def resume(self) -> int:
+        """Arm every persisted timer that is not already running"""
+        armed = 0
+        for timer_id in list(self._timers):
+            if timer_id not in self._tasks:
+                self._arm(timer_id)
+                armed += 1
+        return armed
+
+    def pending(self) -> int:
+        return len(self._timers)
+
+    def _arm(self, timer_id: str):
+        self._tasks[timer_id] = asyncio.create_task(self._run(timer_id))
+
+    async def _run(self, timer_id: str):
+        timer = self._timers.get(timer_id)
+        if not timer:
+            return
+
+        delay = timer['due_at'] - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        # Remove before firing so a crash inside the handler is not retried forever
+        self._tasks.pop(timer_id, None)
+        self._timers.pop(timer_id, None)
+        self._save()
+
+        handler = self._handlers.get(timer['kind'])
+        if not handler:
+            logger.error(f"No handler registered for durable timer kind {timer['kind']}")
+            return
+
+        try:
+            await handler(timer['payload'])
+        except Exception as e:
+            logger.error(f"Error running durable timer {timer_id}: {e}")
@@ -0,0 +1,184 @@
+"""
+Gateway Event Pipeline
+Typed event records fanned out to subscribers through bounded queues
+"""
+
+import asyncio
+import time
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from timing import now_ms, to_ms
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 10_000
+
+
+class GatewayEvent:
+    """Base record for an event received from the gateway"""
+    __slots__ = ('guild', 'timestamp', 'timestamp_ms', 'received')
+
+    def __init__(self, guild):
+        self.guild = guild
+        self.timestamp_ms = now_ms()
+        self.timestamp = datetime.fromtimestamp(self.timestamp_ms / 1000)
+        self.received = time.monotonic()
+
+
+class MemberJoinEvent(GatewayEvent):
+    __slots__ = ('member',)
+
+    def __init__(self, member):
+        super().__init__(member.guild)
+        self.member = member
+
+
+class MessageEvent(GatewayEvent):
+    __slots__ = ('message',)
+
+    def __init__(self, message):
+        super().__init__(message.guild)
+        self.message = message
+
+
+class GuildActionEvent(GatewayEvent):
+    """A destructive change to the guild such as a deleted channel or role"""
+    __slots__ = ('action_type', 'target_id', 'target_name', 'actor_id')
+
+    def __init__(self, guild, action_type: str, target_id: int, target_name: str):
+        super().__init__(guild)
+        self.action_type = action_type
+        self.target_id = target_id
+        self.target_name = target_name
+        self.actor_id: Optional[int] = None  # Filled in from the audit log when known
+
+    def to_record(self) -> Dict:
+        """Plain form for journals and snapshots"""
+        return {
+            'action_type': self.action_type,
+            'target_id': self.target_id,
+            'target_name': self.target_name,
+            'actor_id': self.actor_id,
+            'timestamp': self.timestamp
+        }
+
+    @classmethod
+    def from_record(cls, guild, record: Dict, timestamp: datetime) -> 'GuildActionEvent':
+        event = cls(guild, record['action_type'], record['target_id'], record['target_name'])
+        event.actor_id = record.get('actor_id')
+        event.timestamp = timestamp
+        event.timestamp_ms = to_ms(timestamp)
+        return event
+
+
+EventHandler = Callable[[GatewayEvent], Awaitable[None]]
+
+
+class _Subscription:
+    __slots__ = ('name', 'handler', 'event_types', 'queue', 'maxsize', 'lossy', 'worker',
+                 'processed', 'dropped', 'errors', 'max_lag')
+
+    def __init__(self, name: str, handler: EventHandler, event_types: Tuple[Type[GatewayEvent], ...],
+                 maxsize: int, lossy: bool):
+        self.name = name
+        self.handler = handler
+        self.event_types = event_types
+        self.queue: Optional[asyncio.Queue] = None
+        self.maxsize = maxsize
+        self.lossy = lossy
+        self.worker = None
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_lag = 0.0
+
+    def ensure_worker(self):
+        if self.queue is None:
+            self.queue = asyncio.Queue(maxsize=self.maxsize)
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._consume())
+
+    async def _consume(self):
+        while True:
+            event = await self.queue.get()
+            try:
+                await self.handler(event)
+                self.processed += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Error in event subscriber {self.name}: {e}")
+            finally:
+                self.max_lag = max(self.max_lag, time.monotonic() - event.received)
+                self.queue.task_done()
+
+
+class EventPipeline:
+    """Single ingestion layer between gateway handlers and everything that reacts to them.
+
+    Each subscriber has its own bounded queue and worker, so a slow subscriber
+    (such as toxicity analysis) never delays the raid detectors. When a lossless
+    subscriber's queue is full, ``publish`` waits for room; lossy subscribers
+    drop the event and count it instead.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self._subscriptions: List[_Subscription] = []
+        self._routes: Dict[Type[GatewayEvent], List[_Subscription]] = {}
+        self._published: Dict[str, int] = {}
+
+    def subscribe(self, name: str, handler: EventHandler, *event_types: Type[GatewayEvent],
+                  lossy: bool = False, maxsize: Optional[int] = None):
+        """Register a handler for one or more event types"""
+        subscription = _Subscription(name, handler, event_types or (GatewayEvent,),
+                                     maxsize or self.maxsize, lossy)
+        self._subscriptions.append(subscription)
+        self._routes.clear()
+
+    def _route(self, event_type: Type[GatewayEvent]) -> List[_Subscription]:
+        route = self._routes.get(event_type)
+        if route is None:
+            route = self._routes[event_type] = [
+                subscription for subscription in self._subscriptions
+                if issubclass(event_type, subscription.event_types)
+            ]
+        return route
+
+    async def publish(self, event: GatewayEvent):
+        """Hand an event to its subscribers, waiting only when a lossless queue is full"""
+        kind = type(event).__name__
+        self._published[kind] = self._published.get(kind, 0) + 1
+
+        for subscription in self._route(type(event)):
+            subscription.ensure_worker()
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                if subscription.lossy:
+                    subscription.dropped += 1
+                else:
+                    await subscription.queue.put(event)
+
+    async def drain(self):
+        """Wait until every queued event has been handled"""
+        for subscription in self._subscriptions:
+            if subscription.queue is not None:
+                await subscription.queue.join()
+
+    def get_metrics(self) -> Dict:
+        """Get published counts per event type and queue health per subscriber"""
+        return {
+            'published': dict(self._published),
+            'subscribers': {
+                subscription.name: {
+                    'queued': subscription.queue.qsize() if subscription.queue else 0,
+                    'processed': subscription.processed,
+                    'dropped': subscription.dropped,
+                    'errors': subscription.errors,
+                    'max_lag': subscription.max_lag
+                }
+                for subscription in self._subscriptions
+            }
+        }
@@ -0,0 +1,112 @@
+"""
+Raid Incidents
+Per-guild incident state machine so one raid gets one response
+"""
+
+import time
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Optional
+
+
+class IncidentPhase(Enum):
+    """Lifecycle of a raid incident"""
+    IDLE = 'idle'
+    CONTAINING = 'containing'
+    CONTAINED = 'contained'
+    RECOVERING = 'recovering'
+
+
+# Allowed transitions; anything else is a bug in the caller
+_TRANSITIONS = {
+    IncidentPhase.IDLE: {IncidentPhase.CONTAINING},
+    IncidentPhase.CONTAINING: {IncidentPhase.CONTAINED, IncidentPhase.RECOVERING},
+    IncidentPhase.CONTAINED: {IncidentPhase.CONTAINING, IncidentPhase.RECOVERING},
+    IncidentPhase.RECOVERING: {IncidentPhase.IDLE},
+}
+
+
+def threat_level_for(reason: str) -> int:
+    """Map a detector reason to a threat level out of 10"""
+    reason = reason.lower()
+    if "bot raid" in reason:
+        return 9  # Critical
+    if "human raid" in reason or "destruction" in reason or "deletion" in reason:
+        return 8  # High
+    if "spam" in reason:
+        return 6  # Medium
+    return 7  # High
+
+
+class Incident:
+    """One raid incident in one guild, from first detection until recovery"""
+
+    __slots__ = ('id', 'guild_id', 'phase', 'reason', 'threat_level', 'started_at',
+                 'updated', 'detections', 'escalations')
+
+    def __init__(self, guild_id: int, reason: str, threat_level: int):
+        self.id = f"INC-{uuid.uuid4().hex[:10]}"
+        self.guild_id = guild_id
+        self.phase = IncidentPhase.IDLE
+        self.reason = reason
+        self.threat_level = threat_level
+        self.started_at = datetime.now()
+        self.updated = time.monotonic()
+        self.detections = 1
+        self.escalations = 0
+
+    @property
+    def active(self) -> bool:
+        return self.phase is not IncidentPhase.IDLE
+
+    def transition(self, phase: IncidentPhase):
+        if phase not in _TRANSITIONS[self.phase]:
+            raise ValueError(f"Incident {self.id}: invalid transition {self.phase.value} -> {phase.value}")
+        self.phase = phase
+        self.updated = time.monotonic()
+
+    def observe(self, reason: str, threat_level: int) -> bool:
+        """Record a repeated detection, returning True only if it escalates the incident"""
+        self.detections += 1
+        if threat_level <= self.threat_level:
+            return False
+
+        self.threat_level = threat_level
+        self.reason = reason
+        self.escalations += 1
+        return True
+
+    def to_dict(self) -> Dict:
+        return {
+            'incident_id': self.id,
+            'phase': self.phase.value,
+            'reason': self.reason,
+            'threat_level': self.threat_level,
+            'started_at': self.started_at,
+            'detections': self.detections,
+            'escalations': self.escalations
+        }
+
+    @classmethod
+    def from_dict(cls, guild_id: int, data: Dict) -> 'Incident':
+        """Rebuild an incident from its journaled form"""
+        incident = cls.__new__(cls)
+        incident.id = data['incident_id']
+        incident.guild_id = guild_id
+        incident.phase = IncidentPhase(data['phase'])
+        incident.reason = data['reason']
+        incident.threat_level = data['threat_level']
+        started_at = data['started_at']
+        incident.started_at = started_at if isinstance(started_at, datetime) else datetime.fromisoformat(started_at)
+        incident.updated = time.monotonic()
+        incident.detections = data['detections']
+        incident.escalations = data['escalations']
+        return incident
+
+
+def describe(incident: Optional[Incident]) -> Dict:
+    """Status dict for a guild's current incident, idle when there is none"""
+    if incident is None or not incident.active:
+        return {'incident_id': None, 'phase': IncidentPhase.IDLE.value}
+    return incident.to_dict()
@@ -0,0 +1,43 @@
+"""
+Log Tail
+Last lines of a file read backwards in blocks, so cost depends on the lines wanted, not the file size
+"""
+
+import os
+from typing import List
+
+# Bytes read per backwards seek
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+def tail_lines(path: str, count: int, block_size: int = TAIL_BLOCK_SIZE) -> List[str]:
+    """Last ``count`` lines of a text file, with line endings kept as ``readlines`` keeps them.
+
+    Blocks are read from the end of the file until they hold ``count`` full
+    lines, so a multi-GB log costs a few reads and ``count`` lines of memory.
+    Invalid UTF-8 is replaced rather than raised, since logs may be cut mid-write.
+    """
+    if count <= 0:
+        return []
+
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        blocks = []
+        newlines = 0
+        # One newline more than lines wanted marks where the first wanted line starts
+        while position > 0 and newlines <= count:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            block = f.read(size)
+            blocks.append(block)
+            newlines += block.count(b'\n')
+
+    # Split on '\n' only, as reading in text mode does; splitlines would also split on form feeds and the like
+    parts = b''.join(reversed(blocks)).decode('utf-8', errors='replace').split('\n')
+    lines = [part + '\n' for part in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    if position > 0:
+        lines = lines[1:]  # Starts mid-line
+    return lines[-count:]
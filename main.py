@@ -7,7 +7,7 @@ import smtplib
 import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from datetime import datetime, timedelta
+from datetime import datetime
 import google.generativeai as genai
 import hashlib
 import time
@@ -18,6 +18,8 @@ from dotenv import load_dotenv
 
 # Import custom modules
 from defense_system import DefenseSystem
+from event_pipeline import MemberJoinEvent, MessageEvent, GuildActionEvent
+from timing import DAY_MS, MINUTE_MS, account_age_ms, monotonic_ms, now_ms, records_since
 from toxicity_analyzer import ToxicityAnalyzer
 from advanced_music_system import AdvancedMusicSystem
 
@@ -48,6 +50,7 @@ class HiddenDefenseBot(commands.Bot):
         
         # Initialize subsystems
         self.defense_system = DefenseSystem(self)
+        self.action_scheduler = self.defense_system.action_scheduler  # Shared by all subsystems
         self.music_system = AdvancedMusicSystem(self)
         self.toxicity_analyzer = None  # Will be initialized after Gemini
         
@@ -55,11 +58,20 @@ class HiddenDefenseBot(commands.Bot):
         self.gemini_model = None
         self.init_gemini()
         
+        # Toxicity analysis may fall behind under load, so it drops instead of blocking
+        if self.toxicity_analyzer:
+            self.defense_system.events.subscribe(
+                'toxicity', self.toxicity_analyzer.handle_event, MessageEvent, lossy=True, maxsize=1000
+            )
+        
         # Self-protection
         self.protection_key = self.generate_protection_key()
         self.command_history = []
         self.suspicious_commands = set()
         
+        # Background monitoring task, created by the first on_ready
+        self.bg_task = None
+        
     def load_config(self):
         """Load configuration from environment variables"""
         return {
@@ -73,7 +85,9 @@ class HiddenDefenseBot(commands.Bot):
             'email_username': os.getenv('EMAIL_USERNAME'),
             'email_password': os.getenv('EMAIL_PASSWORD'),
             'admin_email': os.getenv('ADMIN_EMAIL'),
-            'dev_user_id': int(os.getenv('DEV_USER_ID', 0))
+            'dev_user_id': int(os.getenv('DEV_USER_ID', 0)),
+            'backup_compression': os.getenv('BACKUP_COMPRESSION', 'json'),
+            'journal_key_secret': os.getenv('JOURNAL_KEY_SECRET')  # Fernet key wrapping journaled encryption keys
         }
     
     def init_gemini(self):
@@ -95,16 +109,37 @@ class HiddenDefenseBot(commands.Bot):
         logger.info(f'{self.user} has connected to Discord!')
         logger.info(f'Bot is in {len(self.guilds)} guilds')
         
-        # Create initial backups for all servers
+        # Index protected members once per guild; events keep it current afterwards
         for guild in self.guilds:
-            await self.defense_system.create_comprehensive_backup(guild)
+            self.defense_system.protected_index.rebuild(guild)
+        
+        # Rebuild raid state from the defense journal and finish interrupted incidents
+        recovery = self.defense_system.recover_state()
+        if recovery:
+            await self.defense_system.resume_incidents()
+            if recovery['replayed_records']:
+                await self.defense_system.checkpoint()
+        
+        # Re-arm restorations that were pending when the bot last stopped
+        resumed = self.defense_system.durable_timers.resume()
+        if resumed:
+            logger.info(f"Resumed {resumed} pending defense timers")
         
-        # Start background tasks
-        self.bg_task = self.loop.create_task(self.background_monitoring())
+        # Start monitoring right away; on_ready fires again after reconnects
+        if self.bg_task is None or self.bg_task.done():
+            self.bg_task = self.loop.create_task(self.background_monitoring())
+        
+        # Initial backups run in the background, once per process, skipping fresh snapshots
+        self.defense_system.schedule_startup_backups(self.guilds)
         
         # Initialize self-protection
         await self.init_self_protection()
     
+    async def close(self):
+        """Close the asset download session before disconnecting"""
+        await self.defense_system.asset_archiver.close()
+        await super().close()
+    
     async def init_self_protection(self):
         """Initialize bot self-protection mechanisms"""
         try:
@@ -127,14 +162,22 @@ class HiddenDefenseBot(commands.Bot):
         """Background task for monitoring server health and potential threats"""
         while True:
             try:
-                # Monitor all servers for threats
-                for guild in self.guilds:
-                    await self.defense_system.monitor_suspicious_activity(guild)
-                    await self.defense_system.detect_raid_attempt(guild)
+                # Monitor all servers for threats, each guild in its own task
+                self.defense_system.schedule_raid_checks(self.guilds)
+                
+                # Snapshot guilds whose structure changed since their last backup
+                await self.defense_system.snapshot_changed_guilds()
+                
+                # Thin out old backups by age tier
+                await self.defense_system.apply_retention()
                 
                 # Check self-protection
                 await self.check_self_protection()
                 
+                # Compact the defense journal once enough changes have accumulated
+                if self.defense_system.journal.snapshot_due:
+                    await self.defense_system.checkpoint()
+                
                 await asyncio.sleep(30)  # Check every 30 seconds
             except Exception as e:
                 logger.error(f"Error in background monitoring: {e}")
@@ -161,67 +204,6 @@ class HiddenDefenseBot(commands.Bot):
         except Exception as e:
             logger.error(f"Error in self-protection check: {e}")
     
-    async def monitor_servers(self):
-        """Monitor all servers for suspicious activity"""
-        for guild in self.guilds:
-            try:
-                # Check for rapid member changes (potential raid)
-                member_count = guild.member_count
-                if guild.id not in self.server_backups:
-                    self.server_backups[guild.id] = {
-                        'member_count': member_count,
-                        'channels': [],
-                        'roles': [],
-                        'created_at': datetime.now()
-                    }
-                
-                # Create backup if significant changes detected
-                if abs(member_count - self.server_backups[guild.id]['member_count']) > 10:
-                    await self.create_server_backup(guild)
-                    
-            except Exception as e:
-                logger.error(f"Error monitoring guild {guild.id}: {e}")
-    
-    async def create_server_backup(self, guild):
-        """Create a backup of server structure"""
-        try:
-            backup = {
-                'channels': [],
-                'roles': [],
-                'member_count': guild.member_count,
-                'created_at': datetime.now(),
-                'guild_name': guild.name
-            }
-            
-            # Backup channels
-            for channel in guild.channels:
-                backup['channels'].append({
-                    'name': channel.name,
-                    'type': str(channel.type),
-                    'position': channel.position,
-                    'id': channel.id
-                })
-            
-            # Backup roles
-            for role in guild.roles:
-                backup['roles'].append({
-                    'name': role.name,
-                    'color': role.color.value,
-                    'permissions': role.permissions.value,
-                    'id': role.id
-                })
-            
-            self.server_backups[guild.id] = backup
-            
-            # Save to file
-            with open(f'backups/{guild.id}_backup.json', 'w') as f:
-                json.dump(backup, f, indent=2)
-                
-            logger.info(f"Backup created for guild {guild.name}")
-            
-        except Exception as e:
-            logger.error(f"Error creating backup for guild {guild.id}: {e}")
-    
     async def check_toxicity_levels(self):
         """Check and update toxicity levels for users"""
         # This would be implemented with message analysis using Gemini AI
@@ -518,7 +500,7 @@ async def help_command(ctx):
 async def defense_status(ctx):
     """Check defense system status (Hidden command)"""
     try:
-        status = bot.defense_system.get_protection_status()
+        status = bot.defense_system.get_protection_status(ctx.guild.id)
         toxicity_stats = bot.toxicity_analyzer.get_system_stats() if bot.toxicity_analyzer else {}
         
         embed = discord.Embed(
@@ -532,6 +514,25 @@ async def defense_status(ctx):
         embed.add_field(name="Protected Channels", value=str(status['protected_channels']), inline=True)
         embed.add_field(name="Server Backups", value=str(status['server_backups']), inline=True)
         embed.add_field(name="Suspicious Activities", value=str(status['suspicious_activities_tracked']), inline=True)
+        embed.add_field(name="Guild State", value=f"{status['state_memory_bytes'] / 1024:.1f} KiB", inline=True)
+        
+        scheduler = status['scheduler']
+        containment = scheduler['priorities']['containment']
+        embed.add_field(
+            name="REST Queue",
+            value=f"Depth: {scheduler['queue_depth']}\nContainment avg: {containment['avg_time_to_apply']:.2f}s",
+            inline=True
+        )
+        
+        events = status['events']
+        embed.add_field(
+            name="Event Queue",
+            value="\n".join(
+                f"{name}: {sub['queued']} queued, {sub['dropped']} dropped, lag {sub['max_lag']:.2f}s"
+                for name, sub in events['subscribers'].items()
+            ) or "No subscribers",
+            inline=False
+        )
         
         if toxicity_stats:
             embed.add_field(name="Users Tracked", value=str(toxicity_stats.get('total_users_tracked', 0)), inline=True)
@@ -568,16 +569,47 @@ async def unprotect_channels(ctx):
 async def restore_server(ctx, backup_file: str = None):
     """Restore server from backup (Hidden command)"""
     try:
-        success = await bot.defense_system.restore_from_backup(ctx.guild, backup_file)
+        report = await bot.defense_system.restore_from_backup(ctx.guild, backup_file)
         
-        if success:
-            await ctx.send("🔄 Server restoration completed from backup.", delete_after=5)
+        if report:
+            await ctx.send(
+                f"🔄 Server restoration completed from backup: {report['api_calls']} changes in "
+                f"{report['elapsed_seconds']:.1f}s ({report['failed']} failed).",
+                delete_after=5
+            )
         else:
             await ctx.send("❌ No backup found or restoration failed!", delete_after=5)
             
     except Exception as e:
         await ctx.send(f"❌ Error restoring server: {e}", delete_after=5)
 
+@bot.command(name='restore_plan', hidden=True)
+@commands.is_owner()
+async def restore_plan(ctx, backup_file: str = None):
+    """Show what a restore would change without touching the server (Hidden command)"""
+    try:
+        estimate = await bot.defense_system.restore_from_backup(ctx.guild, backup_file, dry_run=True)
+        if estimate is None:
+            return await ctx.send("❌ No backup found!", delete_after=5)
+        
+        embed = discord.Embed(
+            title="🗺️ Restore Plan",
+            description=f"{estimate['api_calls']} API calls, at least {estimate['estimated_seconds']:.0f}s",
+            color=0x0099ff
+        )
+        
+        lines = [f"**{phase}**: {count}" for phase, count in estimate['phases'].items()]
+        embed.add_field(
+            name="📋 Operations",
+            value="\n".join(lines) if lines else "Server already matches the backup",
+            inline=False
+        )
+        
+        await ctx.send(embed=embed, delete_after=30)
+        
+    except Exception as e:
+        await ctx.send(f"❌ Error planning restore: {e}", delete_after=5)
+
 @bot.command(name='analyze_toxicity', hidden=True)
 @commands.is_owner()
 async def analyze_toxicity(ctx, member: discord.Member):
@@ -636,8 +668,9 @@ async def raid_analysis(ctx):
         guild = ctx.guild
         
         # Get recent join data
-        recent_joins = bot.defense_system.member_join_history.get(guild.id, [])
-        recent_messages = bot.defense_system.message_patterns.get(guild.id, [])
+        state = bot.defense_system.get_state(guild.id)
+        recent_joins = state.join_history
+        recent_messages = state.message_patterns
         
         embed = discord.Embed(
             title="🔍 Raid Analysis Report",
@@ -646,13 +679,13 @@ async def raid_analysis(ctx):
         )
         
         # Recent joins analysis
-        current_time = datetime.now()
-        joins_last_10min = [join for join in recent_joins 
-                           if current_time - join['timestamp'] < timedelta(minutes=10)]
+        current_time = now_ms()
+        joins_last_10min = records_since(recent_joins, current_time - 10 * MINUTE_MS)
+        messages_last_5min = records_since(recent_messages, current_time - 5 * MINUTE_MS)
         
         embed.add_field(
             name="📊 Recent Activity",
-            value=f"Joins (10min): {len(joins_last_10min)}\nMessages (5min): {len([m for m in recent_messages if current_time - m['timestamp'] < timedelta(minutes=5)])}",
+            value=f"Joins (10min): {len(joins_last_10min)}\nMessages (5min): {len(messages_last_5min)}",
             inline=True
         )
         
@@ -660,10 +693,8 @@ async def raid_analysis(ctx):
         suspicious_count = 0
         for join in joins_last_10min:
             member = guild.get_member(join['user_id'])
-            if member:
-                account_age = datetime.now() - member.created_at
-                if account_age < timedelta(days=7):
-                    suspicious_count += 1
+            if member and account_age_ms(member.id, current_time) < 7 * DAY_MS:
+                suspicious_count += 1
         
         embed.add_field(
             name="⚠️ Suspicious Members",
@@ -691,41 +722,85 @@ async def raid_analysis(ctx):
     except Exception as e:
         await ctx.send(f"Error analyzing raid situation: {e}", delete_after=5)
 
+@bot.command(name='member_audit', hidden=True)
+@commands.is_owner()
+async def member_audit(ctx, limit: int = 10):
+    """Score every member of the server and list the riskiest (Hidden command)"""
+    try:
+        guild = ctx.guild
+        report = await bot.defense_system.audit_guild_members(guild, limit=min(limit, 25))
+
+        embed = discord.Embed(
+            title="🔎 Member Risk Audit",
+            description=f"{report['members']} members scored in {report['elapsed_seconds'] * 1000:.0f}ms",
+            color=0xff6600
+        )
+
+        embed.add_field(
+            name="⚠️ Risk Summary",
+            value=f"High risk: {report['high_risk']}\nMedium risk: {report['medium_risk']}",
+            inline=False
+        )
+
+        lines = []
+        for entry in report['ranked']:
+            member = guild.get_member(entry['user_id'])
+            name = member.display_name if member else entry['user_id']
+            lines.append(
+                f"**{name}** score {entry['score']:.1f} | age {entry['account_age_days']:.0f}d | "
+                f"roles {entry['role_count']} | name cluster {entry['name_cluster_size']}"
+            )
+
+        embed.add_field(
+            name="🎯 Top Suspects",
+            value="\n".join(lines)[:1024] if lines else "No suspicious members",
+            inline=False
+        )
+
+        await ctx.send(embed=embed, delete_after=30)
+
+    except Exception as e:
+        await ctx.send(f"Error auditing members: {e}", delete_after=5)
+
 @bot.command(name='emergency_lockdown', hidden=True)
 @commands.is_owner()
 async def emergency_lockdown(ctx):
     """Emergency lockdown - ban all recent suspicious members (Hidden command)"""
     try:
         guild = ctx.guild
-        current_time = datetime.now()
+        current_time = now_ms()
         
         # Get recent joins
-        recent_joins = bot.defense_system.member_join_history.get(guild.id, [])
-        recent_members = [join for join in recent_joins 
-                         if current_time - join['timestamp'] < timedelta(minutes=30)]
+        recent_joins = bot.defense_system.get_state(guild.id).join_history
+        recent_members = records_since(recent_joins, current_time - 30 * MINUTE_MS)
         
-        banned_count = 0
+        candidate_ids = []
         for join_data in recent_members:
-            try:
-                member = guild.get_member(join_data['user_id'])
-                if member and not member.guild_permissions.administrator:
-                    # Check if account is suspicious
-                    account_age = datetime.now() - member.created_at
-                    if account_age < timedelta(days=7):
-                        await member.ban(reason="Emergency lockdown - suspicious account")
-                        banned_count += 1
-            except Exception as e:
-                logger.error(f"Error banning member {join_data.get('user_id')}: {e}")
-        
-        # Activate protection
+            member = guild.get_member(join_data['user_id'])
+            if member and not member.guild_permissions.administrator:
+                # Check if account is suspicious
+                if account_age_ms(member.id, current_time) < 7 * DAY_MS:
+                    candidate_ids.append(member.id)
+        
+        # Ban through the bulk pipeline, then activate protection
+        report = await bot.defense_system.ban_pipeline.ban(
+            guild, candidate_ids, reason="Emergency lockdown - suspicious account"
+        )
+        banned_count = report['banned']
+        bot.defense_system.blocklist.add_many(report['banned_ids'])
         await bot.defense_system.activate_emergency_protection(guild)
         
-        await ctx.send(f"🚨 Emergency lockdown activated! Banned {banned_count} suspicious members.", delete_after=5)
+        await ctx.send(
+            f"🚨 Emergency lockdown activated! Banned {banned_count} suspicious members "
+            f"in {report['elapsed_seconds']:.1f}s ({report['bans_per_second']:.1f} bans/sec).",
+            delete_after=5
+        )
         
         # Send alert email
         await bot.send_alert_email(
             "🚨 EMERGENCY LOCKDOWN ACTIVATED",
-            f"Emergency lockdown activated in {guild.name}\nBanned {banned_count} suspicious members\nTime: {current_time}"
+            f"Emergency lockdown activated in {guild.name}\nBanned {banned_count} suspicious members\n"
+            f"Ban rate: {report['bans_per_second']:.1f} bans/sec ({report['elapsed_seconds']:.1f}s total)\nTime: {current_time}"
         )
         
     except Exception as e:
@@ -736,30 +811,12 @@ async def emergency_lockdown(ctx):
 async def clear_suspicious_data(ctx):
     """Clear all suspicious activity tracking data (Hidden command)"""
     try:
-        guild_id = ctx.guild.id
-        
         # Clear tracking data
-        if guild_id in bot.defense_system.member_join_history:
-            bot.defense_system.member_join_history[guild_id] = []
-        
-        if guild_id in bot.defense_system.message_patterns:
-            bot.defense_system.message_patterns[guild_id] = []
-        
-        if guild_id in bot.defense_system.coordinated_actions:
-            bot.defense_system.coordinated_actions[guild_id] = []
-        
-        if guild_id in bot.defense_system.suspicious_activities:
-            bot.defense_system.suspicious_activities[guild_id] = {
-                'rapid_joins': [],
-                'rapid_leaves': [],
-                'channel_deletions': [],
-                'role_deletions': [],
-                'permission_changes': []
-            }
+        bot.defense_system.clear_guild_tracking(ctx.guild.id)
         
         await ctx.send("✅ Suspicious activity data cleared.", delete_after=5)
         
-        except Exception as e:
+    except Exception as e:
         await ctx.send(f"Error clearing data: {e}", delete_after=5)
 
 @bot.command(name='encrypt_channels', hidden=True)
@@ -793,7 +850,7 @@ async def encrypt_channels(ctx):
         bot.pending_encryption = {
             'guild_id': ctx.guild.id,
             'user_id': ctx.author.id,
-            'timestamp': datetime.now()
+            'requested': monotonic_ms()  # Confirmation window is immune to clock changes
         }
         
     except Exception as e:
@@ -809,7 +866,7 @@ async def confirm_encrypt(ctx):
             return
         
         # Check if request is not too old (5 minutes)
-        if datetime.now() - bot.pending_encryption['timestamp'] > timedelta(minutes=5):
+        if monotonic_ms() - bot.pending_encryption['requested'] > 5 * MINUTE_MS:
             await ctx.send("❌ Richiesta di crittografia scaduta! Riprova.", delete_after=5)
             del bot.pending_encryption
             return
@@ -845,7 +902,7 @@ async def confirm_encrypt(ctx):
         # Clear pending request
         del bot.pending_encryption
         
-        except Exception as e:
+    except Exception as e:
         await ctx.send(f"Error confirming encryption: {e}", delete_after=5)
 
 @bot.command(name='cancel_encrypt', hidden=True)
@@ -885,7 +942,7 @@ async def decrypt_channels(ctx):
         else:
             await ctx.send(f"❌ Errore nella decrittografia: {message}", delete_after=5)
             
-        except Exception as e:
+    except Exception as e:
         await ctx.send(f"Error decrypting channels: {e}", delete_after=5)
 
 @bot.command(name='encryption_status', hidden=True)
@@ -931,7 +988,7 @@ async def encryption_status(ctx):
         
         await ctx.send(embed=embed, delete_after=15)
             
-        except Exception as e:
+    except Exception as e:
         await ctx.send(f"Error getting encryption status: {e}", delete_after=5)
 
 @bot.command(name='cybersecurity_status', hidden=True)
@@ -939,7 +996,7 @@ async def encryption_status(ctx):
 async def cybersecurity_status(ctx):
     """Check cybersecurity combat status (Hidden command - Programmer Only)"""
     try:
-        status = bot.defense_system.get_cybersecurity_status()
+        status = bot.defense_system.get_cybersecurity_status(ctx.guild.id)
         
         embed = discord.Embed(
             title="⚔️ CYBERSECURITY COMBAT STATUS",
@@ -971,6 +1028,22 @@ async def cybersecurity_status(ctx):
             inline=True
         )
         
+        if status['actor_rates']:
+            top_actors = sorted(status['actor_rates'].items(), key=lambda item: item[1], reverse=True)[:3]
+            embed.add_field(
+                name="🎯 Azioni Distruttive (60s)",
+                value="\n".join(f"<@{actor_id}>: {count}" for actor_id, count in top_actors),
+                inline=True
+            )
+        
+        if status['active_incidents']:
+            incident = status['active_incidents'][0]
+            embed.add_field(
+                name="🆔 Incidente",
+                value=f"{incident['incident_id']} ({incident['phase']})\nRilevamenti: {incident['detections']}\nContromisura: {incident['countermeasure']}",
+                inline=True
+            )
+        
         embed.add_field(
             name="📊 Log Combattimento",
             value=f"{status['combat_logs_count']} eventi",
@@ -1009,13 +1082,10 @@ async def cybersecurity_status(ctx):
 async def deactivate_cybersecurity(ctx):
     """Deactivate cybersecurity combat mode (Hidden command - Programmer Only)"""
     try:
-        if not bot.defense_system.cybersecurity_active:
-            await ctx.send("❌ Sistema di cybersecurity non è attivo!", delete_after=5)
-                    return
-                
         # Deactivate cybersecurity mode
-        bot.defense_system.cybersecurity_active = False
-        bot.defense_system.threat_level = 0
+        if not await bot.defense_system.deactivate_cybersecurity(ctx.guild):
+            await ctx.send("❌ Sistema di cybersecurity non è attivo!", delete_after=5)
+            return
         
         embed = discord.Embed(
             title="🛡️ CYBERSECURITY DEACTIVATED",
@@ -1062,11 +1132,11 @@ async def combat_logs(ctx, limit: int = 10):
         if limit > 20:
             limit = 20
         
-        logs = bot.defense_system.combat_logs[-limit:] if bot.defense_system.combat_logs else []
+        logs = bot.defense_system.combat_logs.recent(limit)
         
         if not logs:
             await ctx.send("📋 Nessun log di combattimento disponibile.", delete_after=5)
-                    return
+            return
                 
         embed = discord.Embed(
             title="⚔️ CYBERSECURITY COMBAT LOGS",
@@ -1301,25 +1371,12 @@ async def on_message(message):
     # Process commands first
     await bot.process_commands(message)
     
-    # Analyze message for toxicity using the toxicity analyzer
-    try:
-        if bot.toxicity_analyzer and len(message.content.strip()) > 5:
-            # Skip toxicity analysis for protected users
-            if not bot.defense_system.is_protected_user(message.author.id, message.guild):
-                toxicity_score = await bot.toxicity_analyzer.analyze_message(message)
-                
-                if toxicity_score > 0.3:  # Threshold for concerning content
-                    await bot.toxicity_analyzer.update_user_toxicity(message.author, message, toxicity_score)
-    
-    except Exception as e:
-        logger.error(f"Error analyzing message toxicity: {e}")
-    
-    # Track message patterns for human raid detection
+    # Toxicity analysis and human raid detection consume this off the gateway path
     try:
         if message.guild:  # Only track in guilds, not DMs
-            await bot.defense_system.track_message_pattern(message.guild, message)
+            await bot.defense_system.events.publish(MessageEvent(message))
     except Exception as e:
-        logger.error(f"Error tracking message pattern: {e}")
+        logger.error(f"Error publishing message event: {e}")
     
     # Monitor for suspicious commands (self-protection)
     try:
@@ -1352,41 +1409,64 @@ async def on_message(message):
 async def on_member_join(member):
     """Track member joins for raid detection"""
     try:
-        await bot.defense_system.track_member_join(member.guild, member)
+        # Known raiders are banned before any other processing
+        if await bot.defense_system.enforce_blocklist(member):
+            return
+        
+        bot.defense_system.protected_index.update_member(member)
+        await bot.defense_system.events.publish(MemberJoinEvent(member))
         logger.info(f"Member joined: {member.display_name} in {member.guild.name}")
     except Exception as e:
         logger.error(f"Error tracking member join: {e}")
 
+# Protected member index maintenance
+@bot.event
+async def on_member_update(before, after):
+    if before.display_name != after.display_name or before.name != after.name:
+        bot.defense_system.protected_index.update_member(after)
+
+@bot.event
+async def on_user_update(before, after):
+    if before.name != after.name or before.display_name != after.display_name:
+        for guild in after.mutual_guilds:
+            member = guild.get_member(after.id)
+            if member:
+                bot.defense_system.protected_index.update_member(member)
+
+@bot.event
+async def on_member_remove(member):
+    bot.defense_system.protected_index.remove_member(member.guild.id, member.id)
+
+@bot.event
+async def on_guild_join(guild):
+    bot.defense_system.protected_index.rebuild(guild)
+
+@bot.event
+async def on_guild_remove(guild):
+    bot.defense_system.protected_index.forget_guild(guild.id)
+    bot.defense_system.audit_poller.forget_guild(guild.id)
+
+# Ban tracking so the ban pipeline never re-bans known IDs
+@bot.event
+async def on_member_ban(guild, user):
+    bot.defense_system.ban_pipeline.mark_banned(guild.id, user.id)
+
+@bot.event
+async def on_member_unban(guild, user):
+    bot.defense_system.ban_pipeline.mark_unbanned(guild.id, user.id)
+    # An unban by hand overrides the shared blocklist, or the next join would ban the user again
+    if bot.defense_system.blocklist.remove(user.id):
+        logger.info(f"Removed {user} from the shared blocklist after an unban in {guild.name}")
+
 # Guild update tracking for coordinated actions
 @bot.event
 async def on_guild_channel_delete(channel):
     """Track channel deletions for coordinated attack detection"""
     try:
-        guild_id = channel.guild.id
-        if guild_id not in bot.defense_system.coordinated_actions:
-            bot.defense_system.coordinated_actions[guild_id] = []
-        
-        action_data = {
-            'type': 'channel_delete',
-            'channel_name': channel.name,
-            'timestamp': datetime.now(),
-            'channel_id': channel.id
-        }
-        
-        bot.defense_system.coordinated_actions[guild_id].append(action_data)
-        
-        # Update suspicious activities
-        if guild_id not in bot.defense_system.suspicious_activities:
-            bot.defense_system.suspicious_activities[guild_id] = {
-                'rapid_joins': [],
-                'rapid_leaves': [],
-                'channel_deletions': [],
-                'role_deletions': [],
-                'permission_changes': []
-            }
-        
-        bot.defense_system.suspicious_activities[guild_id]['channel_deletions'].append(datetime.now())
-        
+        await bot.defense_system.events.publish(
+            GuildActionEvent(channel.guild, 'channel_delete', channel.id, channel.name)
+        )
+        bot.defense_system.change_tracker.mark(channel.guild.id, 'channels', channel.id)
         logger.warning(f"Channel deleted: {channel.name} in {channel.guild.name}")
         
     except Exception as e:
@@ -1397,36 +1477,40 @@ async def on_guild_channel_delete(channel):
 async def on_guild_role_delete(role):
     """Track role deletions for coordinated attack detection"""
     try:
-        guild_id = role.guild.id
-        if guild_id not in bot.defense_system.coordinated_actions:
-            bot.defense_system.coordinated_actions[guild_id] = []
-        
-        action_data = {
-            'type': 'role_delete',
-            'role_name': role.name,
-            'timestamp': datetime.now(),
-            'role_id': role.id
-        }
-        
-        bot.defense_system.coordinated_actions[guild_id].append(action_data)
-        
-        # Update suspicious activities
-        if guild_id not in bot.defense_system.suspicious_activities:
-            bot.defense_system.suspicious_activities[guild_id] = {
-                'rapid_joins': [],
-                'rapid_leaves': [],
-                'channel_deletions': [],
-                'role_deletions': [],
-                'permission_changes': []
-            }
-        
-        bot.defense_system.suspicious_activities[guild_id]['role_deletions'].append(datetime.now())
-        
+        await bot.defense_system.events.publish(
+            GuildActionEvent(role.guild, 'role_delete', role.id, role.name)
+        )
+        bot.defense_system.change_tracker.mark(role.guild.id, 'roles', role.id)
         logger.warning(f"Role deleted: {role.name} in {role.guild.name}")
         
     except Exception as e:
         logger.error(f"Error tracking role deletion: {e}")
 
+# Structure changes mark the objects the next snapshot has to re-encode
+@bot.event
+async def on_guild_channel_create(channel):
+    bot.defense_system.change_tracker.mark(channel.guild.id, 'channels', channel.id)
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    bot.defense_system.change_tracker.mark(after.guild.id, 'channels', after.id)
+
+@bot.event
+async def on_guild_role_create(role):
+    bot.defense_system.change_tracker.mark(role.guild.id, 'roles', role.id)
+
+@bot.event
+async def on_guild_role_update(before, after):
+    bot.defense_system.change_tracker.mark(after.guild.id, 'roles', after.id)
+
+@bot.event
+async def on_guild_update(before, after):
+    bot.defense_system.change_tracker.mark(after.id, 'settings')
+
+@bot.event
+async def on_guild_emojis_update(guild, before, after):
+    bot.defense_system.change_tracker.mark(guild.id, 'emojis')
+
 
 # Error handling
 @bot.event
@@ -1438,7 +1522,7 @@ async def on_command_error(ctx, error):
         await ctx.send("❌ You don't have permission to use this command!", delete_after=5)
     elif isinstance(error, commands.CommandOnCooldown):
         await ctx.send(f"❌ Command is on cooldown. Try again in {error.retry_after:.2f} seconds.", delete_after=5)
-        else:
+    else:
         logger.error(f"Command error: {error}")
     
 # Create backups directory
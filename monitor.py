@@ -10,6 +10,8 @@ import json
 import os
 from datetime import datetime
 
+from log_tail import tail_lines
+
 class BotMonitor:
     def __init__(self, config_file="config.env"):
         self.config_file = config_file
@@ -48,12 +50,10 @@ class BotMonitor:
         
         for log_file in log_files:
             if os.path.exists(log_file):
-                with open(log_file, 'r') as f:
-                    lines = f.readlines()
-                    # Check last 50 lines for errors
-                    for line in lines[-50:]:
-                        if 'ERROR' in line or 'CRITICAL' in line:
-                            errors.append(line.strip())
+                # Check last 50 lines for errors, read from the end of the file
+                for line in tail_lines(log_file, 50):
+                    if 'ERROR' in line or 'CRITICAL' in line:
+                        errors.append(line.strip())
         
         return errors
     
@@ -0,0 +1,95 @@
+"""
+Permission Overwrite Snapshots
+Records exact pre-lockdown channel overwrites and computes minimal rollbacks
+"""
+
+import discord
+from typing import Dict, Optional, Tuple
+
+# target_id -> (overwrite type, allow bits, deny bits)
+EncodedOverwrites = Dict[int, Tuple[int, int, int]]
+
+OVERWRITE_ROLE = 0
+OVERWRITE_MEMBER = 1
+
+
+def encode_overwrites(overwrites: Dict) -> EncodedOverwrites:
+    """Convert a discord.py overwrites mapping into plain integers"""
+    encoded = {}
+    for target, overwrite in overwrites.items():
+        if isinstance(target, discord.Role) or (isinstance(target, discord.Object) and target.type is discord.Role):
+            target_type = OVERWRITE_ROLE
+        else:
+            target_type = OVERWRITE_MEMBER
+        allow, deny = overwrite.pair()
+        encoded[target.id] = (target_type, allow.value, deny.value)
+    return encoded
+
+
+def decode_overwrites(encoded: EncodedOverwrites) -> Dict[discord.Object, discord.PermissionOverwrite]:
+    """Convert encoded overwrites back into a mapping accepted by channel.edit"""
+    overwrites = {}
+    for target_id, (target_type, allow, deny) in encoded.items():
+        target = discord.Object(id=target_id, type=discord.Role if target_type == OVERWRITE_ROLE else discord.Member)
+        overwrites[target] = discord.PermissionOverwrite.from_pair(discord.Permissions(allow), discord.Permissions(deny))
+    return overwrites
+
+
+class OverwriteSnapshot:
+    """Exact overwrites of one guild's channels before the bot locked them down"""
+
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.original: Dict[int, EncodedOverwrites] = {}
+        self.applied: Dict[int, EncodedOverwrites] = {}
+
+    def capture(self, channel) -> bool:
+        """Record a channel's overwrites unless it is already captured.
+
+        The first capture wins so a second lockdown never records locked state
+        as the original.
+        """
+        if channel.id in self.original:
+            return False
+        self.original[channel.id] = encode_overwrites(channel.overwrites)
+        return True
+
+    def record_applied(self, channel_id: int, overwrites: Dict):
+        """Remember the overwrites the bot wrote so later manual edits are kept"""
+        self.applied[channel_id] = encode_overwrites(overwrites)
+
+    def rollback_for(self, channel) -> Optional[EncodedOverwrites]:
+        """Compute the overwrites that undo the bot's changes to a channel.
+
+        Targets whose current overwrite still matches what the bot applied are
+        reverted to the original; anything edited since is left alone. Returns
+        None when the channel already matches, so no request is needed.
+        """
+        original = self.original.get(channel.id)
+        if original is None:
+            return None
+
+        current = encode_overwrites(channel.overwrites)
+        if channel.id not in self.applied:
+            return None if original == current else dict(original)
+
+        applied = self.applied[channel.id]
+        target = dict(current)
+
+        for target_id in set(original) | set(applied):
+            if current.get(target_id) != applied.get(target_id):
+                continue  # Changed by someone else after the lockdown
+            if target_id in original:
+                target[target_id] = original[target_id]
+            else:
+                target.pop(target_id, None)
+
+        return None if target == current else target
+
+    def forget(self, channel_id: int):
+        """Drop a channel once it has been restored"""
+        self.original.pop(channel_id, None)
+        self.applied.pop(channel_id, None)
+
+    def __len__(self):
+        return len(self.original)
@@ -0,0 +1,68 @@
+"""
+Protected Member Index
+Keeps the set of protected members per guild so checks avoid member scans
+"""
+
+import discord
+from typing import Dict, Optional, Set
+
+# Protected handle that is always exempt from restrictions
+PROTECTED_HANDLE = "by_bytes"
+
+
+def has_protected_handle(member) -> bool:
+    """Check whether a member uses the protected handle as username or display name"""
+    username = (member.name or "").lower()
+    display_name = (member.display_name or "").lower()
+    return username == PROTECTED_HANDLE or display_name == PROTECTED_HANDLE
+
+
+class ProtectedMemberIndex:
+    """Per-guild set of member IDs protected by handle.
+
+    ID-based protection (bot owner, protected users, server creators, guild owner)
+    is global and checked separately; this index only caches what would otherwise
+    need a member lookup and name comparison.
+    """
+
+    def __init__(self):
+        self._guilds: Dict[int, Set[int]] = {}
+
+    def is_indexed(self, guild_id: int) -> bool:
+        return guild_id in self._guilds
+
+    def rebuild(self, guild: discord.Guild) -> Set[int]:
+        """Index a guild with a single pass over its members"""
+        members = {member.id for member in guild.members if has_protected_handle(member)}
+        self._guilds[guild.id] = members
+        return members
+
+    def get(self, guild_id: int) -> Optional[Set[int]]:
+        """Get an indexed guild's protected member IDs, or None if not indexed"""
+        return self._guilds.get(guild_id)
+
+    def members(self, guild: discord.Guild) -> Set[int]:
+        """Get protected-by-handle member IDs, indexing the guild on first use"""
+        members = self._guilds.get(guild.id)
+        if members is None:
+            members = self.rebuild(guild)
+        return members
+
+    def update_member(self, member: discord.Member):
+        """Re-evaluate one member after a join or profile change"""
+        members = self._guilds.get(member.guild.id)
+        if members is None:
+            return
+        if has_protected_handle(member):
+            members.add(member.id)
+        else:
+            members.discard(member.id)
+
+    def remove_member(self, guild_id: int, member_id: int):
+        """Drop a member that left the guild"""
+        members = self._guilds.get(guild_id)
+        if members is not None:
+            members.discard(member_id)
+
+    def forget_guild(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
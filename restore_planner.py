@@ -0,0 +1,421 @@
+"""
+Restore Planner
+Diffs a live guild against a backup and restores only what differs, in dependency order
+"""
+
+import discord
+import asyncio
+import time
+import logging
+from enum import IntEnum
+from typing import Dict, List, Optional
+
+from action_scheduler import ActionScheduler, ActionPriority, route_bucket
+from asset_archiver import AssetArchiver
+from overwrite_snapshot import OVERWRITE_MEMBER, OVERWRITE_ROLE, decode_overwrites, encode_overwrites
+
+logger = logging.getLogger(__name__)
+
+
+class RestorePhase(IntEnum):
+    """Operations only depend on earlier phases, so the operations of one phase run concurrently"""
+    SETTINGS = 0
+    ROLES = 1
+    CATEGORIES = 2
+    CHANNELS = 3
+    POSITIONS = 4
+    EMOJIS = 5
+
+
+# Guild setting -> enum its backup value is converted with
+SETTING_FIELDS = {
+    'name': None,
+    'description': None,
+    'verification_level': discord.VerificationLevel,
+    'default_notifications': discord.NotificationLevel,
+    'explicit_content_filter': discord.ContentFilter,
+}
+
+# Guild images restored from archived assets when the live guild has none
+IMAGE_FIELDS = ('icon', 'banner')
+
+ROLE_FIELDS = ('name', 'color', 'hoist', 'mentionable', 'permissions')
+
+# Backup channel type -> (Guild factory, extra arguments, restorable attributes)
+CHANNEL_KINDS = {
+    'category': ('create_category', {}, ()),
+    'text': ('create_text_channel', {}, ('topic', 'nsfw', 'slowmode_delay')),
+    'news': ('create_text_channel', {'news': True}, ('topic', 'nsfw', 'slowmode_delay')),
+    'forum': ('create_forum', {}, ('topic', 'nsfw', 'slowmode_delay')),
+    'voice': ('create_voice_channel', {}, ('bitrate', 'user_limit')),
+    'stage_voice': ('create_stage_channel', {}, ('bitrate', 'user_limit')),
+}
+
+# Requests per second within one rate-limit bucket assumed by dry-run estimates
+BUCKET_REQUESTS_PER_SECOND = 1.0
+
+
+class RestoreOp:
+    """One API call: ``data`` is the backup item, ``target`` the live object it edits"""
+
+    __slots__ = ('phase', 'action', 'bucket', 'data', 'target')
+
+    def __init__(self, phase: RestorePhase, action: str, bucket: str, data: Optional[Dict] = None, target=None):
+        self.phase = phase
+        self.action = action
+        self.bucket = bucket
+        self.data = data
+        self.target = target
+
+    def describe(self) -> str:
+        name = (self.data or {}).get('name') or getattr(self.target, 'name', None)
+        return f"{self.action} {name}" if name else self.action
+
+
+class RestorePlan:
+    """Operations that turn a live guild back into a backup, plus the backup-to-live ID mapping.
+
+    Roles and channels matched by ID, or by name once their ID is gone, are
+    mapped up front; recreated ones are added as their create calls return,
+    so later phases point overwrites and categories at the new objects.
+    """
+
+    def __init__(self, guild_id: int, backup: Dict):
+        self.guild_id = guild_id
+        self.backup = backup
+        self.ops: List[RestoreOp] = []
+        self.roles: Dict[int, object] = {}  # backup role ID -> live role
+        self.channels: Dict[int, object] = {}  # backup channel ID -> live channel
+        self.role_ids = {role['id'] for role in backup.get('roles', [])}
+
+    def add(self, phase: RestorePhase, action: str, bucket: str, data: Optional[Dict] = None, target=None):
+        self.ops.append(RestoreOp(phase, action, bucket, data, target))
+
+    def phase(self, phase: RestorePhase) -> List[RestoreOp]:
+        return [op for op in self.ops if op.phase is phase]
+
+    def estimate(self) -> Dict:
+        """Dry-run cost: calls per phase and a lower bound on time from the busiest bucket of each phase"""
+        phases = {}
+        seconds = 0.0
+        for phase in RestorePhase:
+            ops = self.phase(phase)
+            if not ops:
+                continue
+            buckets = {}
+            for op in ops:
+                buckets[op.bucket] = buckets.get(op.bucket, 0) + 1
+            phases[phase.name.lower()] = len(ops)
+            seconds += max(buckets.values()) / BUCKET_REQUESTS_PER_SECOND
+        return {'api_calls': len(self.ops), 'phases': phases, 'estimated_seconds': seconds}
+
+    def overwrites_for(self, channel_data: Dict) -> Dict[int, tuple]:
+        """Backup overwrites as encoded overwrites on live targets; unresolved roles are left out"""
+        encoded = {}
+        for target_id, overwrite in channel_data.get('permissions', {}).items():
+            target_id = int(target_id)
+            target_type = overwrite.get('type')
+            if target_type is None:  # Backups before overwrite types were recorded
+                is_role = target_id in self.role_ids or target_id == self.guild_id
+                target_type = OVERWRITE_ROLE if is_role else OVERWRITE_MEMBER
+            if target_type == OVERWRITE_ROLE and target_id != self.guild_id:
+                role = self.roles.get(target_id)
+                if role is None:
+                    continue
+                target_id = role.id
+            encoded[target_id] = (target_type, overwrite['allow'], overwrite['deny'])
+        return encoded
+
+    def live_overwrites(self, guild: discord.Guild, channel_data: Dict) -> Dict:
+        """Backup overwrites keyed by live Role objects, as channel creation needs.
+
+        discord.py sends every key that is not a ``Role`` instance as a member
+        overwrite when creating a channel, so role targets cannot stay
+        ``discord.Object``s; member targets can.
+        """
+        roles = {role.id: role for role in self.roles.values()}
+        roles[guild.id] = guild.default_role
+        overwrites = {}
+        for target, overwrite in decode_overwrites(self.overwrites_for(channel_data)).items():
+            if target.type is discord.Role:
+                target = roles.get(target.id) or guild.get_role(target.id)
+                if target is None:
+                    continue
+            overwrites[target] = overwrite
+        return overwrites
+
+    def category_for(self, channel_data: Dict):
+        category_id = channel_data.get('category_id')
+        return self.channels.get(category_id) if category_id is not None else None
+
+    def role_changes(self, role, role_data: Dict) -> Dict:
+        current = {
+            'name': role.name,
+            'color': role.color.value,
+            'hoist': role.hoist,
+            'mentionable': role.mentionable,
+            'permissions': role.permissions.value
+        }
+        return {field: role_data[field] for field in ROLE_FIELDS
+                if field in role_data and role_data[field] != current[field]}
+
+    def channel_changes(self, channel, channel_data: Dict, planning: bool = False) -> Dict:
+        """Fields of a live channel that differ from the backup, as ``channel.edit`` arguments.
+
+        While planning, a category or overwrite role that is yet to be recreated
+        counts as a difference; when executing, references that could not be
+        recreated are left as they are.
+        """
+        changes = {}
+        if channel.name != channel_data['name']:
+            changes['name'] = channel_data['name']
+        for field in CHANNEL_KINDS.get(channel_data['type'], (None, None, ()))[2]:
+            value = channel_data.get(field)
+            if value is not None and getattr(channel, field, value) != value:
+                changes[field] = value
+
+        if channel_data['type'] != 'category':
+            category = self.category_for(channel_data)
+            if category is None and channel_data.get('category_id') is not None:
+                if planning:
+                    changes['category'] = None
+            elif getattr(category, 'id', None) != channel.category_id:
+                changes['category'] = category
+
+        overwrites = self.overwrites_for(channel_data)
+        unresolved = len(overwrites) < len(channel_data.get('permissions', {}))
+        if overwrites != encode_overwrites(channel.overwrites) or (planning and unresolved):
+            changes['overwrites'] = decode_overwrites(overwrites)
+        return changes
+
+
+def plan_restore(guild: discord.Guild, backup: Dict, assets: Optional[AssetArchiver] = None) -> RestorePlan:
+    """Diff the live guild against a backup and list the calls that close the gap"""
+    plan = RestorePlan(guild.id, backup)
+
+    settings = backup.get('settings', {})
+    if (any(_setting_differs(guild, field, settings) for field in SETTING_FIELDS)
+            or _missing_images(guild, settings, assets)):
+        plan.add(RestorePhase.SETTINGS, 'edit_guild', route_bucket('PATCH', '/guilds/{guild_id}', guild_id=guild.id))
+
+    live_roles = {role.name: role for role in guild.roles if not role.is_default()}
+    claimed = set()
+    for role_data in backup.get('roles', []):
+        role = guild.get_role(role_data['id'])
+        if role is None:
+            # A role recreated by an earlier restore has a new ID but the same name
+            role = live_roles.get(role_data['name'])
+            if role is not None and (role.id in claimed or role.id in plan.role_ids):
+                role = None
+        if role is None:
+            plan.add(RestorePhase.ROLES, 'create_role',
+                     route_bucket('POST', '/guilds/{guild_id}/roles', guild_id=guild.id), role_data)
+            continue
+        claimed.add(role.id)
+        plan.roles[role_data['id']] = role
+        if not role.managed and plan.role_changes(role, role_data):
+            plan.add(RestorePhase.ROLES, 'edit_role',
+                     route_bucket('PATCH', '/guilds/{guild_id}/roles/{role_id}', guild_id=guild.id, role_id=role.id),
+                     role_data, role)
+
+    live_channels = {(str(channel.type), channel.name): channel for channel in guild.channels}
+    backup_channels = backup.get('channels', [])
+    backup_ids = {channel_data['id'] for channel_data in backup_channels}
+    claimed = set()
+    for channel_data in backup_channels:
+        if channel_data['type'] not in CHANNEL_KINDS:
+            continue
+        channel = guild.get_channel(channel_data['id'])
+        if channel is None:
+            channel = live_channels.get((channel_data['type'], channel_data['name']))
+            if channel is not None and (channel.id in claimed or channel.id in backup_ids):
+                channel = None
+        if channel is not None:
+            claimed.add(channel.id)
+            plan.channels[channel_data['id']] = channel
+
+    for channel_data in sorted(backup_channels, key=lambda data: data['type'] != 'category'):
+        if channel_data['type'] not in CHANNEL_KINDS:
+            continue
+        phase = RestorePhase.CATEGORIES if channel_data['type'] == 'category' else RestorePhase.CHANNELS
+        channel = plan.channels.get(channel_data['id'])
+        if channel is None:
+            plan.add(phase, 'create_channel',
+                     route_bucket('POST', '/guilds/{guild_id}/channels', guild_id=guild.id), channel_data)
+        elif plan.channel_changes(channel, channel_data, planning=True):
+            plan.add(phase, 'edit_channel',
+                     route_bucket('PATCH', '/channels/{channel_id}', channel_id=channel.id), channel_data, channel)
+
+    # Positions are fixed at the end with one bulk call each, not one edit per object
+    if any(op.action == 'create_role' for op in plan.ops) or _role_positions(guild, plan):
+        plan.add(RestorePhase.POSITIONS, 'role_positions',
+                 route_bucket('PATCH', '/guilds/{guild_id}/roles', guild_id=guild.id))
+    if any(op.action == 'create_channel' for op in plan.ops) or _channel_positions(plan):
+        plan.add(RestorePhase.POSITIONS, 'channel_positions',
+                 route_bucket('PATCH', '/guilds/{guild_id}/channels', guild_id=guild.id))
+
+    # Deleted emojis are uploaded again from their archived files, matched by name like backups key them
+    if assets is not None:
+        live_emojis = {emoji.name for emoji in guild.emojis}
+        for emoji_data in backup.get('emojis', []):
+            digest = emoji_data.get('asset')
+            if emoji_data['name'] not in live_emojis and digest and assets.has(digest):
+                plan.add(RestorePhase.EMOJIS, 'create_emoji',
+                         route_bucket('POST', '/guilds/{guild_id}/emojis', guild_id=guild.id), emoji_data)
+    return plan
+
+
+def _setting_differs(guild: discord.Guild, field: str, settings: Dict) -> bool:
+    if field not in settings:
+        return False
+    current = getattr(guild, field)
+    return getattr(current, 'value', current) != settings[field]
+
+
+def _missing_images(guild: discord.Guild, settings: Dict, assets: Optional[AssetArchiver]) -> List[str]:
+    if assets is None:
+        return []
+    return [field for field in IMAGE_FIELDS
+            if getattr(guild, field) is None and settings.get(f'{field}_asset')
+            and assets.has(settings[f'{field}_asset'])]
+
+
+def _role_positions(guild: discord.Guild, plan: RestorePlan) -> Dict:
+    """Roles the bot may move, kept below its top role: one role it cannot move fails the whole bulk edit"""
+    top = guild.me.top_role.position
+    return {
+        role: role_data['position']
+        for role_data in plan.backup.get('roles', [])
+        for role in [plan.roles.get(role_data['id'])]
+        if role is not None and not role.is_default() and not role.managed
+        and role.position < top and role_data['position'] < top and role.position != role_data['position']
+    }
+
+
+def _channel_positions(plan: RestorePlan) -> List[Dict]:
+    return [
+        {'id': channel.id, 'position': channel_data['position']}
+        for channel_data in plan.backup.get('channels', [])
+        for channel in [plan.channels.get(channel_data['id'])]
+        if channel is not None and channel.position != channel_data['position']
+    ]
+
+
+class RestorePlanner:
+    """Executes restore plans through the REST scheduler.
+
+    Phases run in order: guild settings, roles, categories, channels, then
+    bulk position edits, because overwrites need their roles and channels need
+    their categories. Emojis and guild images are uploaded from the asset
+    archive when one is given. Within a phase every call is submitted at once at
+    restoration priority, so the scheduler overlaps independent buckets.
+    Objects that already match the backup cost nothing.
+    """
+
+    def __init__(self, scheduler: ActionScheduler, assets: Optional[AssetArchiver] = None):
+        self.scheduler = scheduler
+        self.assets = assets
+
+    def plan(self, guild: discord.Guild, backup: Dict) -> RestorePlan:
+        return plan_restore(guild, backup, self.assets)
+
+    async def execute(self, guild: discord.Guild, plan: RestorePlan,
+                      reason: str = "Server restore from backup") -> Dict:
+        """Run a plan; returns API calls made, failures and time per phase"""
+        start = time.perf_counter()
+        report = {'api_calls': 0, 'failed': 0, 'phases': {}}
+        for phase in RestorePhase:
+            ops = plan.phase(phase)
+            if not ops:
+                continue
+
+            phase_start = time.perf_counter()
+            results = await asyncio.gather(*[self._run(guild, plan, op, reason) for op in ops],
+                                           return_exceptions=True)
+            for op, result in zip(ops, results):
+                if isinstance(result, Exception):
+                    report['failed'] += 1
+                    logger.error(f"Error restoring {op.describe()} in {guild.name}: {result}")
+                elif result:
+                    report['api_calls'] += 1
+            report['phases'][phase.name.lower()] = time.perf_counter() - phase_start
+
+        report['elapsed_seconds'] = time.perf_counter() - start
+        return report
+
+    async def _run(self, guild: discord.Guild, plan: RestorePlan, op: RestoreOp, reason: str) -> bool:
+        """Build the call from the mapping as it is now and queue it; False if nothing is left to do"""
+        data = op.data
+
+        if op.action == 'edit_guild':
+            settings = plan.backup['settings']
+            fields = {
+                field: (convert(settings[field]) if convert else settings[field])
+                for field, convert in SETTING_FIELDS.items() if _setting_differs(guild, field, settings)
+            }
+            for field in _missing_images(guild, settings, self.assets):
+                fields[field] = await asyncio.to_thread(self.assets.read, settings[f'{field}_asset'])
+            if not fields:
+                return False
+            call = lambda: guild.edit(reason=reason, **fields)
+
+        elif op.action == 'create_role':
+            call = lambda: guild.create_role(
+                name=data['name'],
+                color=discord.Color(data['color']),
+                permissions=discord.Permissions(data['permissions']),
+                hoist=data['hoist'],
+                mentionable=data['mentionable'],
+                reason=reason
+            )
+
+        elif op.action == 'edit_role':
+            fields = plan.role_changes(op.target, data)
+            if not fields:
+                return False
+            if 'color' in fields:
+                fields['color'] = discord.Color(fields['color'])
+            if 'permissions' in fields:
+                fields['permissions'] = discord.Permissions(fields['permissions'])
+            call = lambda: op.target.edit(reason=reason, **fields)
+
+        elif op.action == 'create_channel':
+            factory, extra, attributes = CHANNEL_KINDS[data['type']]
+            fields = dict(extra, position=data['position'], overwrites=plan.live_overwrites(guild, data))
+            fields.update({field: data[field] for field in attributes if data.get(field) is not None})
+            if data['type'] != 'category' and plan.category_for(data) is not None:
+                fields['category'] = plan.category_for(data)
+            call = lambda: getattr(guild, factory)(data['name'], reason=reason, **fields)
+
+        elif op.action == 'edit_channel':
+            fields = plan.channel_changes(op.target, data)
+            if not fields:
+                return False
+            call = lambda: op.target.edit(reason=reason, **fields)
+
+        elif op.action == 'create_emoji':
+            image = await asyncio.to_thread(self.assets.read, data['asset'])
+            call = lambda: guild.create_custom_emoji(name=data['name'], image=image, reason=reason)
+
+        elif op.action == 'role_positions':
+            positions = _role_positions(guild, plan)
+            if not positions:
+                return False
+            call = lambda: guild.edit_role_positions(positions, reason=reason)
+
+        elif op.action == 'channel_positions':
+            positions = _channel_positions(plan)
+            if not positions:
+                return False
+            # discord.py only exposes single-channel moves, so the bulk endpoint is called directly
+            call = lambda: guild._state.http.bulk_channel_update(guild.id, positions, reason=reason)
+
+        else:
+            raise ValueError(f"Unknown restore action {op.action}")
+
+        result = await self.scheduler.run(op.bucket, call, priority=ActionPriority.RESTORATION)
+        if op.action == 'create_role':
+            plan.roles[data['id']] = result
+        elif op.action == 'create_channel':
+            plan.channels[data['id']] = result
+        return True
@@ -0,0 +1,106 @@
+"""
+Retention
+Grandfather-father-son thinning of backups per guild, driven by the backup catalog
+"""
+
+import os
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backup_catalog import BackupCatalog, KIND_FULL, SNAPSHOT_KINDS
+from snapshot_store import SnapshotStore
+from asset_archiver import AssetArchiver
+from timing import DAY_MS, HOUR_MS, now_ms
+
+logger = logging.getLogger(__name__)
+
+# (maximum age, one backup kept per interval); 0 keeps every backup of that age
+RETENTION_TIERS = (
+    (HOUR_MS, 0),                 # Everything from the last hour
+    (DAY_MS, HOUR_MS),            # Hourly for a day
+    (30 * DAY_MS, DAY_MS),        # Daily for a month
+    (365 * DAY_MS, 7 * DAY_MS),   # Weekly for a year
+)
+
+
+def expired(entries: Iterable[Dict], now: int, tiers: Tuple = RETENTION_TIERS) -> List[Dict]:
+    """Catalog entries of one guild that the tiers no longer keep, oldest first.
+
+    Each backup falls into the first tier younger than its age, and the
+    oldest backup of every interval of that tier is kept. Intervals are
+    aligned to the epoch, so a backup kept once stays kept until it ages into
+    the next tier. The newest backup is always kept, however old.
+    """
+    entries = sorted(entries, key=lambda entry: entry['created_ms'])
+    kept = set()
+    result = []
+    for entry in entries[:-1]:
+        age = now - entry['created_ms']
+        tier = next((index for index, (max_age, _) in enumerate(tiers) if age < max_age), None)
+        if tier is None:
+            result.append(entry)
+            continue
+        interval = tiers[tier][1]
+        if not interval:
+            continue
+        bucket = (tier, entry['created_ms'] // interval)
+        if bucket in kept:
+            result.append(entry)
+        else:
+            kept.add(bucket)
+    return result
+
+
+class RetentionEngine:
+    """Expires guild backups by tier and reclaims the space only they used.
+
+    Every run reads each guild's rows from the catalog, which retention
+    keeps at about a hundred per guild, and deletes the expired ones.
+    Snapshots release their reference-counted objects, so the work done is
+    proportional to what expired; legacy full backups are single files.
+    Assets that no snapshot references any more are deleted from the archive.
+    """
+
+    def __init__(self, catalog: BackupCatalog, store: SnapshotStore, assets: Optional[AssetArchiver] = None,
+                 tiers: Tuple = RETENTION_TIERS):
+        self.catalog = catalog
+        self.store = store
+        self.assets = assets
+        self.tiers = tiers
+
+    def run(self, now: Optional[int] = None) -> Dict:
+        """Apply the tiers to every guild; returns what was deleted"""
+        now = now_ms() if now is None else now
+        counts = {'snapshots': 0, 'full': 0, 'objects': 0, 'assets': 0, 'bytes_freed': 0}
+        if self.catalog.get_meta('refs_complete') == '0':
+            self.store.count_references()
+
+        objects_before = self.store.stats['objects_deleted']
+        bytes_before = self.store.stats['bytes_freed']
+        # Incident snapshots are thinned on their own, so they never displace regular ones
+        for kind in SNAPSHOT_KINDS:
+            for guild_id in self.catalog.guild_ids(kind):
+                paths = [entry['path'] for entry in expired(self.catalog.entries(guild_id, kind), now, self.tiers)]
+                if not paths:
+                    continue
+                try:
+                    counts['assets'] += len(self.store.delete_snapshots(paths, self.assets))
+                    counts['snapshots'] += len(paths)
+                except Exception as e:
+                    logger.error(f"Error expiring {kind} snapshots of guild {guild_id}: {e}")
+
+        for guild_id in self.catalog.guild_ids(KIND_FULL):
+            entries = expired(self.catalog.entries(guild_id, KIND_FULL), now, self.tiers)
+            for entry in entries:
+                try:
+                    if os.path.exists(entry['path']):
+                        os.remove(entry['path'])
+                    counts['bytes_freed'] += entry['size']
+                    counts['full'] += 1
+                except Exception as e:
+                    logger.error(f"Error expiring backup {entry['path']}: {e}")
+            self.catalog.remove_many(entry['path'] for entry in entries)
+
+        counts['objects'] = self.store.stats['objects_deleted'] - objects_before
+        counts['bytes_freed'] += self.store.stats['bytes_freed'] - bytes_before
+        return counts
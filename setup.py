@@ -44,6 +44,7 @@ setup(
         "requests==2.31.0",
         "urllib3==2.0.7",
         "cryptography==41.0.7",
+        "numpy>=1.24",
     ],
     entry_points={
         "console_scripts": [
@@ -0,0 +1,396 @@
+"""
+Snapshot Store
+Content-addressed guild backups: deduplicated objects plus a small manifest per snapshot
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from backup_writer import BACKUP_FORMATS, DEFAULT_FORMAT, write_atomic
+from backup_catalog import BackupCatalog, INCIDENT_SUFFIX, KIND_SNAPSHOT, SNAPSHOT_KINDS
+from timing import now_ms, to_ms
+
+logger = logging.getLogger(__name__)
+
+# 2 adds 'index', the key of every item per section, so delta snapshots can reuse hashes
+MANIFEST_FORMAT = 2
+
+# Backup sections stored as one object per item
+ITEM_SECTIONS = ('channels', 'roles', 'emojis')
+
+# Object fields holding the hash of an archived asset
+ASSET_FIELDS = ('asset', 'icon_asset', 'banner_asset')
+
+
+def canonical(value) -> bytes:
+    """Deterministic encoding, so equal objects always hash the same"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def object_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def object_children(value) -> Tuple[List[str], List[str]]:
+    """Hashes an object refers to: a channel's permissions object, and archived assets"""
+    if not isinstance(value, dict):
+        return [], []
+    objects = [value['permissions']] if isinstance(value.get('permissions'), str) else []
+    assets = [value[field] for field in ASSET_FIELDS if isinstance(value.get(field), str)]
+    return objects, assets
+
+
+def manifest_hashes(manifest: Dict) -> List[str]:
+    """Objects a manifest lists directly, repeated as often as listed"""
+    hashes = [manifest['settings']]
+    for section in ITEM_SECTIONS:
+        hashes.extend(manifest.get(section, ()))
+    return hashes
+
+
+def item_key(item: Dict):
+    """Identity of a backup item across snapshots; emojis are backed up by name only"""
+    return item.get('id', item.get('name'))
+
+
+class GuildSummary:
+    """What stays in memory about a guild's latest snapshot; the content itself stays on disk"""
+
+    __slots__ = ('guild_id', 'snapshot', 'created_at', 'member_count', 'channel_count', 'role_count',
+                 'emoji_count', 'content_hash')
+
+    def __init__(self, snapshot: str, manifest: Dict):
+        metadata = manifest['metadata']
+        self.guild_id = metadata['guild_id']
+        self.snapshot = snapshot  # Manifest path
+        self.created_at = metadata.get('created_at')
+        self.member_count = metadata.get('member_count')
+        self.channel_count = len(manifest.get('channels', ()))
+        self.role_count = len(manifest.get('roles', ()))
+        self.emoji_count = len(manifest.get('emojis', ()))
+        self.content_hash = content_hash(manifest)
+
+
+class SnapshotStore:
+    """Stores backups as content-addressed objects shared across snapshots and guilds.
+
+    Settings, every channel, every channel's permission overwrites, every role
+    and every emoji are stored once under the SHA-256 of their canonical JSON.
+    A snapshot is a manifest listing those hashes, so an unchanged channel is
+    never written again and snapshot cost scales with what changed. A snapshot
+    that changes nothing but metadata is not written at all. Given the
+    changes tracked since the last snapshot, only dirty items are encoded and
+    hashed; every other item keeps its hash from the previous manifest.
+
+    Only a ``GuildSummary`` per guild is kept in memory; full backups are
+    rebuilt from disk when a restore needs them. With a catalog, every
+    manifest is recorded there and the latest snapshot of a guild is found
+    without listing its directory.
+
+    With a catalog, objects are also reference counted: each manifest holds
+    a reference to every object it lists, and each object to the objects and
+    assets inside it. Deleting a snapshot releases its references and
+    deletes whatever drops to zero, so reclaiming space never lists the
+    object directory. Writes and deletes take one lock, so an object about
+    to be reused is never deleted under a snapshot being written.
+    """
+
+    def __init__(self, directory: str = 'backups', compression: str = DEFAULT_FORMAT,
+                 catalog: Optional[BackupCatalog] = None):
+        self.directory = directory
+        self.catalog = catalog
+        self.compression = compression if compression in BACKUP_FORMATS else DEFAULT_FORMAT
+        self._formats = (self.compression, *(name for name in BACKUP_FORMATS if name != self.compression))
+        self._summaries: Dict[int, GuildSummary] = {}
+        self._lock = threading.RLock()
+        self.stats = {'snapshots': 0, 'unchanged': 0, 'objects_written': 0, 'objects_reused': 0,
+                      'items_reused': 0, 'bytes_written': 0, 'objects_deleted': 0, 'bytes_freed': 0}
+
+    @property
+    def _objects_dir(self) -> str:
+        return os.path.join(self.directory, 'objects')
+
+    def _object_path(self, digest: str, compression: Optional[str] = None) -> str:
+        suffix = BACKUP_FORMATS[compression or self.compression][0]
+        return os.path.join(self._objects_dir, digest[:2], f"{digest}{suffix}")
+
+    def _snapshot_dir(self, guild_id: int) -> str:
+        return os.path.join(self.directory, 'snapshots', str(guild_id))
+
+    def put(self, value) -> str:
+        """Store one object unless an identical one exists; returns its hash"""
+        return self._store(value)[0]
+
+    def _store(self, value) -> Tuple[str, bool]:
+        """Hash of the object, and whether it was new"""
+        data = canonical(value)
+        digest = object_hash(data)
+        if any(os.path.exists(self._object_path(digest, compression)) for compression in self._formats):
+            self.stats['objects_reused'] += 1
+            return digest, False
+
+        compress = BACKUP_FORMATS[self.compression][1]
+        if compress:
+            data = compress(data)
+        path = self._object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, data)
+        self.stats['objects_written'] += 1
+        self.stats['bytes_written'] += len(data)
+        return digest, True
+
+    def get(self, digest: str):
+        """Load an object, whichever encoding it was written with"""
+        for compression in self._formats:
+            try:
+                with open(self._object_path(digest, compression), 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            decompress = BACKUP_FORMATS[compression][2]
+            return json.loads(decompress(data) if decompress else data)
+        raise FileNotFoundError(f"Snapshot object {digest} is missing")
+
+    def _put_item(self, section: str, item: Dict, children: Optional[Tuple[Counter, Counter]] = None) -> str:
+        """Store an item; the references held by newly written objects are added to ``children``"""
+        if section == 'channels':
+            item = dict(item, permissions=self.put(item['permissions']))
+        digest, written = self._store(item)
+        if written and children is not None:
+            objects, assets = object_children(item)
+            children[0].update(objects)
+            children[1].update(assets)
+        return digest
+
+    def _previous_hashes(self, guild_id: int) -> Optional[Dict]:
+        """Item key -> hash per section of the latest snapshot, if its manifest has an index"""
+        summary = self.summary(guild_id)
+        if summary is None:
+            return None
+        manifest = self.read_manifest(summary.snapshot)
+        if 'index' not in manifest:
+            return None
+        previous = {section: dict(zip(manifest['index'][section], manifest[section])) for section in ITEM_SECTIONS}
+        previous['settings'] = manifest['settings']
+        return previous
+
+    def write_snapshot(self, backup: Dict, changes=None, kind: str = KIND_SNAPSHOT) -> str:
+        """Store a backup from create_comprehensive_backup; returns the manifest path.
+
+        ``changes`` (a ``GuildChanges``) limits encoding to the items it marks
+        dirty. Without it, or without an indexed previous snapshot, every item
+        is encoded. An incident snapshot is always encoded in full and is
+        catalogued separately, so the latest snapshot and delta base stay the
+        pre-incident one.
+        """
+        with self._lock:
+            metadata = backup['metadata']
+            guild_id = metadata['guild_id']
+            incident = kind != KIND_SNAPSHOT
+            previous = self._previous_hashes(guild_id) if changes is not None and not incident else None
+
+            bytes_before = self.stats['bytes_written']
+            children = (Counter(), Counter())
+            manifest = {'format': MANIFEST_FORMAT, 'metadata': metadata, 'index': {}}
+            if previous is not None and not changes.is_dirty('settings', None):
+                manifest['settings'] = previous['settings']
+                self.stats['items_reused'] += 1
+            else:
+                manifest['settings'] = self._put_item('settings', backup['settings'], children)
+
+            for section in ITEM_SECTIONS:
+                known = previous[section] if previous is not None else {}
+                keys = []
+                hashes = []
+                for item in backup.get(section, []):
+                    key = item_key(item)
+                    digest = known.get(key)
+                    if digest is None or changes.is_dirty(section, key):
+                        digest = self._put_item(section, item, children)
+                    else:
+                        self.stats['items_reused'] += 1
+                    keys.append(key)
+                    hashes.append(digest)
+                manifest[section] = hashes
+                manifest['index'][section] = keys
+
+            summary = self.summary(guild_id)
+            if summary is not None and summary.content_hash == content_hash(manifest):
+                self.stats['unchanged'] += 1
+                summary.member_count = metadata.get('member_count')
+                if self.catalog is not None:
+                    self.catalog.touch(summary.snapshot, now_ms())
+                return summary.snapshot
+
+            created = metadata['created_at'].replace(':', '').replace('-', '').replace('T', '_').split('.')[0]
+            name = f"{guild_id}_{created}{INCIDENT_SUFFIX if incident else '.json'}"
+            path = os.path.join(self._snapshot_dir(guild_id), name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            replaced = self.read_manifest(path) if self.catalog is not None and os.path.exists(path) else None
+            data = canonical(manifest)
+            write_atomic(path, data)
+
+            if not incident:
+                self._summaries[guild_id] = GuildSummary(path, manifest)
+            self.stats['snapshots'] += 1
+            self.stats['bytes_written'] += len(data)
+            if self.catalog is not None:
+                # Size is what this snapshot added: its manifest plus objects no earlier snapshot had
+                self.catalog.record(path, kind, to_ms(datetime.fromisoformat(metadata['created_at'])),
+                                    self.stats['bytes_written'] - bytes_before, object_hash(data), guild_id)
+                self.catalog.add_refs(Counter(manifest_hashes(manifest)) + children[0])
+                self.catalog.add_refs(children[1], asset=True)
+                if replaced is not None:
+                    # A second snapshot within the same second replaces the first
+                    self._release(Counter(manifest_hashes(replaced)))
+            return path
+
+    def delete_snapshots(self, paths: List[str], archiver=None) -> List[str]:
+        """Delete snapshots and every object only they referenced; returns the assets no longer referenced.
+
+        With ``archiver`` (an ``AssetArchiver``), freed assets are deleted while
+        the store is still locked, so a snapshot written meanwhile cannot
+        reference a file that is about to disappear.
+        """
+        with self._lock:
+            refs = Counter()
+            for path in paths:
+                try:
+                    manifest = self.read_manifest(path)
+                except FileNotFoundError:
+                    continue  # Deleted by hand; its references cannot be released without it
+                refs.update(manifest_hashes(manifest))
+                os.remove(path)
+                guild_id = manifest['metadata']['guild_id']
+                summary = self._summaries.get(guild_id)
+                if summary is not None and summary.snapshot == path:
+                    del self._summaries[guild_id]
+            self.catalog.remove_many(paths)
+            # One release for the whole batch: objects shared by the expired snapshots are only looked at once
+            return self._release(refs, archiver)
+
+    def _release(self, refs: Counter, archiver=None) -> List[str]:
+        """Drop references, deleting objects that reach zero and then releasing what they referenced"""
+        freed_assets = []
+        freed = self.catalog.release_refs(refs)
+        while freed:
+            refs = Counter()
+            for digest, is_asset in freed:
+                if is_asset:
+                    # Re-checked right before the unlink: only a count of zero makes the file safe to remove
+                    if archiver is not None and self.catalog.refs(digest) == 0:
+                        archiver.delete(digest)
+                    freed_assets.append(digest)
+                    continue
+                try:
+                    objects, assets = object_children(self.get(digest))
+                except FileNotFoundError:
+                    continue
+                refs.update(objects)
+                refs.update(assets)
+                for compression in self._formats:
+                    path = self._object_path(digest, compression)
+                    if os.path.exists(path):
+                        self.stats['bytes_freed'] += os.path.getsize(path)
+                        os.remove(path)
+                self.stats['objects_deleted'] += 1
+            freed = self.catalog.release_refs(refs) if refs else []
+        return freed_assets
+
+    def count_references(self):
+        """Rebuild every reference count from the catalogued manifests, for snapshots written before counting"""
+        with self._lock:
+            self.catalog.reset_refs()
+            objects = Counter()
+            assets = Counter()
+            for entry in self.catalog.entries():
+                if entry['kind'] not in SNAPSHOT_KINDS:
+                    continue
+                try:
+                    objects.update(manifest_hashes(self.read_manifest(entry['path'])))
+                except Exception as e:
+                    logger.error(f"Error reading snapshot manifest {entry['path']}: {e}")
+
+            # Each object counts its children once, however many manifests list it
+            pending = list(objects)
+            seen = set(pending)
+            while pending:
+                digest = pending.pop()
+                try:
+                    children, child_assets = object_children(self.get(digest))
+                except FileNotFoundError:
+                    continue
+                objects.update(children)
+                assets.update(child_assets)
+                pending.extend(child for child in children if child not in seen)
+                seen.update(children)
+
+            self.catalog.add_refs(objects)
+            self.catalog.add_refs(assets, asset=True)
+            self.catalog.set_meta('refs_complete', '1')
+            logger.info(f"📇 Counted references to {len(objects)} snapshot objects and {len(assets)} assets")
+
+    def read_manifest(self, path: str) -> Dict:
+        with open(path, 'rb') as f:
+            return json.loads(f.read())
+
+    def read_snapshot(self, path: str) -> Dict:
+        """Rebuild the full backup dict a manifest describes"""
+        manifest = self.read_manifest(path)
+        backup = {'metadata': manifest['metadata'], 'settings': self.get(manifest['settings'])}
+        for section in ITEM_SECTIONS:
+            items = [self.get(digest) for digest in manifest[section]]
+            if section == 'channels':
+                for item in items:
+                    item['permissions'] = self.get(item['permissions'])
+            backup[section] = items
+        return backup
+
+    def snapshots(self, guild_id: int) -> List[str]:
+        """Manifest paths for a guild, oldest first"""
+        if self.catalog is not None:
+            return [entry['path'] for entry in self.catalog.entries(guild_id, KIND_SNAPSHOT, newest_first=False)]
+        directory = self._snapshot_dir(guild_id)
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                if name.endswith('.json') and not name.endswith(INCIDENT_SUFFIX)]
+
+    def summary(self, guild_id: int) -> Optional[GuildSummary]:
+        """Summary of the newest snapshot for a guild, read from its manifest on first use"""
+        summary = self._summaries.get(guild_id)
+        if summary is None:
+            if self.catalog is not None:
+                entry = self.catalog.latest(guild_id, KIND_SNAPSHOT)
+                path = entry['path'] if entry else None
+            else:
+                paths = self.snapshots(guild_id)
+                path = paths[-1] if paths else None
+            if path is None:
+                return None
+            try:
+                summary = self._summaries[guild_id] = GuildSummary(path, self.read_manifest(path))
+            except Exception as e:
+                logger.error(f"Error reading snapshot manifest {path}: {e}")
+                return None
+        return summary
+
+    def summaries(self) -> List[GuildSummary]:
+        return list(self._summaries.values())
+
+    def find(self, name: str) -> Optional[str]:
+        """Manifest path for a snapshot file name such as ``<guild_id>_<timestamp>.json``"""
+        guild_id = name.split('_')[0]
+        path = os.path.join(self.directory, 'snapshots', guild_id, name)
+        return path if os.path.exists(path) else None
+
+
+def content_hash(manifest: Dict) -> str:
+    """Hash of a manifest without its metadata, which changes on every snapshot"""
+    return object_hash(canonical({key: value for key, value in manifest.items() if key != 'metadata'}))
@@ -0,0 +1,70 @@
+"""
+Tests for the REST action scheduler
+"""
+
+import unittest
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from action_scheduler import ActionScheduler, ActionPriority, route_bucket
+
+class TestActionScheduler(unittest.IsolatedAsyncioTestCase):
+    async def test_priority_order_within_bucket(self):
+        """Test that containment actions run before cosmetic ones in the same bucket"""
+        scheduler = ActionScheduler(bucket_concurrency=1)
+        order = []
+        
+        async def record(name):
+            order.append(name)
+        
+        futures = [
+            scheduler.submit('bucket', lambda: record('cosmetic'), priority=ActionPriority.COSMETIC),
+            scheduler.submit('bucket', lambda: record('restore'), priority=ActionPriority.RESTORATION),
+            scheduler.submit('bucket', lambda: record('contain'), priority=ActionPriority.CONTAINMENT)
+        ]
+        await asyncio.gather(*futures)
+        
+        self.assertEqual(order, ['contain', 'restore', 'cosmetic'])
+    
+    async def test_coalesces_redundant_edits(self):
+        """Test that queued edits to the same object run once with the latest payload"""
+        scheduler = ActionScheduler(bucket_concurrency=1)
+        applied = []
+        
+        async def edit(value):
+            applied.append(value)
+            return value
+        
+        first = scheduler.submit('bucket', lambda: edit('old'), key=('role', 1))
+        second = scheduler.submit('bucket', lambda: edit('new'), priority=ActionPriority.CONTAINMENT, key=('role', 1))
+        
+        await asyncio.gather(first, second)
+        
+        self.assertIs(first, second)
+        self.assertEqual(applied, ['new'])
+        metrics = scheduler.get_metrics()
+        self.assertEqual(metrics['priorities']['containment']['coalesced'], 1)
+        self.assertEqual(metrics['queue_depth'], 0)
+    
+    async def test_failures_propagate(self):
+        """Test that action errors are returned to the caller and counted"""
+        scheduler = ActionScheduler()
+        
+        async def fail():
+            raise RuntimeError("boom")
+        
+        with self.assertRaises(RuntimeError):
+            await scheduler.run('bucket', fail, priority=ActionPriority.BAN)
+        self.assertEqual(scheduler.get_metrics()['priorities']['ban']['failed'], 1)
+    
+    def test_route_bucket_uses_major_parameters(self):
+        """Test that bucket keys follow discord.py's route key and major parameters"""
+        bucket = route_bucket('PATCH', '/guilds/{guild_id}/roles/{role_id}', guild_id=1, role_id=2)
+        self.assertEqual(bucket, 'PATCH /guilds/{guild_id}/roles/{role_id}:1')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Tests for emoji and guild image archival
+"""
+
+import unittest
+import tempfile
+import sys
+import os
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from action_scheduler import ActionScheduler
+from asset_archiver import AssetArchiver
+from backup_catalog import BackupCatalog
+from restore_planner import RestorePlanner
+from tests.test_restore_planner import FakeGuild, make_backup
+
+ASSETS = {'/emojis/1.png': b'wave', '/emojis/2.png': b'smile', '/emojis/3.png': b'wave', '/icons/1/a.png': b'icon'}
+
+class TestAssetArchiver(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = []
+
+        async def serve(request):
+            self.requests.append(request.path)
+            if request.path not in ASSETS:
+                raise web.HTTPNotFound()
+            return web.Response(body=ASSETS[request.path], content_type='image/png')
+
+        app = web.Application()
+        app.router.add_get('/{path:.*}', serve)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.directory = tempfile.mkdtemp()
+        self.catalog = BackupCatalog(self.directory)
+        self.archiver = AssetArchiver(self.directory, self.catalog, concurrency=2)
+
+    async def asyncTearDown(self):
+        await self.archiver.close()
+        await self.server.close()
+        self.catalog.close()
+
+    def url(self, path):
+        return str(self.server.make_url(path))
+
+    async def test_assets_are_downloaded_once_and_stored_by_content(self):
+        """Test that identical bytes share a file, failures are skipped and known URLs are never fetched again"""
+        urls = [self.url(path) for path in (*ASSETS, '/emojis/404.png')]
+        archived = await self.archiver.archive(urls + [urls[0], None])
+
+        self.assertEqual(len(archived), 4)
+        self.assertEqual(archived[urls[0]], archived[urls[2]])
+        self.assertEqual(self.archiver.read(archived[urls[1]]), b'smile')
+        self.assertEqual(self.archiver.stats['objects_written'], 3)
+        self.assertEqual(self.archiver.stats['failed'], 1)
+        self.assertEqual(len(self.requests), 5)
+
+        restarted = AssetArchiver(self.directory, self.catalog)
+        self.assertEqual(await restarted.archive(urls[:4]), archived)
+        self.assertEqual(len(self.requests), 5)
+        self.assertEqual(restarted.report()['dedup_ratio'], 1.0)
+
+    async def test_cached_url_is_fetched_again_after_its_file_is_deleted(self):
+        """Test that a cached URL whose file was removed is downloaded again instead of returning a dangling hash"""
+        url = self.url('/icons/1/a.png')
+        digest = (await self.archiver.archive([url]))[url]
+        os.remove(self.archiver.path(digest))
+
+        self.assertEqual(await self.archiver.archive([url]), {url: digest})
+        self.assertTrue(self.archiver.has(digest))
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_restore_uploads_deleted_emojis_and_icon(self):
+        """Test that a restore re-uploads archived emojis and the icon, and skips emojis that still exist"""
+        urls = [self.url(path) for path in ASSETS]
+        archived = await self.archiver.archive(urls)
+        backup = make_backup()
+        backup['settings']['icon_asset'] = archived[urls[3]]
+        backup['emojis'] = [{'name': name, 'url': url, 'animated': False, 'asset': archived[url]}
+                            for name, url in zip(('wave', 'smile'), urls)]
+
+        guild = FakeGuild()
+        guild.emojis.append(type('Emoji', (), {'name': 'smile'}))
+        planner = RestorePlanner(ActionScheduler(), self.archiver)
+        await planner.execute(guild, planner.plan(guild, backup))
+
+        self.assertEqual([(emoji.name, emoji.image) for emoji in guild.emojis[1:]], [('wave', b'wave')])
+        self.assertEqual(guild.icon, b'icon')
+        self.assertEqual(planner.plan(guild, backup).ops, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Tests for audit-log actor attribution
+"""
+
+import unittest
+from unittest.mock import AsyncMock, Mock
+import asyncio
+import sys
+import os
+from datetime import datetime, timezone
+
+import discord
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from action_scheduler import ActionScheduler
+from audit_log_poller import AuditLogPoller
+from event_pipeline import GuildActionEvent
+
+class FakeGuild:
+    def __init__(self):
+        self.id = 1
+        self.name = "Test Guild"
+        self.entries = []
+        self.calls = []
+    
+    def audit_logs(self, **options):
+        self.calls.append(options)
+        after = options.get('after')
+        entries = [entry for entry in self.entries if after is None or entry.id > after.id]
+        
+        async def iterate():
+            for entry in entries:
+                yield entry
+        return iterate()
+
+def make_entry(entry_id, actor_id, action, target_id):
+    return Mock(id=entry_id, user=Mock(id=actor_id), action=action,
+                target=Mock(id=target_id), created_at=datetime.now(timezone.utc))
+
+class TestAuditLogPoller(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_is_attributed_with_one_fetch(self):
+        """Test that a burst of deletions costs one audit-log request and gets actors"""
+        guild = FakeGuild()
+        on_rogue = AsyncMock()
+        poller = AuditLogPoller(ActionScheduler(), on_rogue_actor=on_rogue, burst_window=0.01, rogue_threshold=5)
+        
+        events = []
+        for channel_id in range(6):
+            guild.entries.append(make_entry(100 + channel_id, 42, discord.AuditLogAction.channel_delete, channel_id))
+            event = GuildActionEvent(guild, 'channel_delete', channel_id, f'channel-{channel_id}')
+            events.append(event)
+            await poller.handle_event(event)
+        
+        await guild_fetch_done(poller, guild)
+        
+        self.assertEqual(len(guild.calls), 1)
+        self.assertTrue(all(event.actor_id == 42 for event in events))
+        self.assertEqual(poller.actor_rates(guild.id), {42: 6})
+        on_rogue.assert_awaited_once_with(guild, 42, 6)
+    
+    async def test_entries_are_counted_once(self):
+        """Test that later fetches skip audit entries already seen"""
+        guild = FakeGuild()
+        poller = AuditLogPoller(ActionScheduler(), burst_window=0.01)
+        guild.entries.append(make_entry(100, 7, discord.AuditLogAction.role_delete, 1))
+        
+        self.assertEqual(await poller.poll(guild), 1)
+        self.assertEqual(await poller.poll(guild), 0)
+        self.assertEqual(guild.calls[1]['after'].id, 100)
+        self.assertEqual(poller.actor_rates(guild.id), {7: 1})
+
+    async def test_moderator_bans_are_not_rogue_actions(self):
+        """Test that bans and kicks are attributed but never count toward isolation"""
+        guild = FakeGuild()
+        on_rogue = AsyncMock()
+        poller = AuditLogPoller(ActionScheduler(), on_rogue_actor=on_rogue, burst_window=0.01, rogue_threshold=5)
+        
+        events = []
+        for user_id in range(10):
+            action = discord.AuditLogAction.ban if user_id % 2 else discord.AuditLogAction.kick
+            guild.entries.append(make_entry(100 + user_id, 42, action, user_id))
+            event = GuildActionEvent(guild, 'ban' if user_id % 2 else 'kick', user_id, f'raider-{user_id}')
+            events.append(event)
+            await poller.handle_event(event)
+        
+        await guild_fetch_done(poller, guild)
+        
+        self.assertTrue(all(event.actor_id == 42 for event in events))
+        self.assertEqual(poller.actor_rates(guild.id), {})
+        on_rogue.assert_not_awaited()
+
+async def guild_fetch_done(poller, guild):
+    task = poller._guilds[guild.id].fetch_task
+    await asyncio.wait_for(task, timeout=1)
+
+if __name__ == '__main__':
+    unittest.main()
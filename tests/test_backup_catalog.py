@@ -0,0 +1,65 @@
+"""
+Tests for the SQLite backup catalog
+"""
+
+import unittest
+import tempfile
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backup_catalog import BackupCatalog, KIND_BOT, KIND_FULL, KIND_SNAPSHOT
+from snapshot_store import SnapshotStore
+
+class TestBackupCatalog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.catalog = BackupCatalog(self.directory)
+
+    def tearDown(self):
+        self.catalog.close()
+
+    def test_latest_listing_and_expiry(self):
+        """Test that lookups come from the index, newest first, per guild and kind"""
+        for index in range(5):
+            self.catalog.record(os.path.join(self.directory, f'1_backup_{index}.json'), KIND_FULL,
+                                1000 + index, 10, guild_id=1)
+        self.catalog.record(os.path.join(self.directory, '2_backup_0.json'), KIND_FULL, 5000, 10, guild_id=2)
+        self.catalog.record(os.path.join(self.directory, 'full_backup_0.json.gz'), KIND_BOT, 500, 99)
+
+        self.assertEqual(self.catalog.latest(1)['path'], os.path.join(self.directory, '1_backup_4.json'))
+        self.assertEqual(self.catalog.latest(None)['kind'], KIND_BOT)
+        self.assertEqual([entry['created_ms'] for entry in self.catalog.entries(1, limit=2)], [1004, 1003])
+        self.assertEqual(len(self.catalog.older_than(1002, KIND_FULL)), 2)
+
+        self.catalog.remove(os.path.join(self.directory, '1_backup_4.json'))
+        self.assertEqual(self.catalog.latest(1)['created_ms'], 1003)
+        self.assertEqual(len(self.catalog), 6)
+
+    def test_snapshots_recorded_and_existing_files_imported(self):
+        """Test that the store records manifests and a fresh catalog imports files already on disk"""
+        store = SnapshotStore(self.directory, catalog=self.catalog)
+        path = store.write_snapshot({
+            'metadata': {'guild_id': 7, 'created_at': '2026-01-01T10:00:00'},
+            'settings': {'name': 'Guild'},
+            'channels': [{'id': 1, 'name': 'general', 'permissions': {}}]
+        })
+        entry = self.catalog.latest(7, KIND_SNAPSHOT)
+        self.assertEqual(entry['path'], path)
+        self.assertGreater(entry['size'], 0)
+        self.assertIsNotNone(entry['hash'])
+
+        with open(os.path.join(self.directory, '7_backup_20250101_000000.json'), 'w') as f:
+            f.write('{}')
+        self.catalog.close()
+        os.remove(self.catalog.path)
+
+        rebuilt = BackupCatalog(self.directory)
+        self.assertEqual({entry['kind'] for entry in rebuilt.entries(7)}, {KIND_SNAPSHOT, KIND_FULL})
+        self.assertEqual(SnapshotStore(self.directory, catalog=rebuilt).summary(7).snapshot, path)
+        rebuilt.close()
+
+if __name__ == '__main__':
+    unittest.main()
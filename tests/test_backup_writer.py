@@ -0,0 +1,42 @@
+"""
+Tests for off-loop backup serialization
+"""
+
+import unittest
+import tempfile
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backup_writer import BACKUP_FORMATS, BackupWriter
+
+BACKUP = {
+    'metadata': {'guild_id': 1, 'guild_name': 'Test Guild ✨'},
+    'channels': [{'id': i, 'name': f'channel-{i}', 'permissions': {str(i): {'allow': 0, 'deny': 1024}}}
+                 for i in range(50)],
+    'roles': []
+}
+
+class TestBackupWriter(unittest.IsolatedAsyncioTestCase):
+    async def test_round_trip_every_format(self):
+        """Test that each encoding reads back identically and leaves no temporary file"""
+        directory = tempfile.mkdtemp()
+        sizes = {}
+        for compression, (suffix, _, _) in BACKUP_FORMATS.items():
+            writer = BackupWriter(directory, compression)
+            path = await writer.write(f'1_backup_{compression}', BACKUP)
+            
+            self.assertTrue(path.endswith(suffix))
+            self.assertEqual(await writer.read(path), BACKUP)
+            sizes[compression] = writer.bytes_written
+        
+        self.assertFalse([name for name in os.listdir(directory) if name.endswith('.tmp')])
+        self.assertLess(sizes['gzip'], sizes['json'])
+    
+    def test_unknown_compression_falls_back(self):
+        self.assertEqual(BackupWriter(tempfile.mkdtemp(), 'zstd').compression, 'json')
+
+if __name__ == '__main__':
+    unittest.main()
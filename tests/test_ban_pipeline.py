@@ -0,0 +1,56 @@
+"""
+Tests for the bulk ban pipeline
+"""
+
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from action_scheduler import ActionScheduler
+from ban_pipeline import BanPipeline
+
+class TestBanPipeline(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.bot = Mock()
+        self.guild = SimpleNamespace(id=1, name='guild', ban=AsyncMock())
+        self.pipeline = BanPipeline(self.bot, ActionScheduler())
+    
+    async def test_bulk_bans_in_chunks(self):
+        """Test that candidates are submitted 200 at a time"""
+        async def bulk_ban(route, json, reason):
+            return {'banned_users': json['user_ids'], 'failed_users': []}
+        
+        self.bot.http.request = AsyncMock(side_effect=bulk_ban)
+        report = await self.pipeline.ban(self.guild, range(450), reason="raid")
+        
+        self.assertEqual(self.bot.http.request.await_count, 3)
+        self.assertEqual(report['banned'], 450)
+        self.assertTrue(self.pipeline.is_banned(1, 449))
+    
+    async def test_deduplicates_known_bans(self):
+        """Test that duplicate and already banned IDs are skipped"""
+        self.bot.http.request = AsyncMock(return_value={'banned_users': ['2'], 'failed_users': []})
+        self.pipeline.mark_banned(1, 1)
+        
+        report = await self.pipeline.ban(self.guild, [1, 2, 2], reason="raid")
+        
+        self.assertEqual(report['skipped_duplicates'], 2)
+        self.assertEqual(self.bot.http.request.await_args.kwargs['json']['user_ids'], ['2'])
+    
+    async def test_falls_back_to_single_bans(self):
+        """Test that a failed bulk request falls back to concurrent single bans"""
+        self.bot.http.request = AsyncMock(side_effect=RuntimeError("bulk ban unavailable"))
+        
+        report = await self.pipeline.ban(self.guild, [10, 11, 12], reason="raid")
+        
+        self.assertEqual(self.guild.ban.await_count, 3)
+        self.assertEqual(report['banned'], 3)
+        self.assertEqual(report['failed'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
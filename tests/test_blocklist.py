@@ -0,0 +1,97 @@
+"""
+Tests for the shared raider blocklist
+"""
+
+import unittest
+from unittest.mock import patch
+import asyncio
+import tempfile
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blocklist import BloomFilter, SharedBlocklist
+
+class TestSharedBlocklist(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+    
+    def test_membership_after_add_and_compact(self):
+        """Test that flagged IDs are found before and after compaction"""
+        blocklist = SharedBlocklist(self.directory)
+        self.assertEqual(blocklist.add_many([30, 10, 20, 10]), 3)
+        self.assertIn(20, blocklist)
+        self.assertNotIn(40, blocklist)
+        
+        blocklist.compact()
+        self.assertIn(10, blocklist)
+        self.assertNotIn(15, blocklist)
+        self.assertEqual(len(blocklist), 3)
+        blocklist.close()
+    
+    def test_persists_across_restarts(self):
+        """Test that both compacted and pending IDs survive reopening"""
+        blocklist = SharedBlocklist(self.directory)
+        blocklist.add_many([1, 2])
+        blocklist.compact()
+        blocklist.add(3)
+        blocklist.close()
+        
+        reopened = SharedBlocklist(self.directory)
+        self.assertTrue(all(user_id in reopened for user_id in (1, 2, 3)))
+        self.assertEqual(len(reopened), 3)
+        reopened.close()
+    
+    def test_removed_ids_stay_unflagged(self):
+        """Test that unflagged IDs are gone before and after compaction and restarts, and can be flagged again"""
+        blocklist = SharedBlocklist(self.directory)
+        blocklist.add_many([1, 2, 3])
+        blocklist.compact()
+        blocklist.add(4)
+        self.assertTrue(blocklist.remove(2))
+        self.assertTrue(blocklist.remove(4))
+        self.assertFalse(blocklist.remove(5))
+        blocklist.close()
+        
+        reopened = SharedBlocklist(self.directory)
+        self.assertEqual([user_id in reopened for user_id in (1, 2, 3, 4)], [True, False, True, False])
+        self.assertEqual(len(reopened), 2)
+        reopened.compact()
+        self.assertNotIn(2, reopened)
+        self.assertEqual(len(reopened), 2)
+        
+        self.assertTrue(reopened.add(2))
+        self.assertIn(2, reopened)
+        reopened.close()
+    
+    @patch('blocklist.COMPACT_THRESHOLD', 3)
+    def test_compaction_runs_off_the_event_loop(self):
+        """Test that reaching the threshold from the event loop compacts in a worker thread"""
+        blocklist = SharedBlocklist(self.directory)
+        
+        async def flag():
+            blocklist.add_many([1, 2])
+            blocklist.remove(1)
+            blocklist.add_many([3, 4])
+            self.assertEqual(len(blocklist._pending), 4)  # Not compacted inline
+            while blocklist._pending:
+                await asyncio.sleep(0.01)
+        
+        asyncio.run(asyncio.wait_for(flag(), timeout=5))
+        self.assertEqual([user_id in blocklist for user_id in (1, 2, 3, 4)], [False, True, True, True])
+        self.assertEqual((len(blocklist), blocklist._removed), (3, set()))
+        blocklist.close()
+    
+    def test_bloom_filter_has_no_false_negatives(self):
+        """Test that every added ID is reported as possibly present"""
+        bloom = BloomFilter(os.path.join(self.directory, 'test.bloom'), num_bits=1 << 16)
+        user_ids = range(10**17, 10**17 + 1000)
+        for user_id in user_ids:
+            bloom.add(user_id)
+        self.assertTrue(all(user_id in bloom for user_id in user_ids))
+        bloom.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Tests for change-tracked delta snapshots
+"""
+
+import unittest
+from unittest.mock import Mock, AsyncMock
+import tempfile
+import copy
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from change_tracker import ChangeTracker
+from defense_system import DefenseSystem
+from incident import Incident, IncidentPhase
+from snapshot_store import SnapshotStore
+from tests.test_snapshot_store import make_backup
+
+class TestChangeTracker(unittest.IsolatedAsyncioTestCase):
+    def test_settles_after_quiet_period_or_max_delay(self):
+        """Test that a guild settles once edits pause, and a busy guild still settles after the max delay"""
+        tracker = ChangeTracker()
+        for now in range(0, 50_000, 10_000):
+            tracker.mark(1, 'channels', now, now=now)
+        tracker.mark(2, 'settings', now=50_000)
+
+        self.assertEqual(tracker.settled(60_000, 600_000, now=60_000), [])
+        self.assertEqual(tracker.settled(60_000, 600_000, now=100_000), [1])
+        self.assertEqual(tracker.settled(60_000, 50_000, now=60_000), [1])
+
+        changes = tracker.take(1)
+        self.assertEqual(changes.channels, {0, 10_000, 20_000, 30_000, 40_000})
+        tracker.mark(1, 'roles', 5)
+        tracker.merge(1, changes)
+        self.assertEqual(len(tracker.take(1)), 6)
+
+    def test_delta_snapshot_encodes_only_marked_items(self):
+        """Test that marked items are re-encoded and unmarked ones keep the previous snapshot's hash"""
+        store = SnapshotStore(tempfile.mkdtemp())
+        first = make_backup(1, '2026-01-01T10:00:00')
+        store.write_snapshot(first)
+
+        second = copy.deepcopy(first)
+        second['metadata']['created_at'] = '2026-01-01T11:00:00'
+        second['channels'][3]['name'] = 'renamed'
+        second['channels'][4]['name'] = 'missed'
+        tracker = ChangeTracker()
+        tracker.mark(1, 'channels', 3)
+        path = store.write_snapshot(second, tracker.take(1))
+
+        self.assertEqual(store.stats['objects_written'], 28 + 1)
+        self.assertEqual(store.stats['items_reused'], 1 + 19 + 5 + 1)
+        expected = copy.deepcopy(second)
+        expected['channels'][4]['name'] = 'channel-4'
+        self.assertEqual(store.read_snapshot(path), expected)
+
+    async def test_raid_changes_wait_for_the_incident_to_end(self):
+        """Test that settled changes are held while an incident is active and snapshotted once it is resolved"""
+        defense_system = DefenseSystem(Mock())
+        defense_system.bot.get_guild = lambda guild_id: Mock(id=guild_id)
+        defense_system.create_comprehensive_backup = AsyncMock(return_value='backup.json')
+        incident = defense_system.get_state(1).incident = Incident(1, 'raid', 3)
+        incident.transition(IncidentPhase.CONTAINING)
+        for guild_id in (1, 2):
+            defense_system.change_tracker.mark(guild_id, 'channels', 10, now=0)
+
+        self.assertEqual(await defense_system.snapshot_changed_guilds(), 1)
+        self.assertEqual(len(defense_system.change_tracker), 1)
+        guild, changes = defense_system.create_comprehensive_backup.await_args.args
+        self.assertEqual((guild.id, changes.channels), (2, {10}))
+
+        incident.transition(IncidentPhase.RECOVERING)
+        incident.transition(IncidentPhase.IDLE)
+        self.assertEqual(await defense_system.snapshot_changed_guilds(), 1)
+        self.assertEqual(len(defense_system.change_tracker), 0)
+        guild, changes = defense_system.create_comprehensive_backup.await_args.args
+        self.assertEqual((guild.id, changes.channels), (1, {10}))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Tests for the combat log segment store
+"""
+
+import unittest
+import tempfile
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from combat_log_store import CombatLogStore
+
+class TestCombatLogStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+    
+    def make_store(self, max_segments=3):
+        return CombatLogStore(self.directory, segment_bytes=512, max_segments=max_segments, ring_size=10, guild_ring_size=5)
+    
+    def test_recent_entries_by_guild(self):
+        """Test that recent entries are served per guild in chronological order"""
+        store = self.make_store()
+        for i in range(8):
+            store.append({'action': f'A{i}', 'guild_id': i % 2})
+        
+        self.assertEqual([log['action'] for log in store.recent(3)], ['A5', 'A6', 'A7'])
+        self.assertEqual([log['action'] for log in store.recent(2, guild_id=0)], ['A4', 'A6'])
+        self.assertEqual(store.recent(5, guild_id=99), [])
+    
+    def test_rotation_keeps_disk_bounded(self):
+        """Test that old segments are dropped once the retention limit is reached"""
+        store = self.make_store()
+        for i in range(200):
+            store.append({'action': 'BAN', 'guild_id': 1, 'seq': i})
+        
+        segments = [name for name in os.listdir(self.directory) if name.endswith('.jsonl')]
+        self.assertLessEqual(len(segments), 3)
+        self.assertLess(len(store), 200)
+        self.assertEqual(store.recent(1)[0]['seq'], 199)
+    
+    def test_history_survives_restart(self):
+        """Test that a new store reloads recent entries and the guild/time index"""
+        store = self.make_store(max_segments=20)
+        start = datetime.now() - timedelta(hours=1)
+        for i in range(30):
+            store.append({'action': 'EVENT', 'guild_id': 7 if i < 15 else 8, 'seq': i,
+                          'timestamp': start + timedelta(minutes=i)})
+        store.close()
+        
+        reloaded = self.make_store(max_segments=20)
+        self.assertEqual(len(reloaded), len(store))
+        self.assertEqual(reloaded.recent(1)[0]['seq'], 29)
+        self.assertIsInstance(reloaded.recent(1)[0]['timestamp'], datetime)
+        
+        guild_logs = reloaded.query(guild_id=7, since=start + timedelta(minutes=10))
+        self.assertEqual([log['seq'] for log in guild_logs], [14, 13, 12, 11, 10])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Tests for the graduated countermeasure ladder
+"""
+
+import unittest
+from unittest.mock import AsyncMock, Mock
+import sys
+import os
+
+import discord
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from action_scheduler import ActionScheduler
+from countermeasure_ladder import (CountermeasureLadder, LadderState, LadderStep, RAID_VERIFICATION_LEVEL,
+                                   SLOWMODE_DELAY, step_for)
+
+class TestCountermeasureLadder(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.channels = {
+            channel_id: Mock(id=channel_id, slowmode_delay=0, edit=AsyncMock())
+            for channel_id in (10, 11)
+        }
+        self.guild = Mock(id=1, verification_level=discord.VerificationLevel.low, features=[],
+                          edit=AsyncMock(), get_channel=self.channels.get)
+        self.guild.name = "Test Guild"
+        self.lockdown = AsyncMock(return_value=120)
+        self.ladder = CountermeasureLadder(ActionScheduler(), on_lockdown=self.lockdown)
+    
+    def test_threat_levels_map_to_steps(self):
+        self.assertEqual(step_for(6), LadderStep.SLOWMODE)
+        self.assertEqual(step_for(7), LadderStep.PAUSE_INVITES)
+        self.assertEqual(step_for(9), LadderStep.LOCKDOWN)
+    
+    async def test_cheap_steps_report_cost(self):
+        """Test that the first three steps cost a handful of calls and never lock down"""
+        state = LadderState()
+        reports = await self.ladder.climb(self.guild, state, LadderStep.PAUSE_INVITES,
+                                          list(self.channels.values()), "spam")
+        
+        self.assertEqual([report['api_calls'] for report in reports], [1, 2, 1])
+        self.assertEqual(state.step, LadderStep.PAUSE_INVITES)
+        self.assertEqual(state.slowmode, {10: 0, 11: 0})
+        self.guild.edit.assert_any_await(verification_level=RAID_VERIFICATION_LEVEL)
+        self.guild.edit.assert_any_await(invites_disabled=True)
+        self.channels[10].edit.assert_awaited_once_with(slowmode_delay=SLOWMODE_DELAY)
+        self.lockdown.assert_not_awaited()
+        
+        # Climbing again only applies the new step
+        reports = await self.ladder.climb(self.guild, state, LadderStep.LOCKDOWN, [], "raid")
+        self.assertEqual(reports[0]['step'], 'lockdown')
+        self.assertEqual(reports[0]['api_calls'], 120)
+        self.assertEqual(LadderState.from_dict(state.to_dict()).slowmode, state.slowmode)
+    
+    async def test_rollback_keeps_manual_changes(self):
+        """Test that rollback restores only settings nobody changed since"""
+        state = LadderState()
+        await self.ladder.climb(self.guild, state, LadderStep.PAUSE_INVITES, list(self.channels.values()), "spam")
+        
+        self.guild.verification_level = RAID_VERIFICATION_LEVEL
+        self.guild.features = ['INVITES_DISABLED']
+        self.channels[10].slowmode_delay = SLOWMODE_DELAY
+        self.channels[11].slowmode_delay = 5  # Changed by a moderator
+        self.guild.edit.reset_mock()
+        
+        self.assertEqual(await self.ladder.rollback(self.guild, state), 3)
+        self.guild.edit.assert_any_await(verification_level=discord.VerificationLevel.low)
+        self.guild.edit.assert_any_await(invites_disabled=False)
+        self.channels[10].edit.assert_awaited_with(slowmode_delay=0)
+        self.assertEqual(self.channels[11].edit.await_count, 1)
+        self.assertEqual(state.step, LadderStep.NONE)
+
+if __name__ == '__main__':
+    unittest.main()
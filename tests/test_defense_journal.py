@@ -0,0 +1,161 @@
+"""
+Tests for defense state journaling and crash recovery
+"""
+
+import unittest
+from unittest.mock import Mock
+import tempfile
+import sys
+import os
+from datetime import datetime, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.fernet import Fernet
+
+from defense_system import DefenseSystem
+from defense_journal import DefenseJournal
+from combat_log_store import CombatLogStore
+from event_pipeline import GuildActionEvent
+from incident import Incident, IncidentPhase
+
+class TestDefenseJournal(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+    
+    def make_system(self, secret=None):
+        defense_system = DefenseSystem(Mock(config={'journal_key_secret': secret}))
+        defense_system.combat_logs = CombatLogStore(tempfile.mkdtemp())
+        defense_system.journal = DefenseJournal(self.directory)
+        return defense_system
+    
+    async def populate(self, defense_system, guild_id, joins):
+        guild = Mock(id=guild_id)
+        for user_id in range(joins):
+            member = Mock(id=user_id, display_name=f"user{user_id}", avatar=None,
+                          created_at=datetime.now(timezone.utc))
+            await defense_system.track_member_join(guild, member)
+        defense_system.track_guild_action(GuildActionEvent(guild, 'channel_delete', 99, 'general'))
+        
+        state = defense_system.get_state(guild_id)
+        state.incident = Incident(guild_id, "Mass mention spam detected", 6)
+        state.incident.transition(IncidentPhase.CONTAINING)
+        state.threat_level = 6
+        defense_system.journal_flags(state)
+        
+        overwrites = {'channel_id': 5, 'original': {1: (0, 0, 0)}, 'applied': {1: (0, 0, 1024)}}
+        defense_system.apply_journal_record('overwrites', guild_id, overwrites)
+        defense_system.journal.append('overwrites', guild_id, overwrites)
+    
+    def assert_recovered(self, recovered, guild_id, joins):
+        state = recovered.get_state(guild_id)
+        self.assertEqual(len(state.join_history), joins)
+        self.assertIsInstance(state.join_history[-1]['timestamp'], datetime)
+        self.assertEqual(len(state.suspicious_activities['rapid_joins']), joins)
+        self.assertEqual(state.coordinated_actions[0].target_name, 'general')
+        self.assertEqual(state.threat_level, 6)
+        self.assertEqual(state.incident.phase, IncidentPhase.CONTAINING)
+        self.assertEqual(recovered.overwrite_snapshots[guild_id].applied[5], {1: (0, 0, 1024)})
+    
+    async def test_recover_from_journal(self):
+        """Test that a new process rebuilds state by replaying the journal"""
+        original = self.make_system()
+        await self.populate(original, 1, 10)
+        original.journal.close()
+        
+        recovered = self.make_system()
+        stats = recovered.recover_state()
+        
+        self.assertFalse(stats['from_snapshot'])
+        self.assert_recovered(recovered, 1, 10)
+        self.assertEqual(recovered.recover_state(), {})  # Only once per process
+    
+    async def test_recover_from_snapshot_and_tail(self):
+        """Test that a snapshot replaces the journal it covers and the tail is replayed"""
+        original = self.make_system()
+        await self.populate(original, 1, 10)
+        await original.checkpoint()
+        await self.populate(original, 2, 3)
+        original.journal.close()
+        
+        recovered = self.make_system()
+        stats = recovered.recover_state()
+        
+        self.assertTrue(stats['from_snapshot'])
+        self.assertLess(stats['replayed_records'], 10)
+        self.assert_recovered(recovered, 1, 10)
+        self.assert_recovered(recovered, 2, 3)
+    
+    async def test_torn_write_is_ignored(self):
+        """Test that a partial last line from a crash does not break recovery"""
+        original = self.make_system()
+        await self.populate(original, 1, 2)
+        original.journal._file.write('[999, "join", 1, {"user')
+        original.journal.close()
+        
+        recovered = self.make_system()
+        recovered.recover_state()
+        self.assert_recovered(recovered, 1, 2)
+
+    def journal_text(self):
+        text = ''
+        for name in os.listdir(self.directory):
+            with open(os.path.join(self.directory, name)) as f:
+                text += f.read()
+        return text
+    
+    async def test_messages_are_journaled_as_fingerprints(self):
+        """Test that message text never reaches the journal while the spam detectors still work"""
+        original = self.make_system()
+        guild = Mock(id=1)
+        for user_id in range(12):
+            message = Mock(content="  FREE NITRO @everyone  ", author=Mock(id=user_id), channel=Mock(id=5))
+            await original.track_message_pattern(guild, message)
+        original.journal.close()
+        
+        self.assertNotIn('NITRO', self.journal_text())
+        recovered = self.make_system()
+        recovered.recover_state()
+        messages = list(recovered.get_state(1).message_patterns)
+        self.assertEqual(len(messages), 12)
+        self.assertTrue(messages[0]['mentions_everyone'])
+        self.assertTrue(recovered.detect_repetitive_content(messages))
+    
+    async def encrypt_guild(self, defense_system, key):
+        defense_system.encryption_keys[1] = key
+        defense_system.encrypted_channels[5] = {
+            'guild_id': 1, 'channel_name': 'general', 'encrypted_at': datetime.now(), 'backup_file': None
+        }
+        defense_system.channel_backup_data[5] = {'messages': defense_system.encrypt_data('[]', key)}
+        defense_system.journal_encryption(1)
+        await defense_system.checkpoint()
+        defense_system.journal_encryption(1)
+        defense_system.journal.close()
+    
+    async def test_encryption_key_is_journaled_wrapped(self):
+        """Test that only the secret-wrapped key is journaled, and recovery needs the same secret"""
+        secret = Fernet.generate_key()
+        key = Fernet.generate_key()
+        await self.encrypt_guild(self.make_system(secret), key)
+        
+        self.assertNotIn(key.decode(), self.journal_text())
+        recovered = self.make_system(secret)
+        recovered.recover_state()
+        self.assertEqual(recovered.encryption_keys[1], key)
+        self.assertEqual(recovered.decrypt_data(recovered.channel_backup_data[5]['messages'], key), '[]')
+    
+    async def test_encryption_key_without_secret_is_lost(self):
+        """Test that without a secret the key is never journaled and its backups are dropped on restart"""
+        key = Fernet.generate_key()
+        await self.encrypt_guild(self.make_system(), key)
+        
+        self.assertNotIn(key.decode(), self.journal_text())
+        recovered = self.make_system(Fernet.generate_key())
+        recovered.recover_state()
+        self.assertNotIn(1, recovered.encryption_keys)
+        self.assertEqual(recovered.channel_backup_data, {})
+        self.assertIn(5, recovered.encrypted_channels)  # Visibility can still be restored
+
+if __name__ == '__main__':
+    unittest.main()
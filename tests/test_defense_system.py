@@ -3,19 +3,25 @@ Tests for the defense system module
 """
 
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
+import asyncio
+import tempfile
 import sys
 import os
 
 # Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from defense_system import DefenseSystem
+from combat_log_store import CombatLogStore
+from defense_journal import DefenseJournal
 
 class TestDefenseSystem(unittest.TestCase):
     def setUp(self):
         self.mock_bot = Mock()
         self.defense_system = DefenseSystem(self.mock_bot)
+        self.defense_system.combat_logs = CombatLogStore(tempfile.mkdtemp())
+        self.defense_system.journal = DefenseJournal(tempfile.mkdtemp())
     
     def test_protected_user_by_username(self):
         """Test that user 'by_bytes' is automatically protected"""
@@ -56,5 +62,72 @@ class TestDefenseSystem(unittest.TestCase):
         result = self.defense_system.is_protected_user(12345, mock_guild)
         self.assertFalse(result)
 
+    def test_protected_user_from_index(self):
+        """Test that indexed guilds answer from the protected-member index"""
+        mock_guild = Mock()
+        protected_member = Mock(id=1)
+        protected_member.name = "by_bytes"
+        protected_member.display_name = "by_bytes"
+        regular_member = Mock(id=2)
+        regular_member.name = "regular_user"
+        regular_member.display_name = "Regular User"
+        mock_guild.members = [protected_member, regular_member]
+        
+        self.defense_system.protected_index.rebuild(mock_guild)
+        mock_guild.get_member.reset_mock()
+        
+        self.assertTrue(self.defense_system.is_protected_user(1, mock_guild))
+        self.assertFalse(self.defense_system.is_protected_user(2, mock_guild))
+        mock_guild.get_member.assert_not_called()
+        
+        # Nickname change picked up from member update events
+        regular_member.display_name = "by_bytes"
+        regular_member.guild = mock_guild
+        self.defense_system.protected_index.update_member(regular_member)
+        self.assertTrue(self.defense_system.is_protected_user(2, mock_guild))
+    
+    def test_add_and_remove_protected_user(self):
+        """Test that manual protection changes apply immediately"""
+        self.defense_system.add_protected_user(999)
+        self.assertTrue(self.defense_system.is_protected_user(999))
+        
+        self.defense_system.remove_protected_user(999)
+        self.assertFalse(self.defense_system.is_protected_user(999))
+
+    def test_guild_states_are_independent(self):
+        """Test that a raid in one guild does not change another guild's state"""
+        raided = self.defense_system.get_state(1)
+        raided.threat_level = 9
+        raided.cybersecurity_active = True
+
+        self.assertEqual(self.defense_system.get_state(2).threat_level, 0)
+        self.assertFalse(self.defense_system.get_cybersecurity_status(2)['cybersecurity_active'])
+        self.assertEqual(self.defense_system.get_cybersecurity_status()['threat_level'], 9)
+
+    def test_guild_state_history_is_bounded(self):
+        """Test that join history keeps only the most recent joins"""
+        state = self.defense_system.get_state(1)
+        empty_size = state.sizeof()
+        for user_id in range(150):
+            state.join_history.append({'user_id': user_id})
+
+        self.assertEqual(len(state.join_history), 100)
+        self.assertEqual(state.join_history[0]['user_id'], 50)
+        self.assertGreater(state.sizeof(), empty_size)
+
+    def test_blocklist_join_proceeds_when_ban_fails(self):
+        """Test that a flagged join only counts as handled when the ban went through"""
+        member = Mock(id=42)
+        member.guild.id = 1
+        member.guild.name = "Test Guild"
+        member.guild.get_member.return_value = None
+        self.defense_system.blocklist = {42}
+        self.defense_system.ban_pipeline = Mock(ban=AsyncMock(return_value={'banned': 0}))
+        
+        self.assertFalse(asyncio.run(self.defense_system.enforce_blocklist(member)))
+        
+        self.defense_system.ban_pipeline.ban.return_value = {'banned': 1}
+        self.assertTrue(asyncio.run(self.defense_system.enforce_blocklist(member)))
+
 if __name__ == '__main__':
     unittest.main()
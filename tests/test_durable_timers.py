@@ -0,0 +1,51 @@
+"""
+Tests for durable timers
+"""
+
+import unittest
+import asyncio
+import tempfile
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from durable_timers import DurableTimers
+
+class TestDurableTimers(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'timers.json')
+    
+    async def test_timer_survives_restart(self):
+        """Test that a persisted timer is re-armed and fired by a new instance"""
+        timers = DurableTimers(self.path)
+        timers.schedule('restore:1', 'restore', 0.05, {'guild_id': 1})
+        for task in list(timers._tasks.values()):
+            task.cancel()  # Simulate the process stopping
+        
+        fired = []
+        
+        async def handler(payload):
+            fired.append(payload)
+        
+        restarted = DurableTimers(self.path)
+        restarted.register('restore', handler)
+        self.assertEqual(restarted.resume(), 1)
+        await asyncio.sleep(0.1)
+        
+        self.assertEqual(fired, [{'guild_id': 1}])
+        self.assertEqual(restarted.pending(), 0)
+        self.assertEqual(DurableTimers(self.path).pending(), 0)
+    
+    async def test_cancel_removes_timer(self):
+        """Test that a cancelled timer never fires and is not persisted"""
+        timers = DurableTimers(self.path)
+        timers.register('restore', lambda payload: self.fail("timer fired"))
+        timers.schedule('restore:1', 'restore', 0.01, {})
+        self.assertTrue(timers.cancel('restore:1'))
+        await asyncio.sleep(0.05)
+        self.assertEqual(DurableTimers(self.path).pending(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
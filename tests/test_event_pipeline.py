@@ -0,0 +1,109 @@
+"""
+Tests for the gateway event pipeline
+"""
+
+import unittest
+from unittest.mock import Mock
+import asyncio
+import tempfile
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_pipeline import EventPipeline, MessageEvent, MemberJoinEvent, GuildActionEvent
+from defense_system import DefenseSystem
+from combat_log_store import CombatLogStore
+from defense_journal import DefenseJournal
+
+def make_message(guild_id=1):
+    message = Mock()
+    message.guild = Mock(id=guild_id)
+    return message
+
+class TestEventPipeline(unittest.IsolatedAsyncioTestCase):
+    async def test_events_route_by_type(self):
+        """Test that subscribers only receive the event types they asked for"""
+        pipeline = EventPipeline()
+        messages, everything = [], []
+        
+        async def on_message(event):
+            messages.append(event)
+        
+        async def on_any(event):
+            everything.append(event)
+        
+        pipeline.subscribe('messages', on_message, MessageEvent)
+        pipeline.subscribe('all', on_any)
+        
+        await pipeline.publish(MessageEvent(make_message()))
+        await pipeline.publish(MemberJoinEvent(Mock(guild=Mock(id=1))))
+        await pipeline.drain()
+        
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(len(everything), 2)
+        self.assertEqual(pipeline.get_metrics()['published'], {'MessageEvent': 1, 'MemberJoinEvent': 1})
+    
+    async def test_slow_lossy_subscriber_does_not_block(self):
+        """Test that a slow lossy subscriber drops events instead of delaying publishers"""
+        pipeline = EventPipeline()
+        release = asyncio.Event()
+        detected = []
+        
+        async def slow(event):
+            await release.wait()
+        
+        async def detector(event):
+            detected.append(event)
+        
+        pipeline.subscribe('slow', slow, MessageEvent, lossy=True, maxsize=2)
+        pipeline.subscribe('detector', detector, MessageEvent)
+        
+        for _ in range(10):
+            await asyncio.wait_for(pipeline.publish(MessageEvent(make_message())), timeout=1)
+        await asyncio.sleep(0)
+        
+        metrics = pipeline.get_metrics()['subscribers']
+        self.assertGreater(metrics['slow']['dropped'], 0)
+        self.assertEqual(len(detected), 10)
+        release.set()
+        await pipeline.drain()
+    
+    async def test_lossless_subscriber_applies_backpressure(self):
+        """Test that publishing waits for room when a lossless queue is full"""
+        pipeline = EventPipeline()
+        release = asyncio.Event()
+        
+        async def slow(event):
+            await release.wait()
+        
+        pipeline.subscribe('slow', slow, MessageEvent, maxsize=1)
+        await pipeline.publish(MessageEvent(make_message()))
+        await asyncio.sleep(0)  # Worker takes the first event
+        await pipeline.publish(MessageEvent(make_message()))
+        
+        blocked = asyncio.create_task(pipeline.publish(MessageEvent(make_message())))
+        await asyncio.sleep(0.01)
+        self.assertFalse(blocked.done())
+        
+        release.set()
+        await asyncio.wait_for(blocked, timeout=1)
+        await pipeline.drain()
+    
+    async def test_defense_system_consumes_guild_actions(self):
+        """Test that published deletions reach the raid detector state"""
+        defense_system = DefenseSystem(Mock())
+        defense_system.combat_logs = CombatLogStore(tempfile.mkdtemp())
+        defense_system.journal = DefenseJournal(tempfile.mkdtemp())
+        guild = Mock(id=5)
+        
+        await defense_system.events.publish(GuildActionEvent(guild, 'channel_delete', 10, 'general'))
+        await defense_system.events.drain()
+        
+        state = defense_system.get_state(5)
+        self.assertEqual(state.coordinated_actions[0].target_name, 'general')
+        self.assertEqual(len(state.suspicious_activities['channel_deletions']), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Tests for per-guild raid incidents
+"""
+
+import unittest
+from unittest.mock import AsyncMock, Mock
+import asyncio
+import tempfile
+import sys
+import os
+
+import discord
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from defense_system import DefenseSystem
+from combat_log_store import CombatLogStore
+from defense_journal import DefenseJournal
+from backup_catalog import KIND_INCIDENT
+from incident import IncidentPhase
+
+class TestRaidIncidents(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.bot = Mock()
+        self.bot.send_alert_email = AsyncMock()
+        self.defense_system = DefenseSystem(self.bot)
+        self.defense_system.combat_logs = CombatLogStore(tempfile.mkdtemp())
+        self.defense_system.journal = DefenseJournal(tempfile.mkdtemp())
+        self.defense_system.create_comprehensive_backup = AsyncMock(return_value=None)
+        self.defense_system.rollback_channel_overwrites = AsyncMock(return_value=0)
+        
+        async def combat(guild, reason):
+            await asyncio.sleep(0.01)
+        
+        self.defense_system.activate_cybersecurity_combat = AsyncMock(side_effect=combat)
+        self.guild = Mock(id=1, verification_level=discord.VerificationLevel.low, features=[],
+                          edit=AsyncMock(), get_channel=Mock(return_value=None))
+        self.guild.name = "Test Guild"
+    
+    async def test_repeated_detections_run_once(self):
+        """Test that overlapping detections of one raid share a single response"""
+        await asyncio.gather(*[
+            self.defense_system.trigger_raid_protocol(self.guild, "Mass mention spam detected")
+            for _ in range(5)
+        ])
+        await self.defense_system.trigger_raid_protocol(self.guild, "Mass mention spam detected")
+        
+        incident = self.defense_system.get_state(1).incident
+        self.assertEqual(incident.phase, IncidentPhase.CONTAINED)
+        self.assertEqual(incident.detections, 6)
+        self.assertEqual(self.guild.edit.await_count, 1)  # Verification level only
+        self.assertEqual(self.defense_system.activate_cybersecurity_combat.await_count, 0)
+        self.assertEqual(self.defense_system.create_comprehensive_backup.await_count, 1)
+        self.assertEqual(self.bot.send_alert_email.await_count, 1)
+    
+    async def test_emergency_backup_precedes_countermeasures(self):
+        """Test that the raid backup is an incident snapshot taken before the ladder edits the guild"""
+        edits_at_backup = []
+        
+        async def create_backup(guild, changes=None, kind=None):
+            edits_at_backup.append(self.guild.edit.await_count)
+        
+        self.defense_system.create_comprehensive_backup = AsyncMock(side_effect=create_backup)
+        await self.defense_system.trigger_raid_protocol(self.guild, "Mass mention spam detected")
+        
+        self.assertEqual(edits_at_backup, [0])
+        self.assertEqual(self.guild.edit.await_count, 1)
+        self.assertEqual(self.defense_system.create_comprehensive_backup.await_args.kwargs['kind'], KIND_INCIDENT)
+    
+    async def test_escalation_reruns_containment(self):
+        """Test that only a higher threat level re-runs containment within an incident"""
+        await self.defense_system.trigger_raid_protocol(self.guild, "Mass mention spam detected")
+        incident_id = self.defense_system.get_state(1).incident.id
+        
+        await self.defense_system.trigger_raid_protocol(self.guild, "Rapid member joins detected (Bot raid)")
+        
+        state = self.defense_system.get_state(1)
+        self.assertEqual(state.incident.id, incident_id)
+        self.assertEqual(state.threat_level, 9)
+        self.assertEqual(state.incident.escalations, 1)
+        self.assertEqual(self.defense_system.activate_cybersecurity_combat.await_count, 1)
+        self.assertEqual(self.defense_system.create_comprehensive_backup.await_count, 1)
+    
+    async def test_recovery_closes_incident(self):
+        """Test that standing down recovers the guild and allows a new incident"""
+        await self.defense_system.trigger_raid_protocol(self.guild, "Mass mention spam detected")
+        first_id = self.defense_system.get_state(1).incident.id
+        
+        self.assertTrue(await self.defense_system.deactivate_cybersecurity(self.guild))
+        self.assertFalse(await self.defense_system.deactivate_cybersecurity(self.guild))
+        
+        state = self.defense_system.get_state(1)
+        self.assertEqual(state.incident.phase, IncidentPhase.IDLE)
+        self.assertEqual(state.threat_level, 0)
+        self.defense_system.rollback_channel_overwrites.assert_awaited_once_with(self.guild)
+        
+        await self.defense_system.trigger_raid_protocol(self.guild, "Mass mention spam detected")
+        self.assertNotEqual(state.incident.id, first_id)
+    
+    async def test_slow_guild_does_not_stall_raid_checks(self):
+        """Test that a guild still responding to a raid is skipped while other guilds are checked"""
+        release = asyncio.Event()
+        checked = []
+        
+        async def detect(guild):
+            checked.append(guild.id)
+            if guild.id == 1:
+                await release.wait()
+            return False
+        
+        self.defense_system.detect_raid_attempt = detect
+        other = Mock(id=2)
+        
+        self.assertEqual(self.defense_system.schedule_raid_checks([self.guild, other]), 2)
+        await asyncio.sleep(0)
+        self.assertTrue(self.defense_system.raid_check_tasks[2].done())
+        
+        self.assertEqual(self.defense_system.schedule_raid_checks([self.guild, other]), 1)
+        await asyncio.sleep(0)
+        self.assertEqual(checked, [1, 2, 2])
+        
+        release.set()
+        await self.defense_system.raid_check_tasks[1]
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Tests for reverse log tails and streamed bot backups
+"""
+
+import unittest
+import tempfile
+import hashlib
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_tail import tail_lines
+from backup.backup_script import BackupManager
+
+class TestLogTail(unittest.TestCase):
+    def test_tail_matches_readlines(self):
+        """Test that the tail equals readlines()[-n:] whatever the block size, line endings or encoding"""
+        directory = tempfile.mkdtemp()
+        texts = ['', 'one line', 'a\nb\n', '\n\n\n', 'ünïcode\nlines\x0cwith form feed\nend',
+                 ''.join(f"2026-01-01 INFO line {i} {'é' * (i % 5)}\n" for i in range(500))]
+        for index, text in enumerate(texts):
+            path = os.path.join(directory, f'{index}.log')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            with open(path, encoding='utf-8') as f:
+                lines = f.readlines()
+            for count in (0, 1, 2, 50, 1000):
+                for block_size in (1, 7, 4096):
+                    self.assertEqual(tail_lines(path, count, block_size), lines[-count:] if count else [])
+
+    def test_bot_backup_streams_archive(self):
+        """Test that a full bot backup is a tar.gz with the log tails and files, hashed as written"""
+        directory = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            os.makedirs('logs')
+            with open('logs/bot.log', 'w') as f:
+                f.writelines(f"line {i}\n" for i in range(5000))
+            with open('main.py', 'w') as f:
+                f.write('print("bot")\n')
+            with open('config.env', 'w') as f:
+                f.write('BOT_PREFIX=!\nDISCORD_TOKEN=abc\n')
+
+            manager = BackupManager('backups')
+            path = manager.backup_bot_data()
+            data = manager.restore_backup(path)
+        finally:
+            os.chdir(cwd)
+
+        self.assertTrue(path.endswith('.tar.gz'))
+        self.assertEqual(data['backup_type'], 'full')
+        self.assertEqual(data['data']['files'], {'main.py': 'print("bot")\n'})
+        self.assertEqual(data['data']['config']['config_env'], 'BOT_PREFIX=!\nDISCORD_TOKEN=***HIDDEN***\n')
+        logs = data['data']['logs']['logs/bot.log']
+        self.assertEqual((len(logs), logs[0], logs[-1]), (1000, 'line 4000\n', 'line 4999\n'))
+
+        entry = manager.catalog.latest(None)
+        with open(os.path.join(directory, path), 'rb') as f:
+            self.assertEqual(entry['hash'], hashlib.sha256(f.read()).hexdigest())
+        manager.catalog.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Tests for the vectorized member risk audit
+"""
+
+import unittest
+import sys
+import os
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from member_audit import DISCORD_EPOCH, MemberColumns, audit_members, snowflake_time
+
+def snowflake(created: float, sequence: int) -> int:
+    return (int((created - DISCORD_EPOCH) * 1000) << 22) | sequence
+
+def make_member(created: float, joined: float, name: str, avatar=True, roles=2, bot=False, sequence=0):
+    return SimpleNamespace(
+        id=snowflake(created, sequence),
+        joined_at=datetime.fromtimestamp(joined, timezone.utc),
+        avatar=object() if avatar else None,
+        display_name=name,
+        roles=[None] * roles,
+        bot=bot
+    )
+
+class TestMemberAudit(unittest.TestCase):
+    def test_snowflake_time(self):
+        """Test that creation time is decoded from the snowflake"""
+        created = 1700000000.0
+        ids = np.array([snowflake(created, 7)], dtype=np.uint64)
+        self.assertAlmostEqual(snowflake_time(ids)[0], created, places=2)
+    
+    def test_raid_wave_ranks_first(self):
+        """Test that fresh, bare, similarly named accounts from one join wave outrank veterans"""
+        now = time.time()
+        members = [
+            make_member(now - 800 * 86400 - i, now - 300 * 86400 - i * 3600, f"regular{chr(97 + i % 26)}{i}", sequence=i)
+            for i in range(200)
+        ]
+        members += [
+            make_member(now - 3600, now - 60 + i, f"raider_{i:03d}", avatar=False, roles=1, sequence=i)
+            for i in range(15)
+        ]
+        members.append(make_member(now - 3600, now, "helperbot", avatar=False, roles=1, bot=True))
+        
+        report = audit_members(members, limit=15)
+        
+        self.assertEqual(report['members'], 215)  # Bots are not scored
+        self.assertEqual(report['high_risk'], 15)
+        raiders = {member.id for member in members[200:215]}
+        self.assertEqual({entry['user_id'] for entry in report['ranked']}, raiders)
+        self.assertEqual(report['ranked'][0]['name_cluster_size'], 15)
+    
+    def test_empty_guild(self):
+        """Test that a guild with no members scores cleanly"""
+        report = audit_members([])
+        self.assertEqual(report['members'], 0)
+        self.assertEqual(report['ranked'], [])
+        self.assertEqual(len(MemberColumns.from_members([])), 0)
+
+if __name__ == '__main__':
+    unittest.main()
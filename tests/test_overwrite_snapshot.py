@@ -0,0 +1,70 @@
+"""
+Tests for permission overwrite snapshots
+"""
+
+import unittest
+from types import SimpleNamespace
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from overwrite_snapshot import OverwriteSnapshot, encode_overwrites, decode_overwrites
+
+def role(role_id):
+    return discord.Object(id=role_id, type=discord.Role)
+
+class TestOverwriteSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.original = {
+            role(1): discord.PermissionOverwrite(send_messages=True),
+            role(2): discord.PermissionOverwrite(manage_messages=True)
+        }
+        self.channel = SimpleNamespace(id=10, overwrites=dict(self.original))
+        self.snapshot = OverwriteSnapshot(guild_id=99)
+    
+    def lock(self):
+        locked = {target: discord.PermissionOverwrite(view_channel=False) for target in (role(1), role(2), role(3))}
+        self.snapshot.capture(self.channel)
+        self.snapshot.record_applied(self.channel.id, locked)
+        self.channel.overwrites = locked
+    
+    def test_rollback_restores_exact_original(self):
+        """Test that rollback restores the original overwrites and drops added ones"""
+        self.lock()
+        target = self.snapshot.rollback_for(self.channel)
+        self.assertEqual(target, encode_overwrites(self.original))
+    
+    def test_unchanged_channel_needs_no_request(self):
+        """Test that a channel already matching its snapshot is skipped"""
+        self.lock()
+        self.channel.overwrites = dict(self.original)
+        self.assertIsNone(self.snapshot.rollback_for(self.channel))
+    
+    def test_manual_edits_after_lockdown_are_kept(self):
+        """Test that overwrites edited by someone else during lockdown are left alone"""
+        self.lock()
+        manual = discord.PermissionOverwrite(view_channel=True, send_messages=False)
+        self.channel.overwrites = dict(self.channel.overwrites)
+        self.channel.overwrites[role(2)] = manual
+        
+        target = self.snapshot.rollback_for(self.channel)
+        self.assertEqual(target[1], encode_overwrites(self.original)[1])
+        self.assertEqual(target[2], encode_overwrites({role(2): manual})[2])
+        self.assertNotIn(3, target)
+    
+    def test_first_capture_wins(self):
+        """Test that a second lockdown does not overwrite the original snapshot"""
+        self.lock()
+        self.assertFalse(self.snapshot.capture(self.channel))
+        self.assertEqual(self.snapshot.original[10], encode_overwrites(self.original))
+    
+    def test_decode_round_trip(self):
+        """Test that decoded overwrites keep their role/member type"""
+        encoded = encode_overwrites(self.original)
+        self.assertEqual(encode_overwrites(decode_overwrites(encoded)), encoded)
+
+if __name__ == '__main__':
+    unittest.main()
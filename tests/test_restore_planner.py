@@ -0,0 +1,272 @@
+"""
+Tests for diff-based server restores
+"""
+
+import unittest
+import asyncio
+import itertools
+import sys
+import os
+from types import SimpleNamespace
+
+import discord
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from action_scheduler import ActionScheduler
+from overwrite_snapshot import OVERWRITE_MEMBER, OVERWRITE_ROLE, encode_overwrites
+from restore_planner import RestorePhase, RestorePlanner, plan_restore
+
+class FakeRole:
+    def __init__(self, guild, id, name, position, permissions=0, default=False):
+        self.guild = guild
+        self.id = id
+        self.name = name
+        self.position = position
+        self.permissions = discord.Permissions(permissions)
+        self.color = discord.Colour(0)
+        self.hoist = False
+        self.mentionable = False
+        self.managed = False
+        self._default = default
+
+    def is_default(self):
+        return self._default
+
+    async def edit(self, reason=None, **fields):
+        await self.guild.call()
+        for field, value in fields.items():
+            setattr(self, field, value)
+
+class FakeChannel:
+    def __init__(self, guild, id, name, channel_type, position, category_id=None, overwrites=None, **attributes):
+        self.guild = guild
+        self.id = id
+        self.name = name
+        self.type = channel_type
+        self.position = position
+        self.category_id = category_id
+        self.overwrites = overwrites or {}
+        self.topic = attributes.get('topic')
+        self.nsfw = attributes.get('nsfw', False)
+        self.slowmode_delay = attributes.get('slowmode_delay', 0)
+        self.bitrate = attributes.get('bitrate', 64000)
+        self.user_limit = attributes.get('user_limit', 0)
+
+    async def edit(self, reason=None, **fields):
+        await self.guild.call()
+        if 'category' in fields:
+            category = fields.pop('category')
+            self.category_id = category.id if category else None
+        for field, value in fields.items():
+            setattr(self, field, value)
+
+class FakeGuild:
+    """Just enough of discord.Guild for planning and executing restores; every call sleeps ``latency``"""
+
+    def __init__(self, id=1, latency=0.0):
+        self.id = id
+        self.name = 'Guild'
+        self.description = None
+        self.verification_level = discord.VerificationLevel.low
+        self.default_notifications = discord.NotificationLevel.only_mentions
+        self.explicit_content_filter = discord.ContentFilter.disabled
+        self.icon = None
+        self.banner = None
+        self.latency = latency
+        self.calls = 0
+        self._ids = itertools.count(10_000_000)
+        self.roles = [FakeRole(self, id, '@everyone', 0, default=True)]
+        self.me = SimpleNamespace(top_role=FakeRole(self, 999, 'Bot', 1000))
+        self.channels = []
+        self.emojis = []
+        self._state = SimpleNamespace(http=SimpleNamespace(bulk_channel_update=self.bulk_channel_update))
+
+    async def call(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+
+    @property
+    def default_role(self):
+        return self.roles[0]
+
+    def get_role(self, role_id):
+        return next((role for role in self.roles if role.id == role_id), None)
+
+    def get_channel(self, channel_id):
+        return next((channel for channel in self.channels if channel.id == channel_id), None)
+
+    async def edit(self, reason=None, **fields):
+        await self.call()
+        for field, value in fields.items():
+            setattr(self, field, value)
+
+    async def create_role(self, name, color, permissions, hoist, mentionable, reason=None):
+        await self.call()
+        role = FakeRole(self, next(self._ids), name, 1, permissions.value)
+        self.roles.append(role)
+        return role
+
+    async def _create(self, channel_type, name, category=None, position=0, overwrites=None, reason=None, **fields):
+        await self.call()
+        # Like discord.py 2.3.2 Guild._create_channel: only Role keys are sent as role overwrites
+        sent = {
+            discord.Object(id=target.id, type=discord.Role if isinstance(target, FakeRole) else discord.Member): overwrite
+            for target, overwrite in (overwrites or {}).items()
+        }
+        channel = FakeChannel(self, next(self._ids), name, channel_type, position,
+                              category.id if category else None, sent, **fields)
+        self.channels.append(channel)
+        return channel
+
+    async def create_category(self, name, **fields):
+        return await self._create(discord.ChannelType.category, name, **fields)
+
+    async def create_text_channel(self, name, news=False, **fields):
+        return await self._create(discord.ChannelType.news if news else discord.ChannelType.text, name, **fields)
+
+    async def create_voice_channel(self, name, **fields):
+        return await self._create(discord.ChannelType.voice, name, **fields)
+
+    async def create_custom_emoji(self, name, image, reason=None):
+        await self.call()
+        emoji = SimpleNamespace(id=next(self._ids), name=name, image=image)
+        self.emojis.append(emoji)
+        return emoji
+
+    async def edit_role_positions(self, positions, reason=None):
+        await self.call()
+        for role, position in positions.items():
+            role.position = position
+
+    async def bulk_channel_update(self, guild_id, data, reason=None):
+        await self.call()
+        for entry in data:
+            self.get_channel(entry['id']).position = entry['position']
+
+def make_backup(guild_id=1, channel_count=3):
+    """A category holding text channels and a voice channel, one moderator role with overwrites"""
+    channels = [{'id': 100, 'name': 'Community', 'type': 'category', 'position': 0, 'category_id': None,
+                 'permissions': {str(guild_id): {'type': OVERWRITE_ROLE, 'allow': 0, 'deny': 2048}}}]
+    for index in range(channel_count):
+        channels.append({
+            'id': 101 + index, 'name': f'chat-{index}', 'type': 'text', 'position': index, 'category_id': 100,
+            'topic': f'Topic {index}', 'nsfw': False, 'slowmode_delay': 5, 'bitrate': None, 'user_limit': None,
+            'permissions': {'50': {'type': OVERWRITE_ROLE, 'allow': 2048, 'deny': 0}}
+        })
+    channels.append({'id': 200, 'name': 'Voice', 'type': 'voice', 'position': channel_count, 'category_id': 100,
+                     'bitrate': 96000, 'user_limit': 10, 'permissions': {}})
+    return {
+        'metadata': {'guild_id': guild_id},
+        'settings': {'name': 'Guild', 'description': None, 'verification_level': 1,
+                     'default_notifications': 1, 'explicit_content_filter': 0},
+        'roles': [{'id': 50, 'name': 'Moderator', 'color': 0, 'hoist': False, 'mentionable': False,
+                   'permissions': 8192, 'position': 2},
+                  {'id': 51, 'name': 'Member', 'color': 0, 'hoist': False, 'mentionable': False,
+                   'permissions': 0, 'position': 1}],
+        'channels': channels,
+        'emojis': []
+    }
+
+def populate(guild, backup):
+    """Live roles and channels identical to the backup, with the same IDs"""
+    for role_data in backup['roles']:
+        guild.roles.append(FakeRole(guild, role_data['id'], role_data['name'], role_data['position'],
+                                    role_data['permissions']))
+    for data in backup['channels']:
+        overwrites = {
+            discord.Object(id=int(target_id), type=discord.Role): discord.PermissionOverwrite.from_pair(
+                discord.Permissions(overwrite['allow']), discord.Permissions(overwrite['deny']))
+            for target_id, overwrite in data['permissions'].items()
+        }
+        attributes = {field: data[field] for field in ('topic', 'slowmode_delay', 'bitrate', 'user_limit')
+                      if data.get(field) is not None}
+        guild.channels.append(FakeChannel(guild, data['id'], data['name'], discord.ChannelType[data['type']],
+                                          data['position'], data['category_id'], overwrites, **attributes))
+
+class TestRestorePlanner(unittest.IsolatedAsyncioTestCase):
+    async def test_wiped_guild_is_rebuilt_with_dependencies(self):
+        """Test that a wiped guild gets its roles, categories, channels and overwrites back, then needs nothing"""
+        guild = FakeGuild()
+        backup = make_backup()
+        planner = RestorePlanner(ActionScheduler())
+
+        plan = planner.plan(guild, backup)
+        estimate = plan.estimate()
+        self.assertEqual(estimate['phases'], {'roles': 2, 'categories': 1, 'channels': 4, 'positions': 2})
+        self.assertEqual(guild.calls, 0)
+
+        report = await planner.execute(guild, plan)
+        self.assertEqual(report['failed'], 0)
+        self.assertEqual(report['api_calls'], guild.calls)
+
+        moderator = next(role for role in guild.roles if role.name == 'Moderator')
+        category = next(channel for channel in guild.channels if channel.name == 'Community')
+        chat = next(channel for channel in guild.channels if channel.name == 'chat-2')
+        self.assertEqual(moderator.position, 2)
+        self.assertEqual(chat.category_id, category.id)
+        self.assertEqual((chat.topic, chat.slowmode_delay, chat.position), ('Topic 2', 5, 2))
+        self.assertEqual(encode_overwrites(chat.overwrites), {moderator.id: (OVERWRITE_ROLE, 2048, 0)})
+        self.assertEqual(encode_overwrites(category.overwrites), {guild.id: (OVERWRITE_ROLE, 0, 2048)})
+
+        # Recreated objects are matched by name, so a second restore is a no-op
+        self.assertEqual(plan_restore(guild, backup).ops, [])
+
+    async def test_recreated_channels_send_typed_overwrites(self):
+        """Test that a recreated channel sends role overwrites as roles and member overwrites as members"""
+        guild = FakeGuild()
+        backup = make_backup(channel_count=1)
+        backup['channels'][1]['permissions']['77'] = {'type': OVERWRITE_MEMBER, 'allow': 1024, 'deny': 0}
+        populate(guild, {'roles': backup['roles'], 'channels': []})
+
+        await RestorePlanner(ActionScheduler()).execute(guild, plan_restore(guild, backup))
+        chat = next(channel for channel in guild.channels if channel.name == 'chat-0')
+        self.assertEqual(encode_overwrites(chat.overwrites),
+                         {50: (OVERWRITE_ROLE, 2048, 0), 77: (OVERWRITE_MEMBER, 1024, 0)})
+
+    async def test_only_changed_objects_are_edited(self):
+        """Test that a renamed channel and a changed role cost one edit each and nothing else is touched"""
+        guild = FakeGuild()
+        backup = make_backup()
+        populate(guild, backup)
+        self.assertEqual(plan_restore(guild, backup).ops, [])
+
+        next(channel for channel in guild.channels if channel.name == 'chat-1').name = 'pwned'
+        next(role for role in guild.roles if role.name == 'Member').permissions = discord.Permissions(8)
+
+        plan = plan_restore(guild, backup)
+        self.assertEqual(sorted((op.phase, op.action) for op in plan.ops),
+                         [(RestorePhase.ROLES, 'edit_role'), (RestorePhase.CHANNELS, 'edit_channel')])
+        await RestorePlanner(ActionScheduler()).execute(guild, plan)
+        self.assertEqual(guild.calls, 2)
+        self.assertEqual(plan_restore(guild, backup).ops, [])
+
+    async def test_role_positions_skip_roles_the_bot_cannot_move(self):
+        """Test that the bulk position edit leaves out managed roles and roles at or above the bot's"""
+        guild = FakeGuild()
+        backup = make_backup()
+        backup['roles'] += [{'id': 52, 'name': 'Integration', 'color': 0, 'hoist': False, 'mentionable': False,
+                             'permissions': 0, 'position': 3},
+                            {'id': 53, 'name': 'Owner', 'color': 0, 'hoist': False, 'mentionable': False,
+                             'permissions': 8, 'position': 11}]
+        populate(guild, backup)
+        for role in guild.roles:
+            role.position = {50: 1, 51: 2, 52: 4, 53: 12}.get(role.id, role.position)
+        guild.get_role(52).managed = True
+        guild.me.top_role.position = 10
+
+        moved = []
+        edit_role_positions = guild.edit_role_positions
+
+        async def record(positions, reason=None):
+            moved.extend(role.id for role in positions)
+            await edit_role_positions(positions, reason=reason)
+
+        guild.edit_role_positions = record
+        await RestorePlanner(ActionScheduler()).execute(guild, plan_restore(guild, backup))
+        self.assertEqual(sorted(moved), [50, 51])
+        self.assertEqual([guild.get_role(role_id).position for role_id in (50, 51, 52, 53)], [2, 1, 4, 12])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Tests for tiered backup retention and reference-counted snapshot objects
+"""
+
+import unittest
+import tempfile
+import copy
+import sys
+import os
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backup_catalog import BackupCatalog
+from retention import RetentionEngine, expired
+from snapshot_store import SnapshotStore
+from timing import DAY_MS, MINUTE_MS, to_ms
+from tests.test_snapshot_store import make_backup
+
+def object_files(directory):
+    return sorted(name for _, _, names in os.walk(os.path.join(directory, 'objects')) for name in names)
+
+class TestRetention(unittest.TestCase):
+    def test_tiers_keep_one_backup_per_interval(self):
+        """Test that the last hour is kept whole, then one backup per hour and per day, and reruns are stable"""
+        now = 1000 * DAY_MS
+        entries = [{'created_ms': now - index * 10 * MINUTE_MS} for index in range(40 * 24 * 6)]
+        removed = expired(entries, now)
+        kept = [entry for entry in entries if entry not in removed]
+
+        self.assertEqual(len([entry for entry in kept if now - entry['created_ms'] < 30 * DAY_MS]), 6 + 24 + 30)
+        self.assertIn(len(kept) - 60, (2, 3))
+        self.assertEqual(expired(kept, now), [])
+        self.assertEqual(expired(entries[-1:], now + 10_000 * DAY_MS), [])
+
+    def test_expired_snapshots_free_only_their_objects(self):
+        """Test that expiring snapshots deletes the objects and assets only they used, and nothing else"""
+        directory = tempfile.mkdtemp()
+        catalog = BackupCatalog(directory)
+        store = SnapshotStore(directory, catalog=catalog)
+
+        backup = make_backup(1, '2026-01-01T00:00:00')
+        backup['settings']['icon_asset'] = 'a' * 64
+        paths = [store.write_snapshot(backup)]
+        for day in range(1, 4):
+            backup = copy.deepcopy(backup)
+            backup['metadata']['created_at'] = f'2026-01-0{day + 1}T00:00:00'
+            backup['settings']['icon_asset'] = 'b' * 64
+            backup['channels'][day]['permissions'] = {'1': {'allow': day, 'deny': 0}}
+            paths.append(store.write_snapshot(backup))
+
+        # Only the last two days are kept daily; the first two snapshots expire
+        now = to_ms(datetime.fromisoformat('2026-01-04T12:00:00')) + DAY_MS
+        tiers = ((DAY_MS, 0), (3 * DAY_MS, DAY_MS))
+        counts = RetentionEngine(catalog, store, tiers=tiers).run(now)
+
+        self.assertEqual((counts['snapshots'], counts['assets']), (2, 1))
+        self.assertEqual([os.path.exists(path) for path in paths], [False, False, True, True])
+        self.assertEqual(store.read_snapshot(paths[3]), backup)
+
+        # Left on disk is exactly what the remaining snapshots reference
+        fresh = SnapshotStore(tempfile.mkdtemp())
+        for path in paths[2:]:
+            fresh.write_snapshot(store.read_snapshot(path))
+        self.assertEqual(object_files(directory), object_files(fresh.directory))
+
+        # A recount from the manifests agrees with the counts kept while writing and deleting
+        digest = store.read_manifest(paths[3])['channels'][0]
+        before = catalog.refs(digest)
+        store.count_references()
+        self.assertEqual((before, catalog.refs(digest), catalog.refs('b' * 64)), (2, 2, 1))
+        catalog.close()
+
+    def test_freed_assets_are_deleted_under_the_store_lock(self):
+        """Test that retention removes freed assets while the store is locked, and only at a count of zero"""
+        directory = tempfile.mkdtemp()
+        catalog = BackupCatalog(directory)
+        store = SnapshotStore(directory, catalog=catalog)
+        deleted = []
+
+        class Assets:
+            def delete(self, digest):
+                deleted.append((digest, store._lock._is_owned(), catalog.refs(digest)))
+
+        paths = []
+        for day, icon in enumerate(('a', 'b')):
+            backup = make_backup(1, f'2026-01-0{day + 1}T00:00:00')
+            backup['settings']['icon_asset'] = icon * 64
+            paths.append(store.write_snapshot(backup))
+
+        now = to_ms(datetime.fromisoformat('2026-01-02T12:00:00')) + DAY_MS
+        tiers = ((DAY_MS, 0), (2 * DAY_MS, DAY_MS))
+        counts = RetentionEngine(catalog, store, Assets(), tiers=tiers).run(now)
+
+        self.assertEqual(counts['assets'], 1)
+        self.assertEqual(deleted, [('a' * 64, True, 0)])
+        catalog.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Tests for content-addressed guild snapshots
+"""
+
+import unittest
+import tempfile
+import copy
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import Mock
+from datetime import datetime
+
+from backup_catalog import BackupCatalog, KIND_INCIDENT, KIND_SNAPSHOT
+from defense_system import DefenseSystem
+from incident import Incident, IncidentPhase
+from snapshot_store import SnapshotStore
+
+def make_backup(guild_id, created_at, channel_count=20):
+    return {
+        'metadata': {'guild_id': guild_id, 'guild_name': 'Test Guild', 'created_at': created_at, 'member_count': 10},
+        'settings': {'name': 'Test Guild', 'description': None, 'verification_level': 1},
+        'channels': [{'id': i, 'name': f'channel-{i}', 'type': 'text', 'position': i, 'category_id': None,
+                      'permissions': {'1': {'allow': 0, 'deny': 1024}}}
+                     for i in range(channel_count)],
+        'roles': [{'id': 100 + i, 'name': f'role-{i}', 'color': 0, 'hoist': False,
+                   'mentionable': False, 'permissions': 0, 'position': i} for i in range(5)],
+        'emojis': [{'name': 'wave', 'url': 'https://cdn.example/wave.png', 'animated': False}]
+    }
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = SnapshotStore(self.directory)
+
+    def test_round_trip(self):
+        """Test that a snapshot rebuilds the exact backup it was written from"""
+        backup = make_backup(1, '2026-01-01T10:00:00.000001')
+        path = self.store.write_snapshot(backup)
+
+        self.assertTrue(path.endswith('1_20260101_100000.json'))
+        self.assertEqual(SnapshotStore(self.directory).read_snapshot(path), backup)
+        self.assertEqual(self.store.find(os.path.basename(path)), path)
+
+    def test_second_snapshot_writes_only_changes(self):
+        """Test that unchanged items are shared and an unchanged guild writes no manifest"""
+        first = make_backup(1, '2026-01-01T10:00:00')
+        self.store.write_snapshot(first)
+        written = self.store.stats['objects_written']
+
+        second = copy.deepcopy(first)
+        second['metadata']['created_at'] = '2026-01-01T11:00:00'
+        second['channels'][3]['name'] = 'renamed'
+        path = self.store.write_snapshot(second)
+
+        self.assertEqual(self.store.stats['objects_written'], written + 1)
+        self.assertEqual(len(self.store.snapshots(1)), 2)
+        self.assertEqual(self.store.read_snapshot(path), second)
+
+        third = copy.deepcopy(second)
+        third['metadata']['created_at'] = '2026-01-01T12:00:00'
+        self.assertEqual(self.store.write_snapshot(third), path)
+        self.assertEqual(self.store.stats['unchanged'], 1)
+
+    def test_objects_shared_across_guilds_and_compression(self):
+        """Test that identical items are stored once and older encodings stay readable"""
+        path = self.store.write_snapshot(make_backup(1, '2026-01-01T10:00:00'))
+        written = self.store.stats['objects_written']
+
+        gzip_store = SnapshotStore(self.directory, 'gzip')
+        other = make_backup(2, '2026-01-01T10:00:00')
+        other['channels'].append({'id': 999, 'name': 'new', 'type': 'text', 'position': 99,
+                                  'category_id': None, 'permissions': {}})
+        gzip_store.write_snapshot(other)
+
+        self.assertEqual(written, 28)
+        self.assertEqual(gzip_store.stats['objects_written'], 2)
+        self.assertEqual(gzip_store.read_snapshot(path), make_backup(1, '2026-01-01T10:00:00'))
+
+    def test_incident_snapshot_is_never_the_restore_base(self):
+        """Test that a mid-raid snapshot leaves the latest snapshot alone and restores start before the incident"""
+        catalog = BackupCatalog(self.directory)
+        store = SnapshotStore(self.directory, catalog=catalog)
+        before = store.write_snapshot(make_backup(1, '2026-01-01T10:00:00'))
+
+        damaged = make_backup(1, '2026-01-01T11:00:00', channel_count=5)
+        incident_path = store.write_snapshot(damaged, kind=KIND_INCIDENT)
+        self.assertTrue(incident_path.endswith('_incident.json'))
+        self.assertEqual(store.summary(1).snapshot, before)
+        self.assertEqual(catalog.latest(1, KIND_SNAPSHOT)['path'], before)
+        self.assertEqual(store.read_snapshot(incident_path), damaged)
+
+        # A snapshot written after the incident started is skipped while it is active
+        store.write_snapshot(make_backup(1, '2026-01-01T11:30:00', channel_count=6))
+        defense_system = DefenseSystem(Mock())
+        defense_system.backup_catalog = catalog
+        incident = defense_system.get_state(1).incident = Incident(1, 'raid', 8)
+        incident.started_at = datetime(2026, 1, 1, 10, 30)
+        incident.transition(IncidentPhase.CONTAINING)
+        self.assertEqual(defense_system.restore_base(1)['path'], before)
+        catalog.close()
+
+        # Catalogs rebuilt from the files keep incident snapshots apart
+        os.remove(os.path.join(self.directory, 'catalog.db'))
+        catalog = BackupCatalog(self.directory)
+        self.assertEqual(catalog.latest(1, KIND_INCIDENT)['path'], incident_path)
+        catalog.close()
+
+if __name__ == '__main__':
+    unittest.main()
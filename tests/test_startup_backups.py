@@ -0,0 +1,63 @@
+"""
+Tests for the background startup backup sweep
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+import asyncio
+import tempfile
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from defense_system import DefenseSystem
+from combat_log_store import CombatLogStore
+from defense_journal import DefenseJournal
+from backup_catalog import BackupCatalog
+from snapshot_store import SnapshotStore
+
+class TestStartupBackups(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.defense_system = DefenseSystem(Mock())
+        self.defense_system.combat_logs = CombatLogStore(tempfile.mkdtemp())
+        self.defense_system.journal = DefenseJournal(tempfile.mkdtemp())
+        directory = tempfile.mkdtemp()
+        self.defense_system.backup_catalog = BackupCatalog(directory)
+        self.defense_system.snapshot_store = SnapshotStore(directory, catalog=self.defense_system.backup_catalog)
+
+        self.running = 0
+        self.peak = 0
+
+        async def create_backup(guild):
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            await asyncio.sleep(0.01)
+            self.running -= 1
+            return f'{guild.id}.json'
+
+        self.defense_system.create_comprehensive_backup = create_backup
+
+    def tearDown(self):
+        self.defense_system.backup_catalog.close()
+
+    @patch('defense_system.STARTUP_BACKUP_JITTER_SECONDS', 0)
+    @patch('defense_system.STARTUP_BACKUP_CONCURRENCY', 3)
+    async def test_bounded_sweep_skips_fresh_guilds(self):
+        """Test that backups run concurrently up to the limit and fresh snapshots are reused"""
+        backup = {'metadata': {'guild_id': 1, 'created_at': '2099-01-01T00:00:00', 'member_count': 5},
+                  'settings': {'name': 'Fresh'}, 'channels': []}
+        self.defense_system.snapshot_store.write_snapshot(backup)
+
+        guilds = [Mock(id=guild_id) for guild_id in range(1, 11)]
+        task = self.defense_system.schedule_startup_backups(guilds)
+        self.assertIsNone(self.defense_system.schedule_startup_backups(guilds))
+        counts = await task
+
+        self.assertEqual(counts, {'created': 9, 'fresh': 1, 'failed': 0})
+        self.assertEqual(self.peak, 3)
+        self.assertEqual(self.defense_system.server_backups[1].member_count, 5)
+
+if __name__ == '__main__':
+    unittest.main()
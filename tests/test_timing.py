@@ -0,0 +1,64 @@
+"""
+Tests for snowflake and epoch-millisecond timing utilities
+"""
+
+import unittest
+from unittest.mock import Mock
+from collections import deque
+from datetime import datetime, timezone
+import tempfile
+import sys
+import os
+
+import discord
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timing import DAY_MS, MINUTE_MS, account_age_ms, count_since, now_ms, records_since, snowflake_ms, to_ms
+from defense_system import DefenseSystem
+from defense_journal import DefenseJournal
+from combat_log_store import CombatLogStore
+
+class TestTiming(unittest.TestCase):
+    def test_snowflake_matches_discord(self):
+        """Test that snowflake decoding agrees with discord.py's timezone-aware time"""
+        snowflake = discord.utils.time_snowflake(datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc))
+        self.assertEqual(snowflake_ms(snowflake), to_ms(discord.utils.snowflake_time(snowflake)))
+    
+    def test_naive_and_aware_agree(self):
+        """Test that local naive and UTC aware datetimes for the same instant map to the same ms"""
+        aware = datetime.now(timezone.utc)
+        naive = aware.astimezone().replace(tzinfo=None)
+        self.assertEqual(to_ms(aware), to_ms(naive))
+    
+    def test_windows_scan_only_recent_items(self):
+        """Test window counts on append-ordered histories"""
+        current_time = now_ms()
+        history = deque(current_time - offset * MINUTE_MS for offset in (30, 20, 4, 3, 1))
+        self.assertEqual(count_since(history, current_time - 5 * MINUTE_MS), 3)
+        
+        records = [{'timestamp_ms': value} for value in history]
+        self.assertEqual(records_since(records, current_time - 5 * MINUTE_MS), records[2:])
+
+class TestDetectorTiming(unittest.IsolatedAsyncioTestCase):
+    async def test_new_accounts_detected(self):
+        """Test that account age uses the snowflake instead of naive minus aware datetimes"""
+        defense_system = DefenseSystem(Mock())
+        defense_system.combat_logs = CombatLogStore(tempfile.mkdtemp())
+        defense_system.journal = DefenseJournal(tempfile.mkdtemp())
+        
+        created = datetime.now(timezone.utc)
+        member = Mock(id=discord.utils.time_snowflake(created), created_at=created,
+                      display_name="newcomer", avatar=None, discriminator='0')
+        guild = Mock(id=1, members=[member], get_member=Mock(return_value=member))
+        
+        await defense_system.track_member_join(guild, member)
+        recent_joins = records_since(defense_system.get_state(1).join_history, now_ms() - 10 * MINUTE_MS)
+        
+        self.assertEqual(len(recent_joins), 1)
+        self.assertLess(account_age_ms(member.id), DAY_MS)
+        self.assertEqual(await defense_system.analyze_member_patterns(guild, recent_joins), [member])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Timing Utilities
+Integer epoch milliseconds for detector windows, decoded straight from Discord snowflakes
+"""
+
+import time
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import Callable, Iterable, List
+
+DISCORD_EPOCH_MS = 1420070400000
+
+SECOND_MS = 1000
+MINUTE_MS = 60 * SECOND_MS
+HOUR_MS = 60 * MINUTE_MS
+DAY_MS = 24 * HOUR_MS
+
+
+def now_ms() -> int:
+    """Wall-clock Unix time in milliseconds; comparable across restarts and with snowflakes"""
+    return time.time_ns() // 1_000_000
+
+
+def monotonic_ms() -> int:
+    """Monotonic milliseconds for in-process durations that must survive clock changes"""
+    return time.monotonic_ns() // 1_000_000
+
+
+def snowflake_ms(snowflake: int) -> int:
+    """Unix creation time in milliseconds encoded in a Discord snowflake ID"""
+    return (snowflake >> 22) + DISCORD_EPOCH_MS
+
+
+def account_age_ms(user_id: int, now: int = None) -> int:
+    """Age of a Discord account from its ID alone, no datetime parsing or timezone handling"""
+    return (now_ms() if now is None else now) - snowflake_ms(user_id)
+
+
+def to_ms(value: datetime) -> int:
+    """Epoch milliseconds for a datetime; naive values are local time, as ``datetime.now()`` returns"""
+    return int(value.timestamp() * 1000)
+
+
+def from_ms(value: int) -> datetime:
+    """Timezone-aware UTC datetime for display"""
+    return datetime.fromtimestamp(value / 1000, timezone.utc)
+
+
+def count_since(timestamps: Iterable[int], cutoff: int) -> int:
+    """Number of timestamps at or after ``cutoff`` in an append-ordered history.
+
+    Walks back from the newest value and stops at the first older one, so the
+    cost is the number of recent items rather than the history length.
+    """
+    count = 0
+    for value in reversed(timestamps):
+        if value < cutoff:
+            break
+        count += 1
+    return count
+
+
+def records_since(records: Iterable, cutoff: int, key: Callable = itemgetter('timestamp_ms')) -> List:
+    """Records at or after ``cutoff`` from an append-ordered history, oldest first"""
+    found = []
+    for record in reversed(records):
+        if key(record) < cutoff:
+            break
+        found.append(record)
+    found.reverse()
+    return found
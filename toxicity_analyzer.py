@@ -11,6 +11,8 @@ from typing import Dict, List, Optional
 import logging
 import google.generativeai as genai
 
+from action_scheduler import ActionPriority, route_bucket
+
 logger = logging.getLogger(__name__)
 
 class ToxicityAnalyzer:
@@ -32,6 +34,20 @@ class ToxicityAnalyzer:
             'extreme': 0.95
         }
     
+    async def handle_event(self, event):
+        """Toxicity subscriber for message events from the gateway event pipeline"""
+        message = event.message
+        if len(message.content.strip()) <= 5:
+            return
+        
+        # Skip toxicity analysis for protected users
+        if self.bot.defense_system.is_protected_user(message.author.id, message.guild):
+            return
+        
+        toxicity_score = await self.analyze_message(message)
+        if toxicity_score > 0.3:  # Threshold for concerning content
+            await self.update_user_toxicity(message.author, message, toxicity_score)
+    
     async def analyze_message(self, message: discord.Message) -> float:
         """Analyze a message for toxicity using Gemini AI"""
         try:
@@ -56,7 +72,8 @@ class ToxicityAnalyzer:
             Respond with only a decimal number between 0.0 and 1.0.
             """
             
-            response = self.gemini_model.generate_content(prompt)
+            # Blocking client call, kept off the event loop
+            response = await asyncio.to_thread(self.gemini_model.generate_content, prompt)
             toxicity_score = float(response.text.strip())
             
             # Validate score
@@ -150,8 +167,8 @@ class ToxicityAnalyzer:
             # Remove old toxicity roles
             for role_name in self.toxicity_roles.values():
                 old_role = discord.utils.get(guild.roles, name=role_name)
-                if old_role and old_role in member.roles:
-                    await member.remove_roles(old_role)
+                if old_role and old_role in member.roles and old_role.name != new_role_name:
+                    await self.schedule_member_role(member, old_role, add=False)
             
             # Add new role if needed
             if new_role_name:
@@ -161,11 +178,23 @@ class ToxicityAnalyzer:
                     role = await self.create_toxicity_role(guild, new_role_name, toxicity_level)
                 
                 if role and role not in member.roles:
-                    await member.add_roles(role)
+                    await self.schedule_member_role(member, role, add=True)
             
         except Exception as e:
             logger.error(f"Error updating toxicity role: {e}")
     
+    async def schedule_member_role(self, member: discord.Member, role: discord.Role, add: bool):
+        """Add or remove a toxicity role at cosmetic priority so defense actions go first"""
+        method = 'PUT' if add else 'DELETE'
+        factory = (lambda: member.add_roles(role)) if add else (lambda: member.remove_roles(role))
+        await self.bot.action_scheduler.run(
+            route_bucket(method, '/guilds/{guild_id}/members/{user_id}/roles/{role_id}',
+                         guild_id=member.guild.id, user_id=member.id, role_id=role.id),
+            factory,
+            priority=ActionPriority.COSMETIC,
+            key=('member_role', member.id, role.id)
+        )
+    
     async def create_toxicity_role(self, guild: discord.Guild, role_name: str, toxicity_level: float):
         """Create a toxicity role with appropriate color and settings"""
         try:
@@ -318,7 +347,7 @@ IMMEDIATE ACTION REQUIRED!
                         for role_name in self.toxicity_roles.values():
                             role = discord.utils.get(guild.roles, name=role_name)
                             if role and role in member.roles:
-                                await member.remove_roles(role)
+                                await self.schedule_member_role(member, role, add=False)
                 
                 logger.info(f"Toxicity level reset for user {user.display_name}")
                 return True